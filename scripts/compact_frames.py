@@ -0,0 +1,24 @@
+"""
+The compact ingestion dtypes of the ai-engine service, for the standalone
+scripts.
+
+services/ai-engine/src/compact_frames.py is the one definition. It is loaded
+here from its path, so the scripts share it without the service being
+installed or on sys.path.
+"""
+import importlib.util
+import os
+import sys
+
+SOURCE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                           '..', 'services', 'ai-engine', 'src', 'compact_frames.py')
+
+_spec = importlib.util.spec_from_file_location('ai_engine_compact_frames', SOURCE_PATH)
+_service = importlib.util.module_from_spec(_spec)
+# Registered before running it, so that what it defines pickles by reference
+sys.modules[_spec.name] = _service
+_spec.loader.exec_module(_service)
+
+CATEGORY = _service.CATEGORY
+COMPACT_DTYPES = _service.COMPACT_DTYPES
+compact_frame = _service.compact_frame
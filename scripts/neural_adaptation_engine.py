@@ -3,6 +3,8 @@ import pandas as pd
 from sklearn.neural_network import MLPRegressor
 import json
 
+from compact_frames import compact_frame
+
 class NeuralLearningAdaptationEngine:
     def __init__(self):
         self.learning_models = {}
@@ -16,6 +18,7 @@ class NeuralLearningAdaptationEngine:
         3. Retrieval and Application
         4. Feedback Integration
         """
+        learning_data = compact_frame(learning_data)
         
         # Step 1: Sensory Input Analysis
         sensory_profile = self._analyze_sensory_preferences(student_id, learning_data)
@@ -216,7 +219,7 @@ class NeuralLearningAdaptationEngine:
 # Example usage
 def demonstrate_neural_adaptation():
     # Sample learning data
-    learning_data = pd.DataFrame({
+    learning_data = compact_frame(pd.DataFrame({
         'student_id': [1] * 100,
         'content_type': np.random.choice(['visual', 'auditory', 'kinesthetic'], 100),
         'comprehension_score': np.random.beta(3, 2, 100),
@@ -227,7 +230,7 @@ def demonstrate_neural_adaptation():
         'session_engagement': np.random.beta(4, 2, 100),
         'information_density': np.random.uniform(0.1, 1.0, 100),
         'spacing_interval': np.random.choice([1, 2, 7, 14], 100)
-    })
+    }))
     
     # Analyze neural patterns
     engine = NeuralLearningAdaptationEngine()
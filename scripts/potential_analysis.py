@@ -1,12 +1,312 @@
+import multiprocessing
+import os
+import traceback
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
 import numpy as np
 import pandas as pd
 from sklearn.cluster import KMeans
 from sklearn.decomposition import PCA
 import json
 
+from compact_frames import compact_frame
+
+DEFAULT_RULES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'potential_rules.json')
+
+COMPARISONS = {
+    '>': np.greater,
+    '>=': np.greater_equal,
+    '<': np.less,
+    '<=': np.less_equal,
+    '==': np.equal,
+    '!=': np.not_equal
+}
+
+class StudentPartitions:
+    """
+    A table's rows grouped by student once, so that each student's rows are a
+    contiguous slice found in O(1) instead of a full-table filter per lookup
+    """
+    def __init__(self, data, key='student_id'):
+        data = compact_frame(data)
+        codes, students = pd.factorize(data[key])
+        order = np.argsort(codes, kind='stable')
+        self.data = data.iloc[order]
+        self.students = students
+        # Rows of the i-th student are data[offsets[i]:offsets[i + 1]]
+        self.offsets = np.searchsorted(codes[order], np.arange(len(students) + 1))
+        self._positions = {student: i for i, student in enumerate(students)}
+    
+    @classmethod
+    def of(cls, data, key='student_id'):
+        """data partitioned by student, unless it already is"""
+        return data if isinstance(data, cls) else cls(data, key)
+    
+    def rows(self, student_id):
+        """The student's rows, a slice of the partitioned table (empty for an unknown student)"""
+        i = self._positions.get(student_id)
+        if i is None:
+            return self.data.iloc[:0]
+        return self.data.iloc[self.offsets[i]:self.offsets[i + 1]]
+
+class PotentialRules:
+    """
+    Threshold rules for recommended paths and nurturing strategies, kept as a
+    table of (kind, name, indicator, comparison, threshold) rows so that they
+    can change without code edits. A rule matches when all of its rows hold;
+    a NaN indicator satisfies no comparison.
+    
+    Each kind's rows are compiled into column indices, thresholds and a
+    row-to-rule membership matrix, so a whole cohort's indicator matrix is
+    scored with one comparison per operator and one matrix product.
+    """
+    KINDS = {'path': ('path_type', 'paths'), 'strategy': ('strategy', 'strategies')}
+    
+    def __init__(self, rules, paths, strategies):
+        self.table = pd.DataFrame(rules, columns=['kind', 'name', 'indicator', 'comparison', 'threshold'])
+        self.payloads = {'path': paths, 'strategy': strategies}
+        errors = []
+        for row in self.table.itertuples():
+            if row.kind not in self.KINDS:
+                errors.append(f"{row.name}: unknown kind {row.kind!r}")
+            elif row.name not in self.payloads[row.kind]:
+                errors.append(f"{row.name}: no {self.KINDS[row.kind][1]} entry")
+            if row.comparison not in COMPARISONS:
+                errors.append(f"{row.name}: unknown comparison {row.comparison!r}")
+        if errors:
+            raise ValueError("; ".join(errors))
+        self._compiled = {kind: self._compile(self.table[self.table['kind'] == kind]) for kind in self.KINDS}
+    
+    @classmethod
+    def load(cls, path=None):
+        """Rules from a JSON file, by default the potential_rules.json next to this module"""
+        with open(path or DEFAULT_RULES_PATH) as f:
+            config = json.load(f)
+        return cls(config['rules'], config.get('paths', {}), config.get('strategies', {}))
+    
+    @staticmethod
+    def _compile(rows):
+        # Rules keep the order of their first row in the table
+        names = list(dict.fromkeys(rows['name']))
+        indicators = list(dict.fromkeys(rows['indicator']))
+        membership = np.zeros((len(rows), len(names)), dtype=np.int64)
+        membership[np.arange(len(rows)), [names.index(name) for name in rows['name']]] = 1
+        return {
+            'names': names,
+            'indicators': indicators,
+            'columns': np.array([indicators.index(indicator) for indicator in rows['indicator']], dtype=np.intp),
+            'comparisons': rows['comparison'].to_numpy(),
+            'thresholds': rows['threshold'].to_numpy(dtype=np.float64),
+            'membership': membership
+        }
+    
+    def evaluate(self, indicators, kind):
+        """
+        Which rules of a kind each row of an indicator frame (one column per
+        indicator) matches, as a boolean frame with one column per rule
+        """
+        compiled = self._compiled[kind]
+        self._check_indicators(kind, indicators.columns)
+        matched = self._matched(compiled, indicators[compiled['indicators']].to_numpy(dtype=np.float64))
+        return pd.DataFrame(matched, index=indicators.index, columns=compiled['names'])
+    
+    def match(self, indicators, kind):
+        """
+        The matched rules of each row, as lists of path or strategy entries in
+        table order; entries of different rows share their list values
+        """
+        matched = self.evaluate(indicators, kind)
+        return [self._entries(kind, row) for row in matched.to_numpy()]
+    
+    def indicators(self, kind):
+        """The indicators the rules of a kind read"""
+        return list(self._compiled[kind]['indicators'])
+    
+    def match_one(self, kind, indicators):
+        """match for a single student's indicators given as a dict"""
+        compiled = self._compiled[kind]
+        self._check_indicators(kind, indicators)
+        values = np.array([[indicators[indicator] for indicator in compiled['indicators']]], dtype=np.float64)
+        return self._entries(kind, self._matched(compiled, values)[0])
+    
+    def _check_indicators(self, kind, available):
+        missing = [indicator for indicator in self._compiled[kind]['indicators'] if indicator not in available]
+        if missing:
+            raise ValueError(f"Indicators required by the {kind} rules are missing: {', '.join(missing)}")
+    
+    @staticmethod
+    def _matched(compiled, values):
+        """Boolean (rows x rules) matrix from values with one column per compiled indicator"""
+        values = values[:, compiled['columns']]
+        holds = np.zeros(values.shape, dtype=bool)
+        for comparison, compare in COMPARISONS.items():
+            selected = compiled['comparisons'] == comparison
+            if selected.any():
+                holds[:, selected] = compare(values[:, selected], compiled['thresholds'][selected])
+        return (~holds).astype(np.int64) @ compiled['membership'] == 0
+    
+    def _entries(self, kind, matched_row):
+        key, _ = self.KINDS[kind]
+        names = self._compiled[kind]['names']
+        return [{key: names[j], **self.payloads[kind][names[j]]} for j in np.flatnonzero(matched_row)]
+
+class StudentTables:
+    """
+    The interaction, assessment and behavioural tables of an analysis, each
+    read only when a requested section needs it.
+    
+    When many students are analysed, a table is partitioned by student the
+    first time it is read. For a single student (partition=False) a table
+    is filtered to their rows instead, which costs one comparison rather
+    than a sort of the whole table; tables passed already partitioned are
+    sliced either way.
+    """
+    def __init__(self, interaction_data, assessment_data, behavioral_data, partition=True):
+        self._tables = {'interactions': interaction_data, 'assessments': assessment_data, 'behavior': behavioral_data}
+        self.partition = partition
+    
+    def partitions(self, name):
+        self._tables[name] = StudentPartitions.of(self._tables[name])
+        return self._tables[name]
+    
+    def rows(self, name, student_id):
+        """The student's rows of a table"""
+        table = self._tables[name]
+        if self.partition or isinstance(table, StudentPartitions):
+            return self.partitions(name).rows(student_id)
+        return compact_frame(table[table['student_id'] == student_id])
+
+# Sections of a potential map computed from one table, as the engine method
+# measuring each of their indicators, or one method computing the whole section
+SECTION_SOURCES = {
+    # How the student processes information and thinks
+    'cognitive_strengths': ('interactions', {
+        'information_processing_speed': '_measure_processing_speed',
+        'attention_span_pattern': '_calculate_attention_patterns',
+        'memory_retention_style': '_analyze_memory_patterns',
+        'abstract_thinking_ability': '_measure_abstract_thinking',
+        'pattern_recognition_strength': '_assess_pattern_recognition',
+        'metacognitive_awareness': '_measure_metacognition'
+    }),
+    # Beyond traditional learning styles: HOW they learn best
+    'learning_optimization': ('behavior', {
+        'optimal_cognitive_load': '_calculate_optimal_load',
+        'information_chunking_preference': '_analyze_chunking_patterns',
+        'feedback_responsiveness': '_measure_feedback_response',
+        'exploration_vs_exploitation': '_analyze_learning_strategy',
+        'collaborative_vs_individual': '_assess_social_learning_preference',
+        'concrete_vs_abstract_preference': '_measure_abstraction_comfort'
+    }),
+    # HOW they approach and solve problems
+    'problem_solving_style': ('assessments', {
+        'systematic_vs_intuitive': '_classify_problem_approach',
+        'breaking_down_complexity': '_measure_decomposition_skill',
+        'creative_solution_generation': '_assess_solution_creativity',
+        'persistence_patterns': '_analyze_persistence',
+        'error_learning_ability': '_measure_error_recovery',
+        'transfer_learning_capability': '_assess_knowledge_transfer'
+    }),
+    # Creative thinking patterns and innovative potential
+    'creative_potential': ('interactions', {
+        'divergent_thinking_score': '_measure_divergent_thinking',
+        'original_solution_frequency': '_count_original_solutions',
+        'cross_domain_connections': '_measure_interdisciplinary_thinking',
+        'idea_elaboration_ability': '_assess_idea_development',
+        'risk_taking_in_learning': '_measure_intellectual_risk_taking',
+        'aesthetic_sensitivity': '_assess_aesthetic_awareness'
+    }),
+    # Social and leadership potential
+    'social_leadership': ('behavior', '_analyze_social_potential')
+}
+
+# Indicators that rules may read from sections computed as a whole
+WHOLE_SECTION_INDICATORS = {
+    'social_leadership': ['leadership_indicators', 'collaborative_effectiveness']
+}
+
+# Sections matched against the rule table, by rule kind
+RULE_SECTIONS = {
+    'recommended_paths': 'path',
+    'nurturing_strategies': 'strategy'
+}
+
+POTENTIAL_SECTIONS = list(SECTION_SOURCES) + list(RULE_SECTIONS)
+
+INDICATOR_SECTIONS = {
+    indicator: section
+    for section, (_, measures) in SECTION_SOURCES.items()
+    for indicator in (measures if isinstance(measures, dict) else WHOLE_SECTION_INDICATORS.get(section, []))
+}
+
+class _PotentialCall:
+    """
+    One potential map being built: each student slice, indicator and whole
+    section is computed at most once, however many sections depend on it.
+    Rule sections already matched for a whole cohort are passed in as `matched`
+    """
+    def __init__(self, engine, student_id, tables, known_indicators=None, matched=None):
+        self.engine = engine
+        self.student_id = student_id
+        self.tables = tables
+        self._rows = {}
+        self._indicators = dict(known_indicators or {})
+        self._whole_sections = {}
+        self._matched = dict(matched or {})
+    
+    def potential_map(self, sections=None):
+        sections = list(POTENTIAL_SECTIONS) if sections is None else list(sections)
+        unknown = [section for section in sections if section not in POTENTIAL_SECTIONS]
+        if unknown:
+            raise ValueError(f"Unknown potential map sections: {', '.join(unknown)}")
+        
+        potential_map = {'student_id': self.student_id}
+        # In POTENTIAL_SECTIONS order, whatever order they were asked for in
+        for section in POTENTIAL_SECTIONS:
+            if section in sections:
+                potential_map[section] = self.section(section)
+        
+        return potential_map
+    
+    def rows(self, table):
+        if table not in self._rows:
+            self._rows[table] = self.tables.rows(table, self.student_id)
+        return self._rows[table]
+    
+    def indicator(self, name):
+        if name not in self._indicators:
+            if name not in INDICATOR_SECTIONS:
+                raise ValueError(f"No potential map section provides the indicator {name!r}")
+            section = INDICATOR_SECTIONS[name]
+            table, measures = SECTION_SOURCES[section]
+            if isinstance(measures, dict):
+                self._indicators[name] = getattr(self.engine, measures[name])(self.rows(table))
+            else:
+                self._indicators[name] = self.section(section)[name]
+        return self._indicators[name]
+    
+    def section(self, section):
+        if section in self._matched:
+            return self._matched[section]
+        if section in RULE_SECTIONS:
+            kind = RULE_SECTIONS[section]
+            indicators = {name: self.indicator(name) for name in self.engine.rules.indicators(kind)}
+            return self.engine.rules.match_one(kind, indicators)
+        table, measures = SECTION_SOURCES[section]
+        if isinstance(measures, dict):
+            return {name: self.indicator(name) for name in measures}
+        if section not in self._whole_sections:
+            self._whole_sections[section] = getattr(self.engine, measures)(self.rows(table))
+        return self._whole_sections[section]
+
 class PotentialRecognitionEngine:
-    def __init__(self):
+    def __init__(self, rules=None):
         self.cognitive_models = {}
+        # Thresholds for recommended paths and nurturing strategies
+        self.rules = rules or PotentialRules.load()
+        # Process pool of parallel cohort analyses, kept between them
+        self._pool = None
+        self._pool_workers = 0
         self.potential_indicators = [
             'problem_solving_approach',
             'creative_thinking_patterns',
@@ -20,196 +320,95 @@ class PotentialRecognitionEngine:
             'innovation_markers'
         ]
     
-    def analyze_student_potential(self, student_id, interaction_data, assessment_data, behavioral_data):
+    def analyze_student_potential(self, student_id, interaction_data, assessment_data, behavioral_data,
+                                  sections=None):
         """
         Comprehensive analysis of student's inherent potential and capabilities
-        """
-        # Cognitive Pattern Analysis
-        cognitive_profile = self._analyze_cognitive_patterns(student_id, interaction_data)
-        
-        # Learning Style Deep Analysis
-        learning_profile = self._deep_learning_style_analysis(student_id, behavioral_data)
         
-        # Problem-Solving Approach Analysis
-        problem_solving_profile = self._analyze_problem_solving_approach(student_id, assessment_data)
+        sections names the parts of the potential map to compute (any of
+        POTENTIAL_SECTIONS, all by default); only they and the indicators they
+        depend on are computed, and only the tables those need are read.
         
-        # Creative Potential Assessment
-        creative_profile = self._assess_creative_potential(student_id, interaction_data)
-        
-        # Social and Leadership Potential
-        social_profile = self._analyze_social_potential(student_id, behavioral_data)
-        
-        # Synthesize into comprehensive potential map
-        potential_map = {
-            'student_id': student_id,
-            'cognitive_strengths': cognitive_profile,
-            'learning_optimization': learning_profile,
-            'problem_solving_style': problem_solving_profile,
-            'creative_potential': creative_profile,
-            'social_leadership': social_profile,
-            'recommended_paths': self._generate_potential_based_paths(
-                cognitive_profile, learning_profile, problem_solving_profile, 
-                creative_profile, social_profile
-            ),
-            'nurturing_strategies': self._generate_nurturing_strategies(
-                cognitive_profile, learning_profile, problem_solving_profile
-            )
-        }
-        
-        return potential_map
-    
-    def _analyze_cognitive_patterns(self, student_id, interaction_data):
+        Each table may be a DataFrame, which is filtered to the student's rows, or a
+        StudentPartitions of one; pass partitions (or use analyze_students_potential)
+        when analysing many students, so that the tables are grouped by student once
+        rather than scanned per student.
         """
-        Analyze how student processes information and thinks
-        """
-        student_data = interaction_data[interaction_data['student_id'] == student_id]
-        
-        patterns = {
-            'information_processing_speed': np.mean(student_data['response_time']),
-            'attention_span_pattern': self._calculate_attention_patterns(student_data),
-            'memory_retention_style': self._analyze_memory_patterns(student_data),
-            'abstract_thinking_ability': self._measure_abstract_thinking(student_data),
-            'pattern_recognition_strength': self._assess_pattern_recognition(student_data),
-            'metacognitive_awareness': self._measure_metacognition(student_data)
-        }
-        
-        return patterns
+        tables = StudentTables(interaction_data, assessment_data, behavioral_data, partition=False)
+        return self._potential_map(student_id, tables, sections)
     
-    def _deep_learning_style_analysis(self, student_id, behavioral_data):
+    def analyze_students_potential(self, student_ids, interaction_data, assessment_data, behavioral_data,
+                                   sections=None):
         """
-        Go beyond traditional learning styles to understand HOW they learn best
+        Potential maps of many students, keyed by student_id, partitioning each table once
         """
-        student_behavior = behavioral_data[behavioral_data['student_id'] == student_id]
-        
-        learning_profile = {
-            'optimal_cognitive_load': self._calculate_optimal_load(student_behavior),
-            'information_chunking_preference': self._analyze_chunking_patterns(student_behavior),
-            'feedback_responsiveness': self._measure_feedback_response(student_behavior),
-            'exploration_vs_exploitation': self._analyze_learning_strategy(student_behavior),
-            'collaborative_vs_individual': self._assess_social_learning_preference(student_behavior),
-            'concrete_vs_abstract_preference': self._measure_abstraction_comfort(student_behavior)
-        }
-        
-        return learning_profile
+        tables = StudentTables(interaction_data, assessment_data, behavioral_data)
+        return {student_id: self._potential_map(student_id, tables, sections) for student_id in student_ids}
     
-    def _analyze_problem_solving_approach(self, student_id, assessment_data):
+    def analyze_cohort_potential(self, interaction_data, assessment_data, behavioral_data, workers=1):
         """
-        Understand HOW they approach and solve problems
-        """
-        student_assessments = assessment_data[assessment_data['student_id'] == student_id]
-        
-        approach_profile = {
-            'systematic_vs_intuitive': self._classify_problem_approach(student_assessments),
-            'breaking_down_complexity': self._measure_decomposition_skill(student_assessments),
-            'creative_solution_generation': self._assess_solution_creativity(student_assessments),
-            'persistence_patterns': self._analyze_persistence(student_assessments),
-            'error_learning_ability': self._measure_error_recovery(student_assessments),
-            'transfer_learning_capability': self._assess_knowledge_transfer(student_assessments)
-        }
+        Cognitive indicators of every student in the interaction data, computed for
+        all of them in one grouped pass rather than student by student, split
+        across `workers` processes when more than one. The worker pool is started
+        on first use and kept for later cohorts until close().
         
-        return approach_profile
-    
-    def _assess_creative_potential(self, student_id, interaction_data):
-        """
-        Identify creative thinking patterns and innovative potential
+        Returns a CohortPotential: its indicators frame has one row per student and
+        one column per indicator, and potential_map(student_id) builds the same map
+        as analyze_student_potential, reusing the student's row.
         """
-        student_data = interaction_data[interaction_data['student_id'] == student_id]
-        
-        creative_indicators = {
-            'divergent_thinking_score': self._measure_divergent_thinking(student_data),
-            'original_solution_frequency': self._count_original_solutions(student_data),
-            'cross_domain_connections': self._measure_interdisciplinary_thinking(student_data),
-            'idea_elaboration_ability': self._assess_idea_development(student_data),
-            'risk_taking_in_learning': self._measure_intellectual_risk_taking(student_data),
-            'aesthetic_sensitivity': self._assess_aesthetic_awareness(student_data)
-        }
-        
-        return creative_indicators
+        tables = StudentTables(interaction_data, assessment_data, behavioral_data)
+        indicators = self._cohort_cognitive_indicators(tables.partitions('interactions'), workers)
+        return CohortPotential(self, indicators, tables)
+    
+    def close(self):
+        """Shut down the worker pool of parallel cohort analyses, if one was started"""
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+            self._pool_workers = 0
     
-    def _generate_potential_based_paths(self, cognitive, learning, problem_solving, creative, social):
+    def _worker_pool(self, workers):
+        """A pool of `workers` processes, reusing the engine's pool when it has that many"""
+        if self._pool_workers != workers:
+            self.close()
+            # Spawned workers import this module afresh instead of inheriting the parent's state
+            self._pool = ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context('spawn'))
+            self._pool_workers = workers
+        return self._pool
+    
+    def _potential_map(self, student_id, tables, sections=None, known_indicators=None):
         """
-        Generate personalized career and learning paths based on potential analysis
+        The requested sections of one student's potential map, taking any
+        indicators already known for them as given
         """
-        paths = []
-        
-        # Analytical Path
-        if (cognitive['abstract_thinking_ability'] > 0.7 and 
-            problem_solving['systematic_vs_intuitive'] > 0.6):
-            paths.append({
-                'path_type': 'analytical_researcher',
-                'description': 'Strong potential for research, data analysis, and systematic investigation',
-                'recommended_fields': ['Data Science', 'Research', 'Engineering', 'Mathematics'],
-                'development_focus': ['Advanced mathematics', 'Research methodology', 'Statistical analysis']
-            })
-        
-        # Creative Innovator Path
-        if (creative['divergent_thinking_score'] > 0.7 and 
-            creative['cross_domain_connections'] > 0.6):
-            paths.append({
-                'path_type': 'creative_innovator',
-                'description': 'Exceptional creative thinking and innovation potential',
-                'recommended_fields': ['Design', 'Innovation Management', 'Entrepreneurship', 'Arts'],
-                'development_focus': ['Design thinking', 'Innovation processes', 'Creative problem solving']
-            })
-        
-        # Social Leader Path
-        if (social['leadership_indicators'] > 0.7 and 
-            social['collaborative_effectiveness'] > 0.6):
-            paths.append({
-                'path_type': 'social_leader',
-                'description': 'Natural leadership and social impact potential',
-                'recommended_fields': ['Management', 'Social Work', 'Politics', 'Education'],
-                'development_focus': ['Leadership skills', 'Communication', 'Social psychology']
-            })
-        
-        # Systems Thinker Path
-        if (problem_solving['breaking_down_complexity'] > 0.7 and 
-            cognitive['pattern_recognition_strength'] > 0.6):
-            paths.append({
-                'path_type': 'systems_thinker',
-                'description': 'Ability to understand and work with complex systems',
-                'recommended_fields': ['Systems Engineering', 'Architecture', 'Urban Planning', 'Ecology'],
-                'development_focus': ['Systems thinking', 'Complex problem solving', 'Integration skills']
-            })
-        
-        return paths
+        return _PotentialCall(self, student_id, tables, known_indicators).potential_map(sections)
     
-    def _generate_nurturing_strategies(self, cognitive, learning, problem_solving):
-        """
-        Generate specific strategies to nurture identified potential
+    def _cohort_cognitive_indicators(self, interactions, workers=1):
         """
-        strategies = []
+        The grouped counterparts of the per-student cognitive measures, one row per
+        student of the partitioned interactions. Measures without a grouped form
+        are left to the per-student path.
         
-        # Cognitive Load Optimization
-        if learning['optimal_cognitive_load'] < 0.5:
-            strategies.append({
-                'strategy': 'cognitive_load_management',
-                'description': 'Break complex topics into smaller, manageable chunks',
-                'implementation': 'Micro-learning modules with frequent breaks'
-            })
-        
-        # Abstract Thinking Development
-        if cognitive['abstract_thinking_ability'] > 0.6:
-            strategies.append({
-                'strategy': 'abstract_thinking_enhancement',
-                'description': 'Provide opportunities for theoretical and conceptual exploration',
-                'implementation': 'Philosophy discussions, theoretical frameworks, model building'
-            })
-        
-        # Problem-Solving Skill Building
-        if problem_solving['systematic_vs_intuitive'] < 0.4:
-            strategies.append({
-                'strategy': 'systematic_thinking_development',
-                'description': 'Teach structured problem-solving methodologies',
-                'implementation': 'Step-by-step problem solving frameworks, logic puzzles'
-            })
-        
-        return strategies
+        With several workers, the columns are copied into shared memory once and
+        contiguous ranges of students are computed in a process pool, each worker
+        reading its rows in place rather than receiving a pickled frame.
+        """
+        columns, n_sessions = _cohort_columns(interactions)
+        n_students = len(interactions.students)
+        if workers > 1 and n_students > 1:
+            indicators = _parallel_cognitive_indicators(columns, interactions.offsets, n_sessions,
+                                                        self._worker_pool(workers), workers)
+        else:
+            indicators = _cognitive_indicators(columns, n_students, n_sessions)
+        return pd.DataFrame(indicators, index=pd.Index(interactions.students, name='student_id'))
     
     # Helper methods for detailed analysis
+    def _measure_processing_speed(self, data):
+        return np.mean(data['response_time'])
+    
     def _calculate_attention_patterns(self, data):
         # Analyze session lengths and engagement over time
-        return np.mean(data.groupby('session_id')['engagement_score'].std())
+        return np.mean(data.groupby('session_id', observed=True)['engagement_score'].std())
     
     def _analyze_memory_patterns(self, data):
         # Analyze retention over different time intervals
@@ -228,10 +427,187 @@ class PotentialRecognitionEngine:
         pattern_problems = data[data['requires_pattern_recognition'] == True]
         return pattern_problems['score'].mean() if len(pattern_problems) > 0 else 0.5
 
+class CohortPotential:
+    """
+    Indicators of a whole cohort, one row per student and one column per
+    indicator, with each student's full potential map built on demand
+    """
+    def __init__(self, engine, indicators, tables):
+        self.engine = engine
+        self.indicators = indicators
+        self.tables = tables
+    
+    def potential_map(self, student_id, sections=None):
+        """The student's potential map, as analyze_student_potential would build it"""
+        known = self.indicators.loc[student_id].to_dict() if student_id in self.indicators.index else None
+        return self.engine._potential_map(student_id, self.tables, sections, known)
+    
+    def rule_indicators(self):
+        """
+        Every indicator the path and strategy rules read, one row per student:
+        the cohort's own columns where it has them, the others measured per student
+        """
+        return self._rule_indicators(self._calls())
+    
+    def recommendations(self):
+        """
+        Recommended paths and nurturing strategies of every student, matched
+        against the rule table for the whole cohort at once, as
+        {student_id: {section: entries}}
+        """
+        matched = self._rule_matches(self._rule_indicators(self._calls()), RULE_SECTIONS)
+        return {
+            student_id: {section: entries[i] for section, entries in matched.items()}
+            for i, student_id in enumerate(self.indicators.index)
+        }
+    
+    def potential_maps(self, sections=None):
+        """
+        Potential maps of every student, as potential_map would build them,
+        with the rule sections matched for the whole cohort at once
+        """
+        calls = self._calls()
+        rule_sections = [section for section in RULE_SECTIONS if sections is None or section in sections]
+        matched = self._rule_matches(self._rule_indicators(calls), rule_sections) if rule_sections else {}
+        maps = {}
+        for i, call in enumerate(calls):
+            call._matched = {section: entries[i] for section, entries in matched.items()}
+            maps[call.student_id] = call.potential_map(sections)
+        return maps
+    
+    def _calls(self):
+        known = self.indicators.to_dict('index')
+        return [_PotentialCall(self.engine, student_id, self.tables, known[student_id])
+                for student_id in self.indicators.index]
+    
+    def _rule_indicators(self, calls):
+        names = list(dict.fromkeys(name for kind in RULE_SECTIONS.values() for name in self.engine.rules.indicators(kind)))
+        frame = self.indicators.reindex(columns=names)
+        # Columns the cohort pass does not compute are measured student by student
+        for name in names:
+            if name not in self.indicators.columns:
+                frame[name] = [call.indicator(name) for call in calls]
+        return frame
+    
+    def _rule_matches(self, indicators, sections):
+        return {section: self.engine.rules.match(indicators, RULE_SECTIONS[section]) for section in sections}
+
+def _cohort_columns(interactions):
+    """
+    The interaction columns the cohort indicators read, as flat arrays aligned
+    with the partitioned rows, and the number of distinct sessions
+    """
+    data = interactions.data
+    n_students = len(interactions.students)
+    session_codes, sessions = pd.factorize(data['session_id'])
+    columns = {
+        'student': np.repeat(np.arange(n_students, dtype=np.int64), np.diff(interactions.offsets)),
+        'session': session_codes.astype(np.int64),
+        'response_time': data['response_time'].to_numpy(dtype=np.float64),
+        'engagement_score': data['engagement_score'].to_numpy(dtype=np.float64),
+        'retention_score': data['retention_score'].to_numpy(dtype=np.float64),
+        'score': data['score'].to_numpy(dtype=np.float64),
+        'abstract': (data['problem_type'] == 'abstract').to_numpy(),
+        'concrete': (data['problem_type'] == 'concrete').to_numpy(),
+        # Missing flags count as False, as in the per-student `== True`
+        'pattern': data['requires_pattern_recognition'].eq(True).to_numpy(dtype=bool, na_value=False)
+    }
+    return columns, len(sessions)
+
+def _cognitive_indicators(columns, n_students, n_sessions):
+    """Cohort indicators of students 0..n_students-1 from _cohort_columns arrays"""
+    students = columns['student']
+    scores = columns['score']
+    
+    # Standard deviation of engagement within each session, averaged over the
+    # student's sessions that have one (two or more rows)
+    session_groups, session_keys = pd.factorize(students * n_sessions + columns['session'])
+    session_students = session_keys // n_sessions
+    session_sizes = np.bincount(session_groups)
+    engagement = columns['engagement_score']
+    session_means = np.bincount(session_groups, weights=engagement) / session_sizes
+    squares = np.bincount(session_groups, weights=(engagement - session_means[session_groups]) ** 2)
+    spread = session_sizes > 1
+    session_stds = np.sqrt(squares[spread] / (session_sizes[spread] - 1))
+    
+    abstract = _group_mean(scores, students, n_students, columns['abstract'])
+    concrete = _group_mean(scores, students, n_students, columns['concrete'])
+    pattern_scores = _group_mean(scores, students, n_students, columns['pattern'])
+    with np.errstate(invalid='ignore', divide='ignore'):
+        abstract_ratio = np.where(np.isnan(concrete), 0.5, abstract / concrete)
+    
+    return {
+        'information_processing_speed': _group_mean(columns['response_time'], students, n_students),
+        'attention_span_pattern': _group_mean(session_stds, session_students[spread], n_students),
+        'memory_retention_style': _group_mean(columns['retention_score'], students, n_students),
+        'abstract_thinking_ability': abstract_ratio,
+        'pattern_recognition_strength': np.where(np.isnan(pattern_scores), 0.5, pattern_scores)
+    }
+
+def _parallel_cognitive_indicators(columns, offsets, n_sessions, pool, workers):
+    """_cognitive_indicators over shared-memory columns, fanned out by student range to a pool of `workers`"""
+    # A few ranges per worker, of roughly equal row counts, on student boundaries
+    n_students = len(offsets) - 1
+    inner = np.unique(np.searchsorted(offsets, np.linspace(0, offsets[-1], 4 * workers + 1)[1:-1]))
+    bounds = np.concatenate([[0], inner[(inner > 0) & (inner < n_students)], [n_students]])
+    
+    layout, size = {}, 0
+    for name, values in columns.items():
+        layout[name] = (size, values.dtype.str, len(values))
+        size += -(-values.nbytes // 64) * 64  # Keep every column 64-byte aligned
+    shared = shared_memory.SharedMemory(create=True, size=max(size, 1))
+    try:
+        for name, values in columns.items():
+            offset, dtype, length = layout[name]
+            np.ndarray(length, dtype=dtype, buffer=shared.buf, offset=offset)[:] = values
+        
+        parts = list(pool.map(
+            _shared_cognitive_indicators,
+            [shared.name] * (len(bounds) - 1),
+            [layout] * (len(bounds) - 1),
+            [(int(offsets[start]), int(offsets[end]), int(start), int(end - start))
+             for start, end in zip(bounds[:-1], bounds[1:])],
+            [n_sessions] * (len(bounds) - 1)
+        ))
+    finally:
+        shared.close()
+        shared.unlink()
+    return {name: np.concatenate([part[name] for part in parts]) for name in parts[0]}
+
+def _shared_cognitive_indicators(shared_name, layout, partition, n_sessions):
+    """Worker side of _parallel_cognitive_indicators: one student range, read in place"""
+    row_start, row_end, student_start, n_students = partition
+    shared = shared_memory.SharedMemory(name=shared_name)
+    columns = None
+    try:
+        columns = {
+            name: np.ndarray(length, dtype=dtype, buffer=shared.buf, offset=offset)[row_start:row_end]
+            for name, (offset, dtype, length) in layout.items()
+        }
+        columns['student'] = columns['student'] - student_start
+        return _cognitive_indicators(columns, n_students, n_sessions)
+    except BaseException as e:
+        # Frames of the traceback hold views into the block too
+        traceback.clear_frames(e.__traceback__)
+        raise
+    finally:
+        # Views into the block must be gone before it can be closed
+        columns = None
+        shared.close()
+
+def _group_mean(values, codes, n_groups, mask=None):
+    """Mean of values per group, NaN for groups with no (selected) rows"""
+    if mask is not None:
+        values, codes = values[mask], codes[mask]
+    counts = np.bincount(codes, minlength=n_groups)
+    totals = np.bincount(codes, weights=values, minlength=n_groups)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return totals / counts
+
 # Example usage
 def demonstrate_potential_recognition():
     # Sample data
-    interaction_data = pd.DataFrame({
+    interaction_data = compact_frame(pd.DataFrame({
         'student_id': [1] * 50,
         'response_time': np.random.normal(30, 10, 50),
         'engagement_score': np.random.beta(3, 2, 50),
@@ -240,23 +616,23 @@ def demonstrate_potential_recognition():
         'requires_pattern_recognition': np.random.choice([True, False], 50),
         'score': np.random.beta(4, 2, 50),
         'retention_score': np.random.beta(3, 2, 50)
-    })
+    }))
     
-    behavioral_data = pd.DataFrame({
+    behavioral_data = compact_frame(pd.DataFrame({
         'student_id': [1] * 30,
         'cognitive_load_preference': np.random.uniform(0, 1, 30),
         'feedback_response_time': np.random.exponential(2, 30),
         'exploration_tendency': np.random.beta(2, 3, 30),
         'collaboration_preference': np.random.beta(3, 2, 30)
-    })
+    }))
     
-    assessment_data = pd.DataFrame({
+    assessment_data = compact_frame(pd.DataFrame({
         'student_id': [1] * 25,
         'problem_approach': np.random.choice(['systematic', 'intuitive'], 25),
         'solution_creativity': np.random.beta(2, 3, 25),
         'persistence_score': np.random.beta(4, 2, 25),
         'error_recovery_rate': np.random.beta(3, 2, 25)
-    })
+    }))
     
     # Analyze potential
     engine = PotentialRecognitionEngine()
@@ -274,4 +650,5 @@ def demonstrate_potential_recognition():
     return potential_map
 
 # Run demonstration
-potential_analysis = demonstrate_potential_recognition()
+if __name__ == '__main__':
+    potential_analysis = demonstrate_potential_recognition()
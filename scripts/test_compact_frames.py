@@ -0,0 +1,32 @@
+"""
+The scripts' compact_frames against the ai-engine service's.
+
+    python -m pytest scripts/test_compact_frames.py
+"""
+import os
+
+import pandas as pd
+
+import compact_frames
+
+SERVICE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                            '..', 'services', 'ai-engine', 'src', 'compact_frames.py')
+
+
+def test_scripts_load_the_service_module():
+    assert os.path.samefile(compact_frames.SOURCE_PATH, SERVICE_PATH)
+    assert compact_frames.compact_frame.__code__.co_filename == compact_frames.SOURCE_PATH
+
+
+def test_dtype_maps_match_the_service_source():
+    # Read back from the service file itself, independently of how the scripts load it
+    namespace = {}
+    with open(SERVICE_PATH) as f:
+        exec(compile(f.read(), SERVICE_PATH, 'exec'), namespace)
+    assert compact_frames.COMPACT_DTYPES == namespace['COMPACT_DTYPES']
+
+
+def test_compact_frame():
+    df = compact_frames.compact_frame(pd.DataFrame({'content_type': ['video', 'text', 'video'], 'difficulty_level': [1, 5, 9]}))
+    assert df['content_type'].dtype == 'category'
+    assert df['difficulty_level'].dtype == compact_frames.COMPACT_DTYPES['difficulty_level']
@@ -0,0 +1,127 @@
+"""
+Cohort-level rule matching of potential_analysis against the per-student
+match_one path.
+
+    python -m pytest scripts/test_potential_analysis.py
+"""
+import numpy as np
+import pandas as pd
+import pytest
+
+from potential_analysis import RULE_SECTIONS, SECTION_SOURCES, PotentialRecognitionEngine, PotentialRules, StudentTables
+
+N_STUDENTS = 300
+SEED = 7
+
+
+class MeasuredEngine(PotentialRecognitionEngine):
+    """The engine with the measures the rules read that it does not define itself"""
+    def _classify_problem_approach(self, data):
+        return (data['problem_approach'] == 'systematic').mean() if len(data) else 0.5
+
+    def _measure_decomposition_skill(self, data):
+        return data['persistence_score'].mean() * 0.9 if len(data) else 0.5
+
+    def _measure_divergent_thinking(self, data):
+        return data['score'].quantile(0.9) if len(data) else 0.5
+
+    def _measure_interdisciplinary_thinking(self, data):
+        return data['retention_score'].mean() if len(data) else 0.5
+
+    def _calculate_optimal_load(self, data):
+        return data['cognitive_load_preference'].mean() if len(data) else 0.5
+
+    def _analyze_social_potential(self, data):
+        return {
+            'leadership_indicators': data['collaboration_preference'].mean() * 1.2 if len(data) else 0.5,
+            'collaborative_effectiveness': data['exploration_tendency'].mean() * 2 if len(data) else 0.5
+        }
+
+
+def make_tables(n_students=N_STUDENTS, seed=SEED):
+    rng = np.random.default_rng(seed)
+    n = n_students * 20
+    interactions = pd.DataFrame({
+        'student_id': rng.integers(0, n_students, n),
+        'session_id': rng.integers(0, 8, n),
+        'response_time': rng.normal(30, 10, n),
+        'engagement_score': rng.beta(3, 2, n),
+        'retention_score': rng.beta(3, 2, n),
+        'score': rng.beta(4, 2, n),
+        'problem_type': rng.choice(['abstract', 'concrete'], n),
+        'requires_pattern_recognition': rng.random(n) < 0.3
+    })
+    # Some flags are missing, which both paths must read as False
+    interactions['requires_pattern_recognition'] = interactions['requires_pattern_recognition'].astype(object)
+    interactions.loc[rng.random(n) < 0.05, 'requires_pattern_recognition'] = np.nan
+    assessments = pd.DataFrame({
+        'student_id': rng.integers(0, n_students, n_students * 8),
+        'problem_approach': rng.choice(['systematic', 'intuitive'], n_students * 8, p=[0.7, 0.3]),
+        'persistence_score': rng.beta(4, 2, n_students * 8)
+    })
+    behavior = pd.DataFrame({
+        'student_id': rng.integers(0, n_students, n_students * 10),
+        'cognitive_load_preference': rng.random(n_students * 10),
+        'exploration_tendency': rng.beta(2, 3, n_students * 10),
+        'collaboration_preference': rng.beta(3, 2, n_students * 10)
+    })
+    return interactions, assessments, behavior
+
+
+@pytest.fixture(scope='module')
+def cohort():
+    return MeasuredEngine().analyze_cohort_potential(*make_tables())
+
+
+def test_cohort_indicators_match_per_student(cohort):
+    tables = StudentTables(*make_tables())
+    measures = SECTION_SOURCES['cognitive_strengths'][1]
+    for student_id, indicators in cohort.indicators.iterrows():
+        rows = tables.rows('interactions', student_id)
+        for name, value in indicators.items():
+            expected = getattr(cohort.engine, measures[name])(rows)
+            assert value == pytest.approx(expected, rel=1e-5, nan_ok=True), (student_id, name)
+
+
+def test_recommendations_match_per_student(cohort):
+    recommendations = cohort.recommendations()
+    assert list(recommendations) == list(cohort.indicators.index)
+    for student_id, sections in recommendations.items():
+        expected = cohort.potential_map(student_id, list(RULE_SECTIONS))
+        for section in RULE_SECTIONS:
+            assert sections[section] == expected[section], (student_id, section)
+    # Neither all-empty nor all-matched, or the comparison proves little
+    for section in RULE_SECTIONS:
+        counts = {len(sections[section]) for sections in recommendations.values()}
+        assert len(counts) > 1, section
+
+
+def test_rule_indicators_match_per_student(cohort):
+    frame = cohort.rule_indicators()
+    for student_id, row in frame.iterrows():
+        for kind in RULE_SECTIONS.values():
+            assert cohort.engine.rules.match(frame.loc[[student_id]], kind)[0] == \
+                cohort.engine.rules.match_one(kind, row.to_dict()), (student_id, kind)
+
+
+def test_potential_maps_match_per_student(cohort):
+    sections = ['social_leadership', *RULE_SECTIONS]
+    maps = cohort.potential_maps(sections)
+    for student_id, potential_map in maps.items():
+        assert potential_map == cohort.potential_map(student_id, sections), student_id
+
+
+def test_match_agrees_with_match_one_at_thresholds():
+    rules = PotentialRules.load()
+    rng = np.random.default_rng(SEED)
+    for kind in RULE_SECTIONS.values():
+        names = rules.indicators(kind)
+        thresholds = rules.table[rules.table['kind'] == kind].groupby('indicator')['threshold'].first()
+        # Values on, just around and far from each threshold, and missing
+        choices = np.array([[thresholds[name] + offset for offset in (-0.5, -1e-9, 0, 1e-9, 0.5)] + [np.nan]
+                            for name in names])
+        frame = pd.DataFrame(choices[np.arange(len(names)), rng.integers(0, choices.shape[1], (500, len(names)))],
+                             columns=names)
+        matched = rules.match(frame, kind)
+        for i, row in frame.iterrows():
+            assert matched[i] == rules.match_one(kind, row.to_dict()), (kind, i)
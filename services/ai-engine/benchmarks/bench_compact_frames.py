@@ -0,0 +1,79 @@
+"""
+Memory and per-operation latency of interaction frames in default dtypes
+against the compact ingestion dtypes of compact_frames.
+
+Times the equality masks and groupbys the engines run, and the batch
+learning-style analysis on a frame that still needs converting against one
+already compact.
+
+    python benchmarks/bench_compact_frames.py --interactions 1000000
+"""
+import argparse
+import os
+import sys
+import time
+from typing import Callable, Dict
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from compact_frames import compact_frame
+from learning_style_analyzer import LearningStyleAnalyzer
+from synthetic import generate_interactions
+
+REPEATS = 5
+INTERACTIONS_PER_USER = 50
+
+
+def operations(analyzer: LearningStyleAnalyzer) -> Dict[str, Callable[[pd.DataFrame], object]]:
+    return {
+        'content_type mask': lambda df: df[df['content_type'] == 'video']['engagement_score'].mean(),
+        'content_type isin': lambda df: df[df['content_type'].isin(['video', 'image', 'diagram'])]['accuracy'].mean(),
+        'difficulty mask': lambda df: df[df['difficulty_level'] >= 7]['completion_rate'].mean(),
+        'groupby session': lambda df: df.groupby('session_id', observed=True)['engagement_score'].agg(['mean', 'std']),
+        'groupby content_type': lambda df: df.groupby('content_type', observed=True)[
+            ['accuracy', 'engagement_score', 'completion_rate']].mean(),
+        'groupby user, session': lambda df: df.groupby(['user_id', 'session_id'], observed=True, sort=False).ngroup(),
+        'build_learning_styles': lambda df: sum(len(chunk) for chunk in analyzer.build_learning_styles(df))
+    }
+
+
+def time_call(fn: Callable[[pd.DataFrame], object], df: pd.DataFrame) -> float:
+    """Median wall time of one call in milliseconds"""
+    fn(df)
+    samples = []
+    for _ in range(REPEATS):
+        started = time.perf_counter()
+        fn(df)
+        samples.append((time.perf_counter() - started) * 1000)
+    return float(np.median(samples))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--interactions', type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    default = generate_interactions(args.interactions, n_users=max(1, args.interactions // INTERACTIONS_PER_USER))
+    started = time.perf_counter()
+    compact = compact_frame(default)
+    conversion_ms = (time.perf_counter() - started) * 1000
+
+    default_mb = default.memory_usage(deep=True).sum() / 2**20
+    compact_mb = compact.memory_usage(deep=True).sum() / 2**20
+    print(f"{args.interactions} interactions: {default_mb:.1f} MB default, {compact_mb:.1f} MB compact "
+          f"({default_mb / compact_mb:.1f}x smaller), converted in {conversion_ms:.0f} ms")
+    print()
+
+    analyzer = LearningStyleAnalyzer()
+    print(f"{'operation':<24} {'default ms':>11} {'compact ms':>11} {'speedup':>8}")
+    for name, fn in operations(analyzer).items():
+        default_ms = time_call(fn, default)
+        compact_ms = time_call(fn, compact)
+        print(f"{name:<24} {default_ms:>11.2f} {compact_ms:>11.2f} {default_ms / compact_ms:>7.1f}x")
+
+
+if __name__ == '__main__':
+    main()
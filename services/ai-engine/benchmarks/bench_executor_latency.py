@@ -0,0 +1,96 @@
+"""
+GET /learning-style/{user_id} latency while heavy analyses run concurrently,
+with the analysis computed inline on the event loop versus in a process pool.
+
+    python benchmarks/bench_executor_latency.py
+"""
+import asyncio
+import json
+import os
+import sys
+import time
+
+import httpx
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from analysis_executor import AnalysisExecutor
+from columnar_ingest import ARROW_STREAM_MEDIA_TYPE, encode_interactions
+from learning_analyzer import analyzer, app
+from memory_redis import MemoryRedis
+from synthetic import generate_interactions
+
+HEAVY_ROWS = 200_000
+HEAVY_CONCURRENCY = 4
+HEAVY_ROUNDS = 3
+WORKERS = 4
+READ_INTERVAL = 0.005
+
+
+async def measure(mode: str, body: bytes) -> None:
+    analyzer.executor.shutdown()
+    analyzer.executor = AnalysisExecutor(mode, max_workers=WORKERS)
+    analyzer.redis.client = MemoryRedis()
+    await analyzer.redis.client.setex('learning_style:reader', 3600, json.dumps(analyzer._default_learning_style()))
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url='http://ai-engine', timeout=None) as client:
+        async def analyze(user_id: str) -> int:
+            response = await client.post(
+                '/analyze-learning-style/columnar', params={'user_id': user_id},
+                content=body, headers={'content-type': ARROW_STREAM_MEDIA_TYPE}
+            )
+            return response.status_code
+
+        # Warm up, which also spawns the worker processes
+        await asyncio.gather(*(analyze(f'warmup{i}') for i in range(WORKERS)))
+
+        latencies = []
+        stop = asyncio.Event()
+
+        async def read_at(scheduled: float) -> None:
+            await client.get('/learning-style/reader')
+            latencies.append((time.perf_counter() - scheduled) * 1000)
+
+        async def read() -> None:
+            # Open-loop reads: any read that fell due while the loop was blocked is still issued,
+            # and latency is measured from its scheduled time so stalls are counted
+            scheduled = time.perf_counter()
+            reads = []
+            while True:
+                now = time.perf_counter()
+                while scheduled <= now:
+                    reads.append(asyncio.create_task(read_at(scheduled)))
+                    scheduled += READ_INTERVAL
+                if stop.is_set():
+                    break
+                await asyncio.sleep(scheduled - now)
+            await asyncio.gather(*reads)
+
+        async def heavy(i: int) -> list:
+            return [await analyze(f'heavy{i}') for _ in range(HEAVY_ROUNDS)]
+
+        reader = asyncio.create_task(read())
+        started = time.perf_counter()
+        statuses = sum(await asyncio.gather(*(heavy(i) for i in range(HEAVY_CONCURRENCY))), [])
+        elapsed = time.perf_counter() - started
+        stop.set()
+        await reader
+
+    analyzer.executor.shutdown()
+    ok = statuses.count(200)
+    print(f"{mode:>8} {len(latencies):>6} {np.percentile(latencies, 50):>9.2f} {np.percentile(latencies, 99):>9.2f} "
+          f"{max(latencies):>9.2f} {ok / elapsed:>11.2f} {len(statuses) - ok:>8}")
+
+
+def main():
+    body = encode_interactions(generate_interactions(HEAVY_ROWS, seed=42).assign(user_id='heavy'))
+    print(f"{HEAVY_CONCURRENCY} concurrent clients x {HEAVY_ROUNDS} analyses of {HEAVY_ROWS} rows, {WORKERS} workers")
+    print(f"{'mode':>8} {'GETs':>6} {'p50 ms':>9} {'p99 ms':>9} {'max ms':>9} {'analyses/s':>11} {'rejected':>8}")
+    for mode in ('inline', 'process'):
+        asyncio.run(measure(mode, body))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,75 @@
+"""
+Per-call latency of learning-style feature extraction against history size.
+
+Compares the single-pass InteractionAggregates path with the previous
+per-section boolean-mask scans over the same frame.
+
+    python benchmarks/bench_feature_extraction.py
+"""
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from interaction_aggregates import InteractionAggregates
+from learning_style_analyzer import LearningStyleAnalyzer
+from synthetic import generate_interactions
+
+HISTORY_SIZES = [100, 1_000, 10_000, 100_000]
+REPEATS = 20
+
+
+def masked_sections(df: pd.DataFrame) -> None:
+    """The per-section scans the aggregate pass replaced"""
+    df['response_time'].mean(), df['response_time'].std(), df['session_duration'].mean()
+    df['accuracy'].mean(), df['engagement_score'].mean(), df['completion_rate'].mean()
+    for content_type in ['video', 'text', 'interactive', 'audio']:
+        df[df['content_type'] == content_type]['engagement_score'].mean()
+    df['difficulty_level'].mean(), df['difficulty_level'].std()
+    for content_types in (['video', 'image', 'diagram'], ['audio', 'podcast', 'lecture'],
+                          ['interactive', 'simulation', 'game']):
+        df[df['content_type'].isin(content_types)]['engagement_score'].mean()
+    df[df['complexity_level'] >= 3]['accuracy'].mean()
+    df[df['cognitive_load'] >= 4]['engagement_score'].mean()
+    df[df['difficulty_level'] >= 7]['completion_rate'].mean()
+    hours = pd.to_datetime(df['timestamp']).dt.hour
+    df.groupby(hours).agg({'engagement_score': 'mean', 'accuracy': 'mean', 'completion_rate': 'mean'})
+
+
+def aggregated_sections(analyzer: LearningStyleAnalyzer, df: pd.DataFrame) -> None:
+    aggregates = InteractionAggregates.from_frame(df)
+    analyzer._extract_learning_features(aggregates)
+    analyzer._analyze_modality_preferences(aggregates)
+    analyzer._calculate_processing_speed(aggregates)
+    analyzer._estimate_working_memory(aggregates)
+    analyzer._estimate_cognitive_load_tolerance(aggregates)
+    analyzer._calculate_persistence(aggregates)
+    aggregates.hourly_means(['engagement_score', 'accuracy', 'completion_rate'])
+
+
+def time_call(fn, *args) -> float:
+    """Median wall time of one call in milliseconds"""
+    samples = []
+    for _ in range(REPEATS):
+        started = time.perf_counter()
+        fn(*args)
+        samples.append((time.perf_counter() - started) * 1000)
+    return float(np.median(samples))
+
+
+def main():
+    analyzer = LearningStyleAnalyzer()
+    print(f"{'rows':>10} {'masked ms':>12} {'aggregated ms':>14} {'speedup':>9}")
+    for n in HISTORY_SIZES:
+        df = generate_interactions(n, seed=42)
+        masked = time_call(masked_sections, df)
+        aggregated = time_call(aggregated_sections, analyzer, df)
+        print(f"{n:>10} {masked:>12.3f} {aggregated:>14.3f} {masked / aggregated:>8.1f}x")
+
+
+if __name__ == '__main__':
+    main()
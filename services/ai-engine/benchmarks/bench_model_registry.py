@@ -0,0 +1,75 @@
+"""
+Load time and memory of a large model artifact in several worker processes,
+memory-mapped through the ModelRegistry versus fully loaded into each.
+
+Proportional set size (PSS) splits shared pages between the processes
+mapping them, so with memory-mapping it drops as workers are added.
+
+    python benchmarks/bench_model_registry.py
+"""
+import multiprocessing
+import os
+import sys
+import tempfile
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from model_registry import ModelRegistry
+
+WORKERS = 4
+ARTIFACT_MB = 256
+
+
+def proportional_set_bytes() -> int:
+    with open('/proc/self/smaps_rollup') as f:
+        for line in f:
+            if line.startswith('Pss:'):
+                return int(line.split()[1]) * 1024
+    return 0
+
+
+def worker(root: str, mmap_mode, ready, done, results) -> None:
+    registry = ModelRegistry(root, mmap_mode=mmap_mode)
+    registry.refresh()
+    artifact = registry.artifact('regressor')
+    # Touch every page, as inference would
+    float(sum(layer.sum() for layer in artifact.model['coefs']))
+    ready.wait()
+    results.put((artifact.load_seconds, artifact.resident_bytes, proportional_set_bytes()))
+    done.wait()
+
+
+def measure(root: str, mmap_mode) -> None:
+    ctx = multiprocessing.get_context('spawn')
+    ready, done, results = ctx.Barrier(WORKERS + 1), ctx.Event(), ctx.Queue()
+    processes = [ctx.Process(target=worker, args=(root, mmap_mode, ready, done, results)) for _ in range(WORKERS)]
+    for process in processes:
+        process.start()
+    ready.wait()
+    samples = [results.get() for _ in processes]
+    done.set()
+    for process in processes:
+        process.join()
+
+    load_ms = np.mean([s[0] for s in samples]) * 1000
+    resident_mb = np.mean([s[1] for s in samples]) / 2**20
+    pss_mb = sum(s[2] for s in samples) / 2**20
+    print(f"{str(mmap_mode):>6} {load_ms:>10.1f} {resident_mb:>14.1f} {pss_mb:>14.1f}")
+
+
+def main():
+    with tempfile.TemporaryDirectory() as root:
+        rng = np.random.default_rng(0)
+        side = int(np.sqrt(ARTIFACT_MB * 2**20 / 8 / 2))
+        ModelRegistry(root).publish('regressor', {'coefs': [rng.random((side, side)) for _ in range(2)]})
+
+        print(f"{WORKERS} workers, {ARTIFACT_MB} MB artifact")
+        print(f"{'mmap':>6} {'load ms':>10} {'load RSS MB':>14} {'total PSS MB':>14}")
+        for mmap_mode in (None, 'c'):
+            measure(root, mmap_mode)
+
+
+if __name__ == '__main__':
+    main()
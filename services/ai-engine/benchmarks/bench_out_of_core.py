@@ -0,0 +1,98 @@
+"""
+Peak memory and agreement of the out-of-core file analysis against the
+in-memory path, for one user's history stored as Parquet at growing sizes.
+
+The file is written part by part in time order, so generating it stays
+within memory too. Peak traced memory of the chunked path should stay flat
+while the in-memory path grows with the history.
+
+    python benchmarks/bench_out_of_core.py --max-interactions 10000000
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, Tuple
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from learning_style_analyzer import LearningStyleAnalyzer
+from synthetic import generate_interactions
+
+INTERACTION_SIZES = [100_000, 1_000_000, 10_000_000]
+PART_ROWS = 500_000
+DAYS_PER_PART = 90
+
+
+def write_history(path: str, n_interactions: int) -> None:
+    """One user's history of n_interactions rows, in time order"""
+    writer = None
+    for part, start in enumerate(range(0, n_interactions, PART_ROWS)):
+        df = generate_interactions(min(PART_ROWS, n_interactions - start), seed=part,
+                                   start=str(pd.Timestamp('2020-01-01') + pd.Timedelta(days=part * DAYS_PER_PART)),
+                                   days=DAYS_PER_PART)
+        df['session_id'] = f'part-{part}-' + df['session_id']
+        table = pa.Table.from_pandas(df.sort_values('timestamp'), preserve_index=False)
+        if writer is None:
+            writer = pq.ParquetWriter(path, table.schema)
+        writer.write_table(table)
+    writer.close()
+
+
+def traced(fn: Callable[[], Any]) -> Tuple[Any, float, float]:
+    """Result and seconds of one call, then peak traced MB of another (tracing slows the call down)"""
+    started = time.perf_counter()
+    result = fn()
+    elapsed = time.perf_counter() - started
+    tracemalloc.start()
+    try:
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return result, elapsed, peak / 2**20
+
+
+def max_relative_difference(a: Dict[str, Any], b: Dict[str, Any]) -> float:
+    """Largest relative difference between numeric leaves of two profiles"""
+    worst = 0.0
+    for key, value in a.items():
+        if isinstance(value, dict):
+            worst = max(worst, max_relative_difference(value, b[key]))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool) and np.isfinite(value):
+            worst = max(worst, abs(value - b[key]) / max(abs(value), 1e-9))
+    return worst
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--max-interactions', type=int, default=2_000_000)
+    parser.add_argument('--batch-rows', type=int, default=65536)
+    args = parser.parse_args()
+
+    analyzer = LearningStyleAnalyzer()
+    print(f"{'rows':>10} {'in-memory s':>12} {'peak MB':>9} {'chunked s':>10} {'peak MB':>9} {'max rel diff':>13}")
+    for n in [size for size in INTERACTION_SIZES if size <= args.max_interactions]:
+        with tempfile.TemporaryDirectory() as root:
+            path = os.path.join(root, 'history.parquet')
+            write_history(path, n)
+            in_memory, in_memory_s, in_memory_mb = traced(
+                lambda: next(analyzer.build_learning_styles(pd.read_parquet(path)))
+            )
+            chunked, chunked_s, chunked_mb = traced(
+                lambda: next(analyzer.build_learning_styles_from_file(path, batch_rows=args.batch_rows))
+            )
+        difference = max(max_relative_difference(in_memory[u], chunked[u]) for u in in_memory)
+        print(f"{n:>10} {in_memory_s:>12.2f} {in_memory_mb:>9.1f} {chunked_s:>10.2f} {chunked_mb:>9.1f} "
+              f"{difference:>13.4f}")
+
+
+if __name__ == '__main__':
+    main()
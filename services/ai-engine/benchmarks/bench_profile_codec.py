@@ -0,0 +1,55 @@
+"""
+Stored size and encode/decode time of cached learning-style profiles,
+JSON text versus the compact binary profile codec.
+
+    python benchmarks/bench_profile_codec.py
+"""
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from learning_style_analyzer import LearningStyleAnalyzer
+from profile_codec import decode_profile, encode_profile
+from synthetic import generate_interactions
+
+PROFILES = 200
+REPEATS = 50
+
+
+def time_per_call(fn, items) -> float:
+    """Median microseconds per item over REPEATS passes"""
+    samples = []
+    for _ in range(REPEATS):
+        started = time.perf_counter()
+        for item in items:
+            fn(item)
+        samples.append((time.perf_counter() - started) / len(items) * 1e6)
+    return float(np.median(samples))
+
+
+def main():
+    analyzer = LearningStyleAnalyzer()
+    df = generate_interactions(PROFILES * 50, n_users=PROFILES, seed=42)
+    profiles = [p for chunk in analyzer.build_learning_styles(df) for p in chunk.values()]
+
+    json_blobs = [json.dumps(profile).encode() for profile in profiles]
+    binary_blobs = [encode_profile(profile) for profile in profiles]
+    assert all(decode_profile(blob) == profile for blob, profile in zip(binary_blobs, profiles))
+
+    rows = [
+        ('json', json_blobs, lambda p: json.dumps(p).encode(), json.loads),
+        ('binary', binary_blobs, encode_profile, decode_profile)
+    ]
+    print(f"{'format':>8} {'bytes':>8} {'encode us':>10} {'decode us':>10}")
+    for name, blobs, encode, decode in rows:
+        print(f"{name:>8} {np.mean([len(b) for b in blobs]):>8.0f} "
+              f"{time_per_call(encode, profiles):>10.2f} {time_per_call(decode, blobs):>10.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,81 @@
+"""
+Query latency and recall@k of the similar-learner index against brute force.
+
+Feature vectors are drawn from a mixture of learner groups with per-feature
+scales like those of _extract_learning_features (milliseconds, seconds,
+rates and difficulty levels), inserted in batches as profiles would arrive.
+
+    python benchmarks/bench_similar_learners.py --users 1000000
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from similar_learners import SimilarLearnerIndex
+
+FEATURE_SCALES = np.array([3000, 1500, 1800, 0.7, 0.6, 0.7, 0.6, 0.6, 0.6, 0.6, 5, 2])
+GROUPS = 64
+INSERT_BATCH = 10_000
+QUERIES = 500
+K = 10
+
+
+def make_features(n: int, seed: int = 0) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(1.0, 0.3, (GROUPS, len(FEATURE_SCALES)))
+    groups = rng.integers(0, GROUPS, n)
+    return (centers[groups] + rng.normal(0, 0.15, (n, len(FEATURE_SCALES)))) * FEATURE_SCALES
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--users', type=int, default=1_000_000)
+    parser.add_argument('--lists', type=int, default=1024)
+    args = parser.parse_args()
+
+    features = make_features(args.users)
+    user_ids = [f'user-{i:07d}' for i in range(args.users)]
+    with tempfile.TemporaryDirectory() as path:
+        index = SimilarLearnerIndex(path, n_lists=args.lists)
+        started = time.perf_counter()
+        for start in range(0, args.users, INSERT_BATCH):
+            index.upsert(user_ids[start:start + INSERT_BATCH], features[start:start + INSERT_BATCH])
+            # The service trains in the background; here the quantizer is trained in line, once due
+            if index.needs_training:
+                index.train()
+        index.save()
+        elapsed = time.perf_counter() - started
+        print(f"{args.users} users indexed in {elapsed:.1f}s ({args.users / elapsed:.0f} users/s), {args.lists} lists")
+
+        # Reopen from disk, as a restarted service would
+        index = SimilarLearnerIndex(path)
+        rng = np.random.default_rng(1)
+        query_users = [user_ids[i] for i in rng.choice(args.users, QUERIES, replace=False)]
+        exact, exact_ms = [], []
+        for user_id in query_users:
+            row = features[int(user_id.split('-')[1])]
+            started = time.perf_counter()
+            exact.append({u for u, _ in index.brute_force(row, K, exclude=user_id)})
+            exact_ms.append((time.perf_counter() - started) * 1000)
+        print(f"{'brute force':>12} {'':>8} {np.percentile(exact_ms, 50):>9.2f} {np.percentile(exact_ms, 99):>9.2f}")
+
+        print(f"{'n_probe':>12} {'recall':>8} {'p50 ms':>9} {'p99 ms':>9}")
+        for n_probe in (4, 8, 16, 32, 64):
+            recalls, latencies = [], []
+            for user_id, truth in zip(query_users, exact):
+                started = time.perf_counter()
+                found = index.neighbours(user_id, K, n_probe=n_probe)
+                latencies.append((time.perf_counter() - started) * 1000)
+                recalls.append(len({u for u, _ in found} & truth) / len(truth))
+            print(f"{n_probe:>12} {np.mean(recalls):>8.3f} {np.percentile(latencies, 50):>9.2f} "
+                  f"{np.percentile(latencies, 99):>9.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,174 @@
+"""
+Offline load test of the ai-engine HTTP API.
+
+Runs the FastAPI app in-process over an ASGI transport, with Redis replaced
+by the in-process MemoryRedis, so no server is needed. Closed-loop clients
+issue a mix of POST /analyze-learning-style (synthetic histories of a given
+size) and GET /learning-style/{user_id} for a fixed duration, once per
+combination of payload size and analysis worker count.
+
+Reports successful requests per second and their p50/p95/p99 latency per
+endpoint, with 503 rejections from a full analysis queue counted separately
+from errors. Rejected clients wait out the Retry-After before their next request.
+Every analyze request uses its own user id, so the request memo never
+answers one from another.
+
+    python benchmarks/load_test.py --payload-sizes 100 1000 10000 --workers 0 1 2 4
+    python benchmarks/load_test.py --concurrency 64 --read-fraction 0.9 --output load.json
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import platform
+import random
+import sys
+import time
+from collections import defaultdict
+from typing import Any, Dict, List
+
+import httpx
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from analysis_executor import AnalysisExecutor
+from columnar_ingest import ARROW_STREAM_MEDIA_TYPE, encode_interactions
+from learning_analyzer import analyzer, app
+from memory_redis import MemoryRedis
+from synthetic import generate_interactions, to_records
+
+PAYLOAD_SIZES = [100, 1_000, 10_000]
+WORKER_COUNTS = [0, 1, 2, 4]
+# Distinct histories per payload size, cycled through by the analyze requests
+BODIES_PER_SIZE = 8
+READ_USERS = 100
+SEED = 42
+
+ANALYZE = 'POST /analyze-learning-style'
+GET = 'GET /learning-style/{user_id}'
+
+
+def make_bodies(n_interactions: int, columnar: bool) -> List[bytes]:
+    """Request bodies of n_interactions rows, one per synthetic history"""
+    bodies = []
+    for seed in range(BODIES_PER_SIZE):
+        df = generate_interactions(n_interactions, seed=SEED + seed).assign(user_id='load')
+        bodies.append(encode_interactions(df) if columnar else json.dumps(to_records(df)).encode())
+    return bodies
+
+
+def set_workers(workers: int) -> None:
+    """Analyses inline on the event loop for 0 workers, otherwise in a pool of that many processes"""
+    analyzer.executor.shutdown()
+    analyzer.executor = (AnalysisExecutor('inline') if workers == 0
+                         else AnalysisExecutor('process', max_workers=workers))
+
+
+async def run_case(case: str, bodies: List[bytes], workers: int, args: argparse.Namespace) -> Dict[str, Dict[str, Any]]:
+    set_workers(workers)
+    analyzer.redis.client = MemoryRedis()
+    path = '/analyze-learning-style/columnar' if args.columnar else '/analyze-learning-style'
+    headers = {'content-type': ARROW_STREAM_MEDIA_TYPE if args.columnar else 'application/json'}
+    request_ids = itertools.count()
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url='http://ai-engine', timeout=None) as client:
+        async def analyze(user_id: str) -> httpx.Response:
+            body = bodies[next(request_ids) % len(bodies)]
+            return await client.post(path, params={'user_id': user_id}, content=body, headers=headers)
+
+        async def get(user_id: str) -> httpx.Response:
+            return await client.get(f'/learning-style/{user_id}')
+
+        # Profiles for the readers, which also starts the worker processes
+        for start in range(0, READ_USERS, max(workers, 1)):
+            await asyncio.gather(*(analyze(f'{case}-reader-{i}') for i in range(start, min(start + max(workers, 1), READ_USERS))))
+
+        latencies: Dict[str, List[float]] = defaultdict(list)
+        statuses: Dict[str, List[int]] = defaultdict(list)
+        deadline = time.perf_counter() + args.duration
+
+        async def run_client(client_id: int) -> None:
+            rng = random.Random(SEED + client_id)
+            while time.perf_counter() < deadline:
+                if rng.random() < args.read_fraction:
+                    endpoint, call = GET, get(f'{case}-reader-{rng.randrange(READ_USERS)}')
+                else:
+                    endpoint, call = ANALYZE, analyze(f'{case}-load-{next(request_ids)}')
+                started = time.perf_counter()
+                response = await call
+                if response.status_code == 200:
+                    latencies[endpoint].append((time.perf_counter() - started) * 1000)
+                elif response.status_code == 503:
+                    # Back off as a well-behaved client would, rather than spinning on rejections
+                    await asyncio.sleep(min(float(response.headers.get('retry-after', 1)),
+                                            max(deadline - time.perf_counter(), 0)))
+                statuses[endpoint].append(response.status_code)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(run_client(i) for i in range(args.concurrency)))
+        elapsed = time.perf_counter() - started
+
+    results = {}
+    for endpoint in (ANALYZE, GET):
+        samples = np.array(latencies[endpoint]) if latencies[endpoint] else np.zeros(1)
+        codes = statuses[endpoint]
+        results[endpoint] = {
+            'requests': len(codes),
+            'requests_per_second': codes.count(200) / elapsed,
+            'p50_ms': float(np.percentile(samples, 50)),
+            'p95_ms': float(np.percentile(samples, 95)),
+            'p99_ms': float(np.percentile(samples, 99)),
+            'rejected': codes.count(503),
+            'errors': len(codes) - codes.count(200) - codes.count(503)
+        }
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--payload-sizes', type=int, nargs='+', default=PAYLOAD_SIZES,
+                        help='interactions per analyze request')
+    parser.add_argument('--workers', type=int, nargs='+', default=WORKER_COUNTS,
+                        help='analysis worker processes; 0 analyzes inline on the event loop')
+    parser.add_argument('--concurrency', type=int, default=16, help='closed-loop clients')
+    parser.add_argument('--read-fraction', type=float, default=0.8, help='share of requests that are GETs')
+    parser.add_argument('--duration', type=float, default=10.0, help='seconds per case')
+    parser.add_argument('--columnar', action='store_true', help='send Arrow IPC bodies instead of JSON')
+    parser.add_argument('--output', help='write results as JSON to this path')
+    args = parser.parse_args()
+
+    print(f"{args.concurrency} clients, {args.read_fraction:.0%} reads, {args.duration:.0f}s per case, "
+          f"{'Arrow' if args.columnar else 'JSON'} bodies")
+    print(f"{'rows':>7} {'workers':>7} {'endpoint':<30} {'requests':>8} {'req/s':>9} {'p50 ms':>9} {'p95 ms':>9} "
+          f"{'p99 ms':>9} {'rejected':>8} {'errors':>6}")
+    results = []
+    try:
+        for n_interactions in args.payload_sizes:
+            bodies = make_bodies(n_interactions, args.columnar)
+            for workers in args.workers:
+                # User ids are prefixed by the case, so no request is answered from an earlier case's memo
+                stats_by_endpoint = asyncio.run(run_case(f'{n_interactions}-{workers}', bodies, workers, args))
+                for endpoint, stats in stats_by_endpoint.items():
+                    results.append({'interactions': n_interactions, 'workers': workers, 'endpoint': endpoint, **stats})
+                    print(f"{n_interactions:>7} {workers:>7} {endpoint:<30} {stats['requests']:>8} "
+                          f"{stats['requests_per_second']:>9.1f} {stats['p50_ms']:>9.2f} {stats['p95_ms']:>9.2f} "
+                          f"{stats['p99_ms']:>9.2f} {stats['rejected']:>8} {stats['errors']:>6}")
+    finally:
+        analyzer.executor.shutdown()
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({
+                'python': platform.python_version(),
+                'machine': platform.machine(),
+                'cpus': os.cpu_count(),
+                'settings': {key: value for key, value in vars(args).items() if key != 'output'},
+                'results': results
+            }, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
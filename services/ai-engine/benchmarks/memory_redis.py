@@ -0,0 +1,91 @@
+"""
+In-process stand-in for the subset of the aioredis client the ai-engine uses,
+so benchmarks run without a Redis server. Expiry is tracked but only enforced
+on read.
+"""
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+
+class MemoryRedis:
+    def __init__(self):
+        self.data: Dict[str, Tuple[bytes, Optional[float]]] = {}
+
+    @staticmethod
+    def _encode(value: Any) -> bytes:
+        return value if isinstance(value, bytes) else str(value).encode()
+
+    async def get(self, key: str) -> Optional[bytes]:
+        entry = self.data.get(key)
+        if entry is None:
+            return None
+        value, expires_at = entry
+        if expires_at is not None and expires_at <= time.monotonic():
+            del self.data[key]
+            return None
+        return value
+
+    async def ttl(self, key: str) -> int:
+        if await self.get(key) is None:
+            return -2
+        expires_at = self.data[key][1]
+        return -1 if expires_at is None else int(expires_at - time.monotonic())
+
+    async def set(self, key: str, value: Any) -> bool:
+        self.data[key] = (self._encode(value), None)
+        return True
+
+    async def setex(self, key: str, seconds: int, value: Any) -> bool:
+        self.data[key] = (self._encode(value), time.monotonic() + seconds)
+        return True
+
+    def pipeline(self, transaction: bool = True) -> 'MemoryPipeline':
+        return MemoryPipeline(self)
+
+
+class MemoryPipeline:
+    """
+    Buffers commands until execute(). Between watch() and multi() reads run
+    immediately, as in aioredis; WATCH always succeeds as nothing runs concurrently.
+    """
+    def __init__(self, client: MemoryRedis):
+        self.client = client
+        self.commands: List[Tuple[str, tuple]] = []
+        self.watching = False
+
+    async def __aenter__(self) -> 'MemoryPipeline':
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        self.commands = []
+        self.watching = False
+
+    async def watch(self, *keys: str) -> bool:
+        self.watching = True
+        return True
+
+    def multi(self) -> None:
+        self.watching = False
+
+    def get(self, key: str):
+        if self.watching:
+            return self.client.get(key)
+        self.commands.append(('get', (key,)))
+        return self
+
+    def ttl(self, key: str) -> 'MemoryPipeline':
+        self.commands.append(('ttl', (key,)))
+        return self
+
+    def set(self, key: str, value: Any) -> 'MemoryPipeline':
+        self.commands.append(('set', (key, value)))
+        return self
+
+    def setex(self, key: str, seconds: int, value: Any) -> 'MemoryPipeline':
+        self.commands.append(('setex', (key, seconds, value)))
+        return self
+
+    async def execute(self) -> List[Any]:
+        results = [await getattr(self.client, name)(*args) for name, args in self.commands]
+        self.commands = []
+        return results
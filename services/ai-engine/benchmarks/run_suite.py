@@ -0,0 +1,185 @@
+"""
+Synthetic-data benchmark suite for the learning-style analyzer.
+
+Times analyze_learning_style and each analysis stage for one user at growing
+history sizes, and analyze_learning_styles at growing user counts. Redis is
+replaced by the in-process MemoryRedis, so no server is needed. Reports
+latency percentiles, throughput and peak traced memory per case, and writes
+them as JSON for comparison between runs.
+
+    python benchmarks/run_suite.py --output results.json
+    python benchmarks/run_suite.py --quick --compare results.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from analysis_executor import AnalysisExecutor
+from interaction_aggregates import InteractionAggregates
+from learning_style_analyzer import LearningStyleAnalyzer
+from memory_redis import MemoryRedis
+from synthetic import generate_interactions
+
+INTERACTION_SIZES = [100, 1_000, 10_000, 100_000, 1_000_000]
+USER_COUNTS = [1, 10, 100, 1_000, 10_000, 100_000]
+INTERACTIONS_PER_USER = 20
+# Total timed work per case, bounding repeats at the large sizes
+TIME_BUDGET_SECONDS = 2.0
+MIN_REPEATS = 3
+MAX_REPEATS = 50
+SEED = 42
+
+
+def measure(fn: Callable[[], Any], repeats: Optional[int] = None) -> Dict[str, Any]:
+    """Latency percentiles over repeated calls, then peak traced memory of one more call"""
+    fn()  # Warm up
+    samples = []
+    deadline = time.perf_counter() + TIME_BUDGET_SECONDS
+    while len(samples) < (repeats or MAX_REPEATS):
+        started = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - started) * 1000)
+        if repeats is None and len(samples) >= MIN_REPEATS and time.perf_counter() > deadline:
+            break
+
+    tracemalloc.start()
+    try:
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        'repeats': len(samples),
+        'mean_ms': float(np.mean(samples)),
+        'p50_ms': float(np.percentile(samples, 50)),
+        'p95_ms': float(np.percentile(samples, 95)),
+        'p99_ms': float(np.percentile(samples, 99)),
+        'peak_memory_mb': peak / 2**20
+    }
+
+
+def stage_cases(analyzer: LearningStyleAnalyzer, df: pd.DataFrame, loop: asyncio.AbstractEventLoop) -> Dict[str, Callable[[], Any]]:
+    """One callable per analysis stage for a single user's history, each fed its real inputs"""
+    user_codes = np.zeros(len(df), dtype=np.intp)
+    aggregates = InteractionAggregates.from_frame(df)
+    sessions = analyzer._analyze_sessions(df, user_codes, 1)[0]
+    return {
+        'analyze_learning_style': lambda: loop.run_until_complete(analyzer.analyze_learning_style('user-000000', df)),
+        'aggregate': lambda: InteractionAggregates.from_frame(df),
+        'extract_learning_features': lambda: analyzer._extract_learning_features(aggregates),
+        'analyze_modality_preferences': lambda: analyzer._analyze_modality_preferences(aggregates),
+        'analyze_sessions': lambda: analyzer._analyze_sessions(df, user_codes, 1),
+        'analyze_cognitive_patterns': lambda: analyzer._analyze_cognitive_patterns(aggregates, sessions),
+        'analyze_temporal_patterns': lambda: analyzer._analyze_temporal_patterns(aggregates, sessions)
+    }
+
+
+def run(max_interactions: int, max_users: int, repeats: Optional[int]) -> List[Dict[str, Any]]:
+    analyzer = LearningStyleAnalyzer()
+    analyzer.executor = AnalysisExecutor('inline')
+    analyzer.redis.client = MemoryRedis()
+    loop = asyncio.new_event_loop()
+    results = []
+
+    def record(case: str, n_interactions: int, n_users: int, fn: Callable[[], Any]) -> None:
+        stats = measure(fn, repeats)
+        seconds = stats['mean_ms'] / 1000
+        result = {
+            'case': case,
+            'interactions': n_interactions,
+            'users': n_users,
+            **stats,
+            'interactions_per_second': n_interactions / seconds if seconds else float('inf'),
+            'users_per_second': n_users / seconds if seconds else float('inf')
+        }
+        results.append(result)
+        print(f"{case:>30} {n_interactions:>9} {n_users:>7} {stats['repeats']:>4} {stats['p50_ms']:>10.3f} "
+              f"{stats['p95_ms']:>10.3f} {stats['p99_ms']:>10.3f} {result['interactions_per_second']:>12.0f} "
+              f"{stats['peak_memory_mb']:>9.1f}")
+
+    print(f"{'case':>30} {'rows':>9} {'users':>7} {'runs':>4} {'p50 ms':>10} {'p95 ms':>10} {'p99 ms':>10} "
+          f"{'rows/s':>12} {'peak MB':>9}")
+    try:
+        for n in (n for n in INTERACTION_SIZES if n <= max_interactions):
+            df = generate_interactions(n, seed=SEED).assign(user_id='user-000000')
+            for case, fn in stage_cases(analyzer, df, loop).items():
+                record(case, n, 1, fn)
+
+        for n_users in (n for n in USER_COUNTS if n <= max_users):
+            n = n_users * INTERACTIONS_PER_USER
+            df = generate_interactions(n, n_users=n_users, seed=SEED)
+            record('analyze_learning_styles', n, n_users,
+                   lambda: loop.run_until_complete(analyzer.analyze_learning_styles(df)))
+    finally:
+        loop.close()
+    return results
+
+
+def compare(results: List[Dict[str, Any]], baseline_path: str, tolerance: float) -> bool:
+    """Print p50 ratios against a previous results file; False if any case slowed beyond tolerance"""
+    with open(baseline_path) as f:
+        baseline = {(r['case'], r['interactions'], r['users']): r for r in json.load(f)['results']}
+
+    ok = True
+    print(f"\n{'case':>30} {'rows':>9} {'users':>7} {'base p50':>10} {'p50':>10} {'ratio':>7}")
+    for result in results:
+        previous = baseline.get((result['case'], result['interactions'], result['users']))
+        if previous is None:
+            continue
+        ratio = result['p50_ms'] / previous['p50_ms'] if previous['p50_ms'] else float('inf')
+        regressed = ratio > 1 + tolerance
+        ok = ok and not regressed
+        print(f"{result['case']:>30} {result['interactions']:>9} {result['users']:>7} {previous['p50_ms']:>10.3f} "
+              f"{result['p50_ms']:>10.3f} {ratio:>6.2f}x{'  REGRESSION' if regressed else ''}")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--output', help='write results as JSON to this path')
+    parser.add_argument('--compare', metavar='BASELINE', help='compare p50 latencies against a previous results file')
+    parser.add_argument('--tolerance', type=float, default=0.2, help='allowed p50 slowdown before a case regresses')
+    parser.add_argument('--max-interactions', type=int, default=INTERACTION_SIZES[-1])
+    parser.add_argument('--max-users', type=int, default=USER_COUNTS[-1])
+    parser.add_argument('--repeats', type=int, help='fixed repeats per case instead of the time budget')
+    parser.add_argument('--quick', action='store_true', help='small sizes only, for a smoke run')
+    args = parser.parse_args()
+
+    if args.quick:
+        args.max_interactions = min(args.max_interactions, 10_000)
+        args.max_users = min(args.max_users, 1_000)
+
+    results = run(args.max_interactions, args.max_users, args.repeats)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({
+                'meta': {
+                    'created': pd.Timestamp.now(tz='UTC').isoformat(),
+                    'python': platform.python_version(),
+                    'numpy': np.__version__,
+                    'pandas': pd.__version__,
+                    'platform': platform.platform(),
+                    'seed': SEED
+                },
+                'results': results
+            }, f, indent=2)
+
+    if args.compare and not compare(results, args.compare, args.tolerance):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,104 @@
+"""
+Seeded synthetic interaction generator matching the InteractionData schema.
+
+Sessions have Poisson lengths and start at hours drawn from a
+morning/afternoon/evening activity curve. Each user has their own content-type
+mix, skill and difficulty level, and engagement decays through a session so
+the break-frequency analysis finds drops.
+"""
+from typing import Dict, List
+
+import numpy as np
+import pandas as pd
+
+CONTENT_TYPES = ['video', 'text', 'interactive', 'audio', 'image', 'podcast', 'simulation', 'game', 'diagram', 'lecture']
+CONTENT_TYPE_WEIGHTS = np.array([0.25, 0.2, 0.15, 0.08, 0.08, 0.05, 0.05, 0.06, 0.04, 0.04])
+MEAN_SESSION_LENGTH = 12
+
+
+def _hour_weights() -> np.ndarray:
+    hours = np.arange(24)
+    peaks = [(10, 2.0, 1.0), (15, 2.0, 0.8), (20, 1.5, 1.2)]
+    weights = sum(height * np.exp(-0.5 * ((hours - center) / width) ** 2) for center, width, height in peaks) + 0.05
+    return weights / weights.sum()
+
+
+def generate_interactions(n_interactions: int, n_users: int = 1, seed: int = 0,
+                          start: str = '2024-01-01', days: int = 365) -> pd.DataFrame:
+    """Generate n_interactions rows spread over n_users users, with a datetime64 timestamp column"""
+    rng = np.random.default_rng(seed)
+
+    # Sessions, trimmed so the lengths add up to exactly n_interactions
+    lengths = 1 + rng.poisson(MEAN_SESSION_LENGTH - 1, size=n_interactions // MEAN_SESSION_LENGTH + 16)
+    while lengths.sum() < n_interactions:
+        lengths = np.concatenate([lengths, 1 + rng.poisson(MEAN_SESSION_LENGTH - 1, size=16)])
+    n_sessions = int(np.searchsorted(np.cumsum(lengths), n_interactions) + 1)
+    lengths = lengths[:n_sessions]
+    lengths[-1] -= lengths.sum() - n_interactions
+
+    # Users have log-normally distributed activity; everyone gets a session when there are enough
+    activity = rng.lognormal(0.0, 1.0, n_users)
+    session_users = rng.choice(n_users, size=n_sessions, p=activity / activity.sum())
+    session_users[:min(n_users, n_sessions)] = np.arange(min(n_users, n_sessions))
+
+    session_starts = (
+        pd.Timestamp(start).value // 10**6
+        + rng.integers(0, days, n_sessions) * 86_400_000
+        + rng.choice(24, size=n_sessions, p=_hour_weights()) * 3_600_000
+        + rng.integers(0, 3_600_000, n_sessions)
+    )
+    session_durations = np.clip(rng.lognormal(np.log(1800), 0.5, n_sessions), 60, 14400).astype(np.int64)
+
+    # Per-user traits
+    content_mix = rng.dirichlet(CONTENT_TYPE_WEIGHTS * 5, size=n_users)
+    base_engagement = rng.beta(4, 2, n_users)
+    skill = rng.beta(4, 2, n_users)
+    level = rng.uniform(2, 9, n_users)
+
+    row_session = np.repeat(np.arange(n_sessions), lengths)
+    row_user = session_users[row_session]
+    position = np.arange(n_interactions) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+
+    cumulative_mix = np.cumsum(content_mix, axis=1)
+    content_codes = (cumulative_mix[row_user] < rng.random(n_interactions)[:, None]).sum(axis=1)
+    content_codes = np.minimum(content_codes, len(CONTENT_TYPES) - 1)
+
+    difficulty = np.clip(np.rint(rng.normal(level[row_user], 2.0)), 1, 10).astype(np.int64)
+    cognitive_load = np.clip(np.rint(difficulty / 2 + rng.normal(0, 1, n_interactions)), 1, 5).astype(np.int64)
+    complexity = np.clip(np.rint(difficulty / 2 + rng.normal(0, 1, n_interactions)), 1, 5).astype(np.int64)
+    response_time = rng.gamma(2.0, 1500.0, n_interactions) * (1 + 0.1 * complexity)
+
+    affinity = content_mix[row_user, content_codes]
+    engagement = np.clip(
+        base_engagement[row_user] + 0.3 * affinity - 0.015 * position + rng.normal(0, 0.08, n_interactions), 0, 1
+    )
+    accuracy = np.clip(skill[row_user] - 0.03 * (difficulty - 5) + rng.normal(0, 0.1, n_interactions), 0, 1)
+    completion = np.clip(0.6 * engagement + 0.4 * rng.beta(5, 2, n_interactions), 0, 1)
+
+    # Interactions within a session follow each other by response time plus think time
+    gaps = response_time + rng.exponential(30_000, n_interactions)
+    elapsed = np.cumsum(gaps)
+    elapsed -= np.repeat(elapsed[np.cumsum(lengths) - lengths] - gaps[np.cumsum(lengths) - lengths], lengths)
+    timestamps = (session_starts[row_session] + elapsed.astype(np.int64)).view('datetime64[ms]')
+
+    user_labels = np.array([f'user-{u:06d}' for u in range(n_users)], dtype=object)
+    session_labels = np.array([f'session-{s:08d}' for s in range(n_sessions)], dtype=object)
+    return pd.DataFrame({
+        'user_id': user_labels[row_user],
+        'session_id': session_labels[row_session],
+        'content_type': np.array(CONTENT_TYPES, dtype=object)[content_codes],
+        'response_time': response_time,
+        'accuracy': accuracy,
+        'engagement_score': engagement,
+        'completion_rate': completion,
+        'difficulty_level': difficulty,
+        'cognitive_load': cognitive_load,
+        'complexity_level': complexity,
+        'session_duration': session_durations[row_session],
+        'timestamp': timestamps
+    })
+
+
+def to_records(df: pd.DataFrame) -> List[Dict]:
+    """InteractionData-shaped dicts, with ISO timestamp strings as the JSON API receives them"""
+    return df.assign(timestamp=df['timestamp'].dt.strftime('%Y-%m-%dT%H:%M:%S.%f')).to_dict('records')
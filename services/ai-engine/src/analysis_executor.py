@@ -0,0 +1,61 @@
+import asyncio
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Optional
+
+EXECUTOR_MODES = ('inline', 'process')
+
+
+class AnalysisQueueFull(Exception):
+    """Raised when too many analyses are already waiting for a worker"""
+    pass
+
+
+class AnalysisExecutor:
+    """
+    Runs the CPU-bound part of an analysis either inline on the event loop or
+    in a process pool, so that Redis I/O and cache reads stay responsive.
+
+    In process mode at most max_pending analyses are queued or running;
+    further submissions raise AnalysisQueueFull instead of piling up.
+    Submitted functions must be module-level so they can be pickled.
+    """
+    def __init__(self, mode: str = 'inline', max_workers: Optional[int] = None, max_pending: Optional[int] = None):
+        if mode not in EXECUTOR_MODES:
+            raise ValueError(f"Unknown executor mode {mode!r}, expected one of {EXECUTOR_MODES}")
+        self.mode = mode
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.max_pending = max_pending or 2 * self.max_workers
+        self.pending = 0
+        self._pool = None
+
+    @classmethod
+    def from_env(cls) -> 'AnalysisExecutor':
+        """Configure from ANALYSIS_EXECUTOR, ANALYSIS_WORKERS and ANALYSIS_MAX_PENDING"""
+        return cls(
+            mode=os.environ.get('ANALYSIS_EXECUTOR', 'inline'),
+            max_workers=int(os.environ['ANALYSIS_WORKERS']) if os.environ.get('ANALYSIS_WORKERS') else None,
+            max_pending=int(os.environ['ANALYSIS_MAX_PENDING']) if os.environ.get('ANALYSIS_MAX_PENDING') else None
+        )
+
+    async def run(self, fn: Callable[..., Any], *args: Any) -> Any:
+        if self.mode == 'inline':
+            return fn(*args)
+
+        if self.pending >= self.max_pending:
+            raise AnalysisQueueFull(f"{self.pending} analyses already pending")
+        if self._pool is None:
+            # Spawned workers do not inherit the event loop or open Redis connections
+            self._pool = ProcessPoolExecutor(self.max_workers, mp_context=multiprocessing.get_context('spawn'))
+
+        self.pending += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._pool, fn, *args)
+        finally:
+            self.pending -= 1
+
+    def shutdown(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(cancel_futures=True)
+            self._pool = None
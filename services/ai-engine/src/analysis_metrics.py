@@ -0,0 +1,251 @@
+import os
+import random
+import time
+from typing import Dict, Iterator
+
+from prometheus_client import REGISTRY, CollectorRegistry, Gauge, Histogram
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+from prometheus_client.multiprocess import MultiProcessCollector
+from prometheus_client.registry import Collector
+
+STAGE_SECONDS = Histogram(
+    'ai_engine_analysis_stage_seconds',
+    'Wall time of each learning-style analysis stage, summed over the users of one request',
+    ['operation', 'stage'],
+    buckets=(0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+)
+INPUT_ROWS = Histogram(
+    'ai_engine_analysis_input_rows', 'Interactions per analysis request', ['operation'],
+    buckets=(1, 10, 100, 1_000, 10_000, 100_000, 1_000_000)
+)
+INPUT_SESSIONS = Histogram(
+    'ai_engine_analysis_input_sessions', 'Distinct sessions per analysis request', ['operation'],
+    buckets=(1, 5, 10, 50, 100, 500, 1_000, 10_000, 100_000)
+)
+# Every worker process is configured alike, so across processes any one value is the value
+SAMPLE_RATE = Gauge('ai_engine_metrics_sample_rate', 'Fraction of analysis requests whose stages are timed',
+                    multiprocess_mode='max')
+
+
+def metrics_registry() -> CollectorRegistry:
+    """
+    The registry to export and to register the collectors below with.
+
+    Without PROMETHEUS_MULTIPROC_DIR this is the default registry, which
+    only describes the process answering the scrape. Under several server
+    worker processes, set PROMETHEUS_MULTIPROC_DIR to a directory shared by
+    them and emptied before they start. Every worker then writes the
+    histograms and gauges above there, and a scrape of any worker sums them
+    across all of them. The collectors below read in-process state, so they
+    still describe only the worker that answered.
+    """
+    if 'PROMETHEUS_MULTIPROC_DIR' not in os.environ:
+        return REGISTRY
+    registry = CollectorRegistry()
+    MultiProcessCollector(registry)
+    return registry
+
+
+class StageTimer:
+    """
+    Stage durations and input sizes of one sampled analysis request.
+
+    The timer is passed to the analysis, which may run in a worker process;
+    the worker returns it filled in, and observe() records it in the parent.
+    """
+    enabled = True
+
+    def __init__(self, operation: str):
+        self.operation = operation
+        self.durations: Dict[str, float] = {}
+        self.sizes: Dict[str, int] = {}
+
+    def stage(self, name: str) -> '_Stage':
+        return _Stage(self.durations, name)
+
+    def count(self, name: str, value: int) -> None:
+        self.sizes[name] = self.sizes.get(name, 0) + int(value)
+
+    def merge(self, other: 'StageTimer') -> None:
+        """Add in what a worker process recorded on its copy of this timer"""
+        if other is self:
+            return
+        for name, seconds in other.durations.items():
+            self.durations[name] = self.durations.get(name, 0.0) + seconds
+        for name, value in other.sizes.items():
+            self.count(name, value)
+
+    def observe(self) -> None:
+        for name, seconds in self.durations.items():
+            STAGE_SECONDS.labels(self.operation, name).observe(seconds)
+        if 'rows' in self.sizes:
+            INPUT_ROWS.labels(self.operation).observe(self.sizes['rows'])
+        if 'sessions' in self.sizes:
+            INPUT_SESSIONS.labels(self.operation).observe(self.sizes['sessions'])
+
+
+class _Stage:
+    __slots__ = ('durations', 'name', 'started')
+
+    def __init__(self, durations: Dict[str, float], name: str):
+        self.durations = durations
+        self.name = name
+
+    def __enter__(self) -> None:
+        self.started = time.perf_counter()
+
+    def __exit__(self, *exc_info) -> None:
+        self.durations[self.name] = self.durations.get(self.name, 0.0) + time.perf_counter() - self.started
+
+
+class _NullStage:
+    __slots__ = ()
+
+    def __enter__(self) -> None:
+        pass
+
+    def __exit__(self, *exc_info) -> None:
+        pass
+
+
+class NullTimer:
+    """Stand-in for unsampled requests; every call is a no-op"""
+    enabled = False
+    _stage = _NullStage()
+
+    def stage(self, name: str) -> _NullStage:
+        return self._stage
+
+    def count(self, name: str, value: int) -> None:
+        pass
+
+    def merge(self, other) -> None:
+        pass
+
+    def observe(self) -> None:
+        pass
+
+
+NULL_TIMER = NullTimer()
+
+
+class AnalysisMetrics:
+    """Hands out stage timers for a sampled fraction of requests, set by METRICS_SAMPLE_RATE"""
+    def __init__(self, sample_rate: float = 1.0):
+        self.sample_rate = min(max(sample_rate, 0.0), 1.0)
+
+    @classmethod
+    def from_env(cls) -> 'AnalysisMetrics':
+        return cls(sample_rate=float(os.environ.get('METRICS_SAMPLE_RATE', 1.0)))
+
+    def timer(self, operation: str):
+        if self.sample_rate >= 1.0 or (self.sample_rate > 0.0 and random.random() < self.sample_rate):
+            return StageTimer(operation)
+        return NULL_TIMER
+
+
+class ProfileCacheCollector(Collector):
+    """Exports ProfileCache counters at scrape time, so cache reads pay nothing extra"""
+    def __init__(self, cache):
+        self.cache = cache
+
+    def collect(self) -> Iterator:
+        stats = self.cache.stats()
+        requests = CounterMetricFamily(
+            'ai_engine_profile_cache_requests', 'Profile lookups by the in-process cache tier', labels=['result']
+        )
+        requests.add_metric(['hit'], stats['hits'])
+        requests.add_metric(['stale_hit'], stats['stale_hits'])
+        requests.add_metric(['miss'], stats['misses'])
+        yield requests
+        yield CounterMetricFamily(
+            'ai_engine_profile_cache_evictions', 'Profiles evicted from the in-process cache tier',
+            value=stats['evictions']
+        )
+        yield GaugeMetricFamily('ai_engine_profile_cache_entries', 'Profiles held in the in-process cache tier',
+                                value=stats['entries'])
+        yield GaugeMetricFamily('ai_engine_profile_cache_inflight', 'Profile loads from Redis in flight',
+                                value=stats['inflight'])
+
+
+class RequestCoalescerCollector(Collector):
+    """Exports how repeated analysis requests were answered: memoised, joined in flight, or computed"""
+    def __init__(self, coalescer):
+        self.coalescer = coalescer
+
+    def collect(self) -> Iterator:
+        stats = self.coalescer.stats()
+        requests = CounterMetricFamily(
+            'ai_engine_analysis_memo_requests', 'Analysis requests by how the payload hash was answered',
+            labels=['result']
+        )
+        requests.add_metric(['hit'], stats['hits'])
+        requests.add_metric(['coalesced'], stats['coalesced'])
+        requests.add_metric(['miss'], stats['misses'])
+        yield requests
+        yield GaugeMetricFamily('ai_engine_analysis_memo_entries', 'Memoised analysis results',
+                                value=stats['entries'])
+
+
+class ModelRegistryCollector(Collector):
+    """Exports load time and memory of each model artifact currently loaded"""
+    def __init__(self, registry):
+        self.registry = registry
+
+    def collect(self) -> Iterator:
+        load_seconds = GaugeMetricFamily('ai_engine_model_load_seconds', 'Time to load the current artifact version',
+                                         labels=['artifact', 'version'])
+        resident = GaugeMetricFamily('ai_engine_model_resident_bytes',
+                                     'Growth in resident memory while loading the current artifact version',
+                                     labels=['artifact', 'version'])
+        mapped = GaugeMetricFamily('ai_engine_model_mapped_bytes',
+                                   'Array bytes memory-mapped from the current artifact version',
+                                   labels=['artifact', 'version'])
+        for name, stats in self.registry.stats().items():
+            labels = [name, stats['version']]
+            load_seconds.add_metric(labels, stats['load_seconds'])
+            if stats['resident_bytes'] is not None:
+                resident.add_metric(labels, stats['resident_bytes'])
+            mapped.add_metric(labels, stats['mapped_bytes'])
+        yield load_seconds
+        yield resident
+        yield mapped
+
+
+class RedisCollector(Collector):
+    """Exports connection pool usage, circuit breaker state and fallback store counters of a ResilientRedis"""
+    def __init__(self, redis):
+        self.redis = redis
+
+    def collect(self) -> Iterator:
+        stats = self.redis.stats()
+        connections = GaugeMetricFamily('ai_engine_redis_pool_connections', 'Redis pool connections by use',
+                                        labels=['state'])
+        connections.add_metric(['in_use'], stats['connections_in_use'])
+        connections.add_metric(['idle'], stats['connections_idle'])
+        yield connections
+        yield GaugeMetricFamily('ai_engine_redis_pool_max_connections', 'Redis pool size limit',
+                                value=stats['max_connections'])
+        state = GaugeMetricFamily('ai_engine_redis_breaker_state', 'Redis circuit breaker state, 1 for the current one',
+                                  labels=['state'])
+        for name in ('closed', 'open', 'half_open'):
+            state.add_metric([name], 1 if stats['breaker_state'] == name else 0)
+        yield state
+        yield CounterMetricFamily('ai_engine_redis_breaker_opened', 'Times the Redis circuit breaker opened',
+                                  value=stats['breaker_opened'])
+        yield CounterMetricFamily('ai_engine_redis_failures', 'Redis calls that failed or timed out',
+                                  value=stats['failures'])
+        yield CounterMetricFamily('ai_engine_redis_pool_exhausted',
+                                  'Redis calls that found no free pooled connection in time, not counted as failures',
+                                  value=stats['pool_exhausted'])
+        yield CounterMetricFamily('ai_engine_redis_rejected', 'Redis calls skipped while the breaker was open',
+                                  value=stats['rejected'])
+        fallback_reads = CounterMetricFamily('ai_engine_redis_fallback_reads',
+                                             'Reads served from the in-process fallback store', labels=['result'])
+        fallback_reads.add_metric(['hit'], stats['fallback_hits'])
+        fallback_reads.add_metric(['miss'], stats['fallback_misses'])
+        yield fallback_reads
+        yield CounterMetricFamily('ai_engine_redis_fallback_writes',
+                                  'Values held in-process because Redis was unavailable', value=stats['fallback_writes'])
+        yield GaugeMetricFamily('ai_engine_redis_fallback_entries', 'Values held in the in-process fallback store',
+                                value=stats['fallback_entries'])
@@ -0,0 +1,207 @@
+"""
+Recompute and cache every learning-style profile from an interaction export.
+
+The export (Parquet or Arrow IPC) is first split into shard files by a hash
+of user_id, so each user's history lands in exactly one shard. Shards are
+then analyzed in a process pool with the vectorized batch path, and each
+chunk of profiles is written to Redis in one pipelined round trip.
+
+Finished shards leave a checkpoint, so an interrupted job rerun with the
+same checkpoint directory only redoes unfinished shards.
+
+    python src/bulk_recompute.py export.parquet --checkpoint-dir /tmp/recompute
+"""
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import time
+import zlib
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Any, Dict, List, Optional
+
+import aioredis
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+from columnar_ingest import FILE_BATCH_ROWS, INTERACTION_SCHEMA, iter_interaction_file
+from learning_style_analyzer import PROFILE_TTL_SECONDS, LearningStyleAnalyzer
+from profile_codec import encode_profile
+
+DEFAULT_SHARDS = 64
+
+
+def shard_of(user_ids: np.ndarray, n_shards: int) -> np.ndarray:
+    """Stable shard of each user id, the same in every process and run"""
+    return np.array([zlib.crc32(str(user_id).encode()) % n_shards for user_id in user_ids], dtype=np.intp)
+
+
+class BulkRecompute:
+    """
+    One recompute job, its state kept under checkpoint_dir:
+
+        partition.json          written once the export is split
+        shards/shard-NNNN.arrow interactions of the users hashed to shard NNNN
+        done/shard-NNNN.json    written once shard NNNN's profiles are in Redis
+    """
+    def __init__(self, source: str, checkpoint_dir: str, n_shards: int = DEFAULT_SHARDS,
+                 redis_url: str = 'redis://localhost', chunk_size: int = 1000, ttl: int = PROFILE_TTL_SECONDS):
+        self.source = source
+        self.checkpoint_dir = checkpoint_dir
+        self.n_shards = n_shards
+        self.redis_url = redis_url
+        self.chunk_size = chunk_size
+        self.ttl = ttl
+
+    def partition(self, batch_rows: int = FILE_BATCH_ROWS) -> Dict[str, Any]:
+        """Split the export into shard files, once; reruns reuse the existing split"""
+        marker = os.path.join(self.checkpoint_dir, 'partition.json')
+        if os.path.exists(marker):
+            with open(marker) as f:
+                partition = json.load(f)
+            if partition['shards'] != self.n_shards or partition['source'] != os.path.abspath(self.source):
+                raise ValueError(f"{self.checkpoint_dir} holds a partition of {partition['source']} into "
+                                 f"{partition['shards']} shards; use a new checkpoint directory")
+            return partition
+
+        shard_dir = os.path.join(self.checkpoint_dir, 'shards')
+        os.makedirs(shard_dir, exist_ok=True)
+        os.makedirs(os.path.join(self.checkpoint_dir, 'done'), exist_ok=True)
+        writers = {}
+        rows = 0
+        try:
+            for df in iter_interaction_file(self.source, batch_rows):
+                rows += len(df)
+                user_codes, user_ids = pd.factorize(df['user_id'])
+                row_shards = shard_of(np.asarray(user_ids), self.n_shards)[user_codes]
+                df['timestamp'] = df['timestamp'].to_numpy().view(np.int64)
+                table = pa.Table.from_pandas(df, schema=INTERACTION_SCHEMA, preserve_index=False)
+                order = np.argsort(row_shards, kind='stable')
+                bounds = np.searchsorted(row_shards[order], np.arange(self.n_shards + 1))
+                for shard in np.flatnonzero(np.diff(bounds)):
+                    if shard not in writers:
+                        writers[shard] = pa.ipc.new_file(self._shard_path(shard), INTERACTION_SCHEMA)
+                    writers[shard].write_table(table.take(order[bounds[shard]:bounds[shard + 1]]))
+        finally:
+            for writer in writers.values():
+                writer.close()
+
+        partition = {'source': os.path.abspath(self.source), 'shards': self.n_shards, 'rows': rows,
+                     'nonempty_shards': sorted(int(shard) for shard in writers)}
+        _write_json(marker, partition)
+        return partition
+
+    def pending_shards(self, partition: Dict[str, Any]) -> List[int]:
+        return [shard for shard in partition['nonempty_shards'] if not os.path.exists(self._done_path(shard))]
+
+    def run(self, workers: Optional[int] = None, report=print) -> Dict[str, Any]:
+        """Recompute every unfinished shard, returning throughput figures for this run"""
+        workers = workers or os.cpu_count() or 1
+        started = time.perf_counter()
+        partition = self.partition()
+        pending = self.pending_shards(partition)
+        report(f"{partition['rows']} interactions in {len(partition['nonempty_shards'])} shards, "
+               f"{len(pending)} to recompute on {workers} workers")
+
+        results = []
+        if pending:
+            # Spawned workers do not inherit open Redis connections
+            with ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context('spawn')) as pool:
+                futures = [
+                    pool.submit(_recompute_shard, self._shard_path(shard), self._done_path(shard),
+                                self.redis_url, self.chunk_size, self.ttl)
+                    for shard in pending
+                ]
+                for future in as_completed(futures):
+                    result = future.result()
+                    results.append(result)
+                    report(f"shard {result['shard']}: {result['users']} users in {result['seconds']:.1f}s")
+
+        elapsed = time.perf_counter() - started
+        users = sum(result['users'] for result in results)
+        busy = sum(result['seconds'] for result in results)
+        summary = {
+            'users': users,
+            'shards': len(results),
+            'seconds': elapsed,
+            'workers': workers,
+            'users_per_second': users / elapsed if elapsed else 0.0,
+            # Per worker-second of wall time, and per second a worker actually spent on a shard
+            'users_per_second_per_core': users / elapsed / workers if elapsed else 0.0,
+            'users_per_busy_core_second': users / busy if busy else 0.0
+        }
+        report(f"{users} users in {elapsed:.1f}s: {summary['users_per_second']:.0f} users/s, "
+               f"{summary['users_per_second_per_core']:.0f} users/s/core "
+               f"({summary['users_per_busy_core_second']:.0f} per busy core)")
+        return summary
+
+    def _shard_path(self, shard: int) -> str:
+        return os.path.join(self.checkpoint_dir, 'shards', f'shard-{shard:04d}.arrow')
+
+    def _done_path(self, shard: int) -> str:
+        return os.path.join(self.checkpoint_dir, 'done', f'shard-{shard:04d}.json')
+
+
+_shard_analyzer = None
+
+
+def _recompute_shard(shard_path: str, done_path: str, redis_url: str, chunk_size: int, ttl: int) -> Dict[str, Any]:
+    global _shard_analyzer
+    if _shard_analyzer is None:
+        _shard_analyzer = LearningStyleAnalyzer()
+    started = time.perf_counter()
+    df = pd.concat(iter_interaction_file(shard_path), ignore_index=True)
+    users = asyncio.run(_write_profiles(_shard_analyzer.build_learning_styles(df, chunk_size), redis_url, ttl))
+    result = {
+        'shard': int(os.path.basename(shard_path).split('-')[1].split('.')[0]),
+        'users': users,
+        'rows': len(df),
+        'seconds': time.perf_counter() - started
+    }
+    _write_json(done_path, result)
+    return result
+
+
+async def _write_profiles(chunks, redis_url: str, ttl: int) -> int:
+    """Cache each chunk of profiles in a single round trip, returning the number of users written"""
+    redis_client = await aioredis.from_url(redis_url)
+    users = 0
+    try:
+        for chunk in chunks:
+            async with redis_client.pipeline(transaction=False) as pipe:
+                for user_id, learning_style in chunk.items():
+                    pipe.setex(f"learning_style:{user_id}", ttl, encode_profile(learning_style))
+                await pipe.execute()
+            users += len(chunk)
+    finally:
+        await redis_client.close()
+    return users
+
+
+def _write_json(path: str, data: Dict[str, Any]) -> None:
+    """Write atomically, so a checkpoint is either absent or complete"""
+    temporary = f'{path}.tmp'
+    with open(temporary, 'w') as f:
+        json.dump(data, f)
+    os.replace(temporary, path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('source', help='Parquet or Arrow IPC interaction export')
+    parser.add_argument('--checkpoint-dir', required=True, help='Shard files and per-shard checkpoints; reuse to resume')
+    parser.add_argument('--shards', type=int, default=DEFAULT_SHARDS)
+    parser.add_argument('--workers', type=int, default=None, help='Worker processes, default one per core')
+    parser.add_argument('--chunk-size', type=int, default=1000, help='Users analyzed and written per Redis round trip')
+    parser.add_argument('--ttl', type=int, default=PROFILE_TTL_SECONDS, help='Profile lifetime in Redis, seconds')
+    parser.add_argument('--redis-url', default=os.environ.get('REDIS_URL', 'redis://localhost'))
+    args = parser.parse_args()
+
+    job = BulkRecompute(args.source, args.checkpoint_dir, args.shards, args.redis_url, args.chunk_size, args.ttl)
+    job.run(args.workers)
+
+
+if __name__ == '__main__':
+    main()
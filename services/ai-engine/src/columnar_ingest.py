@@ -0,0 +1,106 @@
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from typing import Dict, Iterator, Union
+
+from interaction_aggregates import epoch_seconds
+
+ARROW_STREAM_MEDIA_TYPE = "application/vnd.apache.arrow.stream"
+
+# Rows decoded at a time when reading interaction files
+FILE_BATCH_ROWS = 65536
+
+# Columnar counterpart of InteractionData; timestamps arrive as epoch milliseconds
+INTERACTION_SCHEMA = pa.schema([
+    ('user_id', pa.string()),
+    ('session_id', pa.string()),
+    ('content_type', pa.string()),
+    ('response_time', pa.float64()),
+    ('accuracy', pa.float64()),
+    ('engagement_score', pa.float64()),
+    ('completion_rate', pa.float64()),
+    ('difficulty_level', pa.int64()),
+    ('cognitive_load', pa.int64()),
+    ('complexity_level', pa.int64()),
+    ('session_duration', pa.int64()),
+    ('timestamp', pa.int64())
+])
+
+
+def decode_interactions(body: bytes) -> pd.DataFrame:
+    """
+    Decode an Arrow IPC stream of interactions into a typed DataFrame.
+
+    Validation is per column rather than per row: every INTERACTION_SCHEMA
+    column must be present, castable to its type and free of nulls.
+    Raises ValueError describing every offending column.
+    """
+    try:
+        table = pa.ipc.open_stream(pa.py_buffer(body)).read_all()
+    except pa.ArrowInvalid as e:
+        raise ValueError(f"Invalid Arrow stream: {e}")
+    return _to_frame(table)
+
+
+def iter_interaction_file(path: str, batch_rows: int = FILE_BATCH_ROWS) -> Iterator[pd.DataFrame]:
+    """
+    Decode a Parquet or Arrow IPC (file or stream format) file of interactions
+    as typed DataFrames of at most batch_rows rows, validated as in
+    decode_interactions, so that only one batch is in memory at a time.
+    Timestamps may be epoch milliseconds or an Arrow timestamp column.
+    """
+    if str(path).endswith('.parquet'):
+        parquet = pq.ParquetFile(path)
+        names = [name for name in INTERACTION_SCHEMA.names if name in parquet.schema_arrow.names]
+        for batch in parquet.iter_batches(batch_size=batch_rows, columns=names):
+            yield _to_frame(batch)
+        return
+
+    with pa.memory_map(str(path)) as source:
+        try:
+            reader = pa.ipc.open_file(source)
+            batches = (reader.get_batch(i) for i in range(reader.num_record_batches))
+        except pa.ArrowInvalid:
+            source.seek(0)
+            batches = pa.ipc.open_stream(source)
+        for batch in batches:
+            for offset in range(0, batch.num_rows, batch_rows):
+                yield _to_frame(batch.slice(offset, batch_rows))
+
+
+def _to_frame(table: Union[pa.Table, pa.RecordBatch]) -> pd.DataFrame:
+    """Validate and cast interaction columns to INTERACTION_SCHEMA, raising ValueError naming every bad column"""
+    errors: Dict[str, str] = {}
+    columns = []
+    for field in INTERACTION_SCHEMA:
+        if field.name not in table.column_names:
+            errors[field.name] = "missing"
+            continue
+        column = table.column(field.name)
+        if column.null_count:
+            errors[field.name] = f"{column.null_count} null values"
+            continue
+        if pa.types.is_timestamp(column.type):
+            column = column.cast(pa.timestamp('ms', tz=column.type.tz), safe=False)
+        try:
+            columns.append(column.cast(field.type))
+        except (pa.ArrowInvalid, pa.ArrowNotImplementedError) as e:
+            errors[field.name] = f"expected {field.type}: {e}"
+    if errors:
+        raise ValueError("; ".join(f"{name}: {error}" for name, error in errors.items()))
+
+    df = pa.Table.from_arrays(columns, schema=INTERACTION_SCHEMA).to_pandas()
+    df['timestamp'] = df['timestamp'].to_numpy().view('datetime64[ms]')
+    return df
+
+
+def encode_interactions(df: pd.DataFrame) -> bytes:
+    """Encode interactions as an Arrow IPC stream, the client side of decode_interactions"""
+    df = df.copy()
+    if not pd.api.types.is_integer_dtype(df['timestamp']):
+        df['timestamp'] = (epoch_seconds(df['timestamp']) * 1000).round().astype('int64')
+    table = pa.Table.from_pandas(df[INTERACTION_SCHEMA.names], schema=INTERACTION_SCHEMA, preserve_index=False)
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, INTERACTION_SCHEMA) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
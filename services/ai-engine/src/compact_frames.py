@@ -0,0 +1,84 @@
+"""
+Compact in-memory dtypes for interaction, behavioural and assessment frames.
+
+Frames built from JSON records or default-typed arrays hold repeated
+strings as objects and every number as 64 bits. COMPACT_DTYPES maps the
+columns the engines read to categoricals, int8/int16 levels and float32
+scores, which shrinks frames several-fold and lets equality masks and
+groupbys work on small integer codes.
+
+Durations and response times stay 64-bit floats or 32-bit integers, since
+their range is not small. Every aggregate is still accumulated in float64.
+
+The standalone scripts load this module through scripts/compact_frames.py,
+so it stays the one definition of the ingestion schema.
+"""
+from typing import Dict
+
+import numpy as np
+import pandas as pd
+
+CATEGORY = 'category'
+
+COMPACT_DTYPES: Dict[str, str] = {
+    # Repeated labels
+    'user_id': CATEGORY,
+    'session_id': CATEGORY,
+    'content_type': CATEGORY,
+    'problem_type': CATEGORY,
+    'problem_approach': CATEGORY,
+    # Identifiers and small-range levels
+    'student_id': 'int32',
+    'difficulty_level': 'int8',
+    'cognitive_load': 'int8',
+    'complexity_level': 'int8',
+    'spacing_interval': 'int16',
+    'session_duration': 'int32',
+    # Scores in [0, 1]
+    'accuracy': 'float32',
+    'engagement_score': 'float32',
+    'completion_rate': 'float32',
+    'score': 'float32',
+    'retention_score': 'float32',
+    'comprehension_score': 'float32',
+    'application_score': 'float32',
+    'session_engagement': 'float32',
+    'information_density': 'float32',
+    'solution_creativity': 'float32',
+    'persistence_score': 'float32',
+    'error_recovery_rate': 'float32',
+    'cognitive_load_preference': 'float32',
+    'exploration_tendency': 'float32',
+    'collaboration_preference': 'float32'
+}
+
+
+def compact_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    df with every COMPACT_DTYPES column it has converted to its compact dtype.
+
+    A column is left as it is when the conversion would lose information:
+    integers outside the target range, and non-integer values bound for an
+    integer column. Returns df itself, uncopied, when nothing needs converting.
+    """
+    conversions = {}
+    for column, dtype in COMPACT_DTYPES.items():
+        if column not in df.columns or df[column].dtype == dtype:
+            continue
+        values = df[column]
+        if dtype == CATEGORY:
+            conversions[column] = dtype
+        elif np.dtype(dtype).kind == 'i':
+            if pd.api.types.is_integer_dtype(values) and not pd.api.types.is_bool_dtype(values) \
+                    and _fits(values, np.dtype(dtype)):
+                conversions[column] = dtype
+        elif pd.api.types.is_numeric_dtype(values) and not pd.api.types.is_bool_dtype(values):
+            conversions[column] = dtype
+    return df.astype(conversions) if conversions else df
+
+
+def _fits(values: pd.Series, dtype: np.dtype) -> bool:
+    if values.empty:
+        return True
+    info = np.iinfo(dtype)
+    return info.min <= values.min() and values.max() <= info.max
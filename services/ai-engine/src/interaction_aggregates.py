@@ -0,0 +1,251 @@
+import numpy as np
+import pandas as pd
+from typing import Dict, List, Any, Optional, Tuple
+
+# Columns summed into every aggregate table, in storage order
+AGGREGATE_FIELDS = [
+    'count',
+    'engagement_score',
+    'accuracy',
+    'completion_rate',
+    'response_time',
+    'session_duration',
+    'difficulty_level'
+]
+
+# Row buckets used by the cognitive estimates, in bit order
+FLAG_BUCKETS = ['complex', 'high_load', 'difficult']
+
+HOURS_PER_DAY = 24
+
+# Length of a column's moments: count, mean, sum of squared deviations, sum of squared weights
+MOMENTS_SIZE = 4
+
+
+class InteractionAggregates:
+    """
+    Grouped totals over a user's interactions.
+
+    Built with one bincount per column and marginal (content_type, hour and
+    complexity/load/difficulty bucket), offset by group so that many users are
+    aggregated in the same pass.
+
+    Rows may carry weights, e.g. for time decay; counts then hold the sum of
+    weights and every mean is weighted accordingly. Standard deviations then
+    treat the weights as reliability weights, so that they estimate the same
+    spread as the unweighted ones.
+    """
+    def __init__(self, content_types: List[str], by_type: np.ndarray, by_hour: np.ndarray,
+                 by_flag: np.ndarray, moments: Dict[str, np.ndarray]):
+        self.content_types = list(content_types)
+        self.by_type = by_type      # (len(content_types), len(AGGREGATE_FIELDS))
+        self.by_hour = by_hour      # (24, len(AGGREGATE_FIELDS))
+        self.by_flag = by_flag      # (len(FLAG_BUCKETS), len(AGGREGATE_FIELDS))
+        self.moments = moments      # column -> [count, mean, sum of squared deviations, sum of squared weights]
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame, weights: Optional[np.ndarray] = None) -> 'InteractionAggregates':
+        """Aggregate an interaction frame in a single grouped pass"""
+        return cls.from_frame_by_group(df, np.zeros(len(df), dtype=np.intp), 1, weights)[0]
+
+    @classmethod
+    def from_frame_by_group(cls, df: pd.DataFrame, group_codes: np.ndarray, n_groups: int,
+                            weights: Optional[np.ndarray] = None) -> List['InteractionAggregates']:
+        """Aggregate an interaction frame for every group (e.g. user) in a single grouped pass"""
+        type_codes, content_types = pd.factorize(df['content_type'])
+        hours = pd.to_datetime(df['timestamp']).dt.hour.to_numpy()
+        flags = (
+            (df['complexity_level'].to_numpy() >= 3).astype(np.intp)
+            | ((df['cognitive_load'].to_numpy() >= 4).astype(np.intp) << 1)
+            | ((df['difficulty_level'].to_numpy() >= 7).astype(np.intp) << 2)
+        )
+        n_types = len(content_types)
+        n_flags = 1 << len(FLAG_BUCKETS)
+        type_keys = group_codes * n_types + type_codes
+        hour_keys = group_codes * HOURS_PER_DAY + hours
+        flag_keys = group_codes * n_flags + flags
+
+        by_type = np.empty((len(AGGREGATE_FIELDS), n_groups * n_types))
+        by_hour = np.empty((len(AGGREGATE_FIELDS), n_groups * HOURS_PER_DAY))
+        by_flag_cell = np.empty((len(AGGREGATE_FIELDS), n_groups * n_flags))
+        for i, column in enumerate(AGGREGATE_FIELDS):
+            if column == 'count':
+                totals = weights
+            else:
+                totals = df[column].to_numpy(dtype=np.float64)
+                if weights is not None:
+                    totals = totals * weights
+            by_type[i] = np.bincount(type_keys, weights=totals, minlength=n_groups * n_types)
+            by_hour[i] = np.bincount(hour_keys, weights=totals, minlength=n_groups * HOURS_PER_DAY)
+            by_flag_cell[i] = np.bincount(flag_keys, weights=totals, minlength=n_groups * n_flags)
+
+        by_type = by_type.T.reshape(n_groups, n_types, len(AGGREGATE_FIELDS))
+        by_hour = by_hour.T.reshape(n_groups, HOURS_PER_DAY, len(AGGREGATE_FIELDS))
+        by_flag_cell = by_flag_cell.T.reshape(n_groups, n_flags, len(AGGREGATE_FIELDS))
+        by_flag = np.stack([
+            by_flag_cell[:, (np.arange(n_flags) >> bit) & 1 == 1].sum(axis=1)
+            for bit in range(len(FLAG_BUCKETS))
+        ], axis=1)
+
+        counts = by_hour[:, :, 0].sum(axis=1)
+        moments = {
+            column: _grouped_moments(df[column].to_numpy(dtype=np.float64), group_codes, counts, weights)
+            for column in ('response_time', 'difficulty_level')
+        }
+
+        return [
+            cls(
+                content_types=list(content_types),
+                by_type=by_type[g],
+                by_hour=by_hour[g],
+                by_flag=by_flag[g],
+                moments={column: group_moments[g] for column, group_moments in moments.items()}
+            )
+            for g in range(n_groups)
+        ]
+
+    @classmethod
+    def empty(cls) -> 'InteractionAggregates':
+        return cls(
+            content_types=[],
+            by_type=np.zeros((0, len(AGGREGATE_FIELDS))),
+            by_hour=np.zeros((HOURS_PER_DAY, len(AGGREGATE_FIELDS))),
+            by_flag=np.zeros((len(FLAG_BUCKETS), len(AGGREGATE_FIELDS))),
+            moments={column: np.zeros(MOMENTS_SIZE) for column in ('response_time', 'difficulty_level')}
+        )
+
+    def merge(self, other: 'InteractionAggregates') -> 'InteractionAggregates':
+        """Combine with the aggregates of another batch of the same user's interactions"""
+        content_types = self.content_types + [t for t in other.content_types if t not in self.content_types]
+        by_type = np.zeros((len(content_types), len(AGGREGATE_FIELDS)))
+        by_type[:len(self.content_types)] = self.by_type
+        np.add.at(by_type, [content_types.index(t) for t in other.content_types], other.by_type)
+        return InteractionAggregates(
+            content_types=content_types,
+            by_type=by_type,
+            by_hour=self.by_hour + other.by_hour,
+            by_flag=self.by_flag + other.by_flag,
+            moments={
+                column: _merge_moments(self.moments[column], other.moments[column])
+                for column in self.moments
+            }
+        )
+
+    def decayed(self, factor: float) -> 'InteractionAggregates':
+        """The same aggregates with every interaction's weight multiplied by factor"""
+        return InteractionAggregates(
+            content_types=self.content_types,
+            by_type=self.by_type * factor,
+            by_hour=self.by_hour * factor,
+            by_flag=self.by_flag * factor,
+            moments={column: moments * [factor, 1.0, factor, factor * factor] for column, moments in self.moments.items()}
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        seen = self.by_type[:, 0] > 0
+        return {
+            'content_types': [t for t, keep in zip(self.content_types, seen) if keep],
+            'by_type': self.by_type[seen].tolist(),
+            'by_hour': self.by_hour.tolist(),
+            'by_flag': self.by_flag.tolist(),
+            'moments': {column: moments.tolist() for column, moments in self.moments.items()}
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'InteractionAggregates':
+        return cls(
+            content_types=data['content_types'],
+            by_type=np.array(data['by_type'], dtype=np.float64).reshape(-1, len(AGGREGATE_FIELDS)),
+            by_hour=np.array(data['by_hour'], dtype=np.float64),
+            by_flag=np.array(data['by_flag'], dtype=np.float64),
+            moments={column: _upgrade_moments(np.array(moments, dtype=np.float64))
+                     for column, moments in data['moments'].items()}
+        )
+
+    @property
+    def count(self) -> int:
+        return int(self.by_hour[:, 0].sum())
+
+    def mean(self, column: str) -> float:
+        """Mean of a summed column over all interactions"""
+        totals = self.by_hour.sum(axis=0)
+        return totals[AGGREGATE_FIELDS.index(column)] / totals[0] if totals[0] > 0 else np.nan
+
+    def std(self, column: str) -> float:
+        """
+        Sample standard deviation (ddof=1), matching pandas; with weights, the
+        reliability-weighted one, dividing by W - W2 / W instead of n - 1
+        """
+        n, _, m2, w2 = self.moments[column]
+        denominator = n - w2 / n if n > 0 else 0.0
+        return np.sqrt(m2 / denominator) if denominator > 0 else np.nan
+
+    def content_type_mean(self, column: str, content_types: List[str]) -> Optional[float]:
+        """Mean of a column over the given content types, None if none were seen"""
+        rows = [i for i, content_type in enumerate(self.content_types) if content_type in content_types]
+        totals = self.by_type[rows].sum(axis=0)
+        if totals[0] == 0:
+            return None
+        return totals[AGGREGATE_FIELDS.index(column)] / totals[0]
+
+    def flag_mean(self, flag: str, column: str) -> Optional[float]:
+        """Mean of a column over rows in a FLAG_BUCKETS bucket, None if the bucket is empty"""
+        totals = self.by_flag[FLAG_BUCKETS.index(flag)]
+        if totals[0] == 0:
+            return None
+        return totals[AGGREGATE_FIELDS.index(column)] / totals[0]
+
+    def hourly_means(self, columns: List[str]) -> Tuple[np.ndarray, Dict[str, np.ndarray]]:
+        """Hours with any interactions, and the per-hour means of the given columns"""
+        seen = np.flatnonzero(self.by_hour[:, 0])
+        counts = self.by_hour[seen, 0]
+        return seen, {column: self.by_hour[seen, AGGREGATE_FIELDS.index(column)] / counts for column in columns}
+
+def epoch_seconds(timestamps: pd.Series) -> np.ndarray:
+    """Parse a timestamp column to float seconds since the epoch, naive or timezone-aware"""
+    parsed = pd.to_datetime(timestamps)
+    return (parsed - pd.Timestamp(0, tz=parsed.dt.tz)).dt.total_seconds().to_numpy()
+
+
+def decay_weights(timestamps: np.ndarray, reference: np.ndarray, half_life: float) -> np.ndarray:
+    """Weight of each interaction, halving for every half_life seconds it precedes its reference time"""
+    return np.exp2(-(reference - timestamps) / half_life)
+
+
+def _grouped_moments(values: np.ndarray, group_codes: np.ndarray, counts: np.ndarray,
+                     weights: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Per-group [count, mean, sum of squared deviations, sum of squared weights]
+    for a column, counts being weight totals if weighted
+    """
+    n_groups = len(counts)
+    weighted = values if weights is None else values * weights
+    sums = np.bincount(group_codes, weights=weighted, minlength=n_groups)
+    means = np.divide(sums, counts, out=np.zeros(n_groups), where=counts > 0)
+    squares = np.square(values - means[group_codes])
+    if weights is not None:
+        squares *= weights
+    m2 = np.bincount(group_codes, weights=squares, minlength=n_groups)
+    w2 = counts if weights is None else np.bincount(group_codes, weights=np.square(weights), minlength=n_groups)
+    return np.column_stack([counts, means, m2, w2])
+
+
+def _merge_moments(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """Combine two _grouped_moments rows (Chan et al. parallel Welford)"""
+    n_a, mean_a, m2_a, w2_a = a
+    n_b, mean_b, m2_b, w2_b = b
+    n = n_a + n_b
+    if n == 0:
+        return np.zeros(MOMENTS_SIZE)
+    delta = mean_b - mean_a
+    return np.array([n, mean_a + delta * n_b / n, m2_a + m2_b + delta * delta * n_a * n_b / n, w2_a + w2_b])
+
+
+def _upgrade_moments(moments: np.ndarray) -> np.ndarray:
+    """
+    Moments stored before they carried the sum of squared weights, taken as
+    unweighted: exact for undecayed states, as biased as before for decayed ones
+    """
+    if len(moments) == MOMENTS_SIZE:
+        return moments
+    return np.append(moments, moments[0])
@@ -0,0 +1,154 @@
+import asyncio
+import copy
+import os
+import time
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+from sklearn.cluster import MiniBatchKMeans
+from sklearn.preprocessing import StandardScaler
+
+from model_registry import ModelRegistry
+
+ARCHETYPES_ARTIFACT = 'learner_archetypes'
+ARCHETYPES_FORMAT_VERSION = 1
+
+
+class LearnerArchetypes:
+    """
+    Learner-archetype clustering over _extract_learning_features vectors.
+
+    Scaler statistics and MiniBatchKMeans centroids are learned incrementally
+    with partial_fit, once at least batch_size new vectors have arrived, so
+    the population never has to be refitted in one go. Assignment works on a
+    NumPy snapshot of the fitted arrays rather than going through sklearn's
+    predict, which keeps it in the microseconds.
+
+    Profiles may be built in worker processes, which only assign: their
+    vectors are handed back to the parent, which owns the model and
+    publishes checkpoints to the model registry. Workers, and serving
+    processes that are not the WriterRole writer, pick up the latest
+    checkpoint with refresh().
+    """
+
+    def __init__(self, n_clusters: int = 8, batch_size: int = 256, registry: Optional[ModelRegistry] = None,
+                 checkpoint_interval: float = 60.0, refresh_interval: float = 5.0):
+        self.n_clusters = n_clusters
+        self.batch_size = max(batch_size, n_clusters)
+        self.registry = registry
+        self.checkpoint_interval = checkpoint_interval
+        self.refresh_interval = refresh_interval
+        self.scaler = StandardScaler()
+        self.kmeans = MiniBatchKMeans(n_clusters=n_clusters, batch_size=self.batch_size, random_state=42, n_init=3)
+        self.samples_seen = 0
+        self._pending: List[np.ndarray] = []
+        self._pending_rows = 0
+        self._mean = self._scale = self._centroids = None
+        self._loaded_version = None
+        self._last_refresh = 0.0
+        self._last_checkpoint = time.monotonic()
+        self._dirty = False
+
+    @classmethod
+    def from_env(cls, registry: ModelRegistry) -> 'LearnerArchetypes':
+        """Configure from ARCHETYPE_CLUSTERS and ARCHETYPE_BATCH_SIZE, loading any checkpoint in the registry"""
+        archetypes = cls(
+            n_clusters=int(os.environ.get('ARCHETYPE_CLUSTERS', 8)),
+            batch_size=int(os.environ.get('ARCHETYPE_BATCH_SIZE', 256)),
+            registry=registry
+        )
+        archetypes.refresh(force=True)
+        return archetypes
+
+    @property
+    def fitted(self) -> bool:
+        return self._centroids is not None
+
+    def assign(self, features: np.ndarray) -> Optional[int]:
+        """Nearest centroid for one feature vector, or None before the first fit"""
+        if self._centroids is None:
+            return None
+        scaled = (features.ravel() - self._mean) / self._scale
+        # Missing features sit at the population mean
+        scaled[~np.isfinite(scaled)] = 0.0
+        return int(np.argmin(((self._centroids - scaled) ** 2).sum(axis=1)))
+
+    def partial_fit(self, features: Optional[np.ndarray]) -> bool:
+        """Buffer feature rows and update the model once a batch is full; True if it was updated"""
+        if features is None or len(features) == 0:
+            return False
+        features = features[np.isfinite(features).all(axis=1)]
+        self._pending.append(features)
+        self._pending_rows += len(features)
+        if self._pending_rows < self.batch_size:
+            return False
+
+        batch = np.vstack(self._pending)
+        self._pending = []
+        self._pending_rows = 0
+        self.scaler.partial_fit(batch)
+        self.kmeans.partial_fit(self.scaler.transform(batch))
+        self.samples_seen += len(batch)
+        self._snapshot()
+        self._dirty = True
+        return True
+
+    @property
+    def checkpoint_due(self) -> bool:
+        """True if the model changed and checkpoint_interval has passed since the last save"""
+        return (self.registry is not None and self._dirty
+                and time.monotonic() - self._last_checkpoint >= self.checkpoint_interval)
+
+    def save(self) -> None:
+        if self.registry is not None and self._dirty:
+            self._publish(self._checkpoint())
+
+    async def save_async(self) -> None:
+        """save() with the artifact written from a worker thread, so partial_fit can go on meanwhile"""
+        if self.registry is not None and self._dirty:
+            await asyncio.to_thread(self._publish, self._checkpoint())
+
+    def _checkpoint(self) -> Dict[str, Any]:
+        """A copy of the model as it stands, marking it clean"""
+        self._last_checkpoint = time.monotonic()
+        self._dirty = False
+        return {
+            'version': ARCHETYPES_FORMAT_VERSION,
+            'scaler': copy.deepcopy(self.scaler),
+            'kmeans': copy.deepcopy(self.kmeans),
+            'samples_seen': self.samples_seen
+        }
+
+    def _publish(self, checkpoint: Dict[str, Any]) -> None:
+        try:
+            self._loaded_version = self.registry.publish(ARCHETYPES_ARTIFACT, checkpoint)
+        except Exception:
+            self._dirty = True
+            raise
+
+    def refresh(self, force: bool = False) -> bool:
+        """Load the checkpoint if a newer one was published, checking at most every refresh_interval"""
+        now = time.monotonic()
+        if self.registry is None or (not force and now - self._last_refresh < self.refresh_interval):
+            return False
+        self._last_refresh = now
+        self.registry.refresh(ARCHETYPES_ARTIFACT)
+        artifact = self.registry.artifact(ARCHETYPES_ARTIFACT)
+        if artifact is None or (self._loaded_version is not None and artifact.version <= self._loaded_version):
+            return False
+
+        state = artifact.model
+        if state.get('version') != ARCHETYPES_FORMAT_VERSION:
+            raise ValueError(f"Unknown learner archetypes format version {state.get('version')}")
+        self.scaler = state['scaler']
+        self.kmeans = state['kmeans']
+        self.samples_seen = state['samples_seen']
+        self.n_clusters = self.kmeans.n_clusters
+        self._loaded_version = artifact.version
+        self._snapshot()
+        return True
+
+    def _snapshot(self) -> None:
+        self._mean = self.scaler.mean_.copy()
+        self._scale = self.scaler.scale_.copy()
+        self._centroids = self.kmeans.cluster_centers_.copy()
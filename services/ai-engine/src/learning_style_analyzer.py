@@ -0,0 +1,758 @@
+"""
+Learning-style analysis, free of service side effects: importing it builds no
+app, analyzer or metric collectors, so the HTTP service, batch jobs and
+analysis worker processes can all share it.
+"""
+import numpy as np
+import pandas as pd
+import asyncio
+import aioredis
+import os
+from typing import Dict, List, Any, Awaitable, Callable, Iterator, Optional, Tuple, Union
+import json
+from contextlib import contextmanager
+
+from analysis_executor import AnalysisExecutor
+from analysis_metrics import NULL_TIMER, AnalysisMetrics
+from columnar_ingest import FILE_BATCH_ROWS, iter_interaction_file
+from compact_frames import compact_frame
+from interaction_aggregates import InteractionAggregates, decay_weights, epoch_seconds
+from learner_archetypes import LearnerArchetypes
+from learning_style_state import LearningStyleState
+from model_registry import ModelRegistry
+from similar_learners import SimilarLearnerIndex
+from profile_cache import ProfileCache
+from profile_codec import decode_profile, encode_profile
+from resilient_redis import RedisUnavailable, ResilientRedis
+from writer_role import WriterRole
+
+# Lifetime of cached profiles in Redis and in the in-process tier
+PROFILE_TTL_SECONDS = 3600
+
+# Time-decay mode: interactions lose half their weight in the profile every this many seconds.
+# Unset weighs the whole history equally.
+DECAY_HALF_LIFE_SECONDS = (
+    float(os.environ['LEARNING_STYLE_HALF_LIFE_DAYS']) * 86400
+    if os.environ.get('LEARNING_STYLE_HALF_LIFE_DAYS') else None
+)
+
+# How often the service looks for newly published model versions
+MODEL_POLL_SECONDS = float(os.environ.get('MODEL_POLL_SECONDS', 30))
+
+# Attempts an incremental update makes before giving up on concurrent updates to the same user
+UPDATE_MAX_ATTEMPTS = int(os.environ.get('UPDATE_MAX_ATTEMPTS', 5))
+
+# Interaction rows as dicts, or an already-typed frame from columnar ingestion
+Interactions = Union[List[Dict], pd.DataFrame]
+
+# Feature vectors extracted while building profiles: user ids and one row per user
+ObservedFeatures = Optional[Tuple[List[str], np.ndarray]]
+
+class UpdateConflict(Exception):
+    """Raised when concurrent updates to a user's running statistics keep winning the race"""
+    pass
+
+class LearningStyleAnalyzer:
+    def __init__(self):
+        self.models = ModelRegistry.from_env()
+        self.archetypes = LearnerArchetypes.from_env(self.models)
+        # Opened by the serving process only; workers hand their vectors back instead
+        self.similar_learners: Optional[SimilarLearnerIndex] = None
+        # Taken by the serving process in initialize(); an analyzer never initialized owns its models
+        self.role: Optional[WriterRole] = None
+        # Model training and checkpoints running off the event loop, by kind
+        self._background: Dict[str, asyncio.Task] = {}
+        self.record_features = False
+        self._observed: List[Tuple[str, np.ndarray]] = []
+        self.redis = ResilientRedis.from_env()
+        self.decay_half_life = DECAY_HALF_LIFE_SECONDS
+        self.update_max_attempts = UPDATE_MAX_ATTEMPTS
+        self.executor = AnalysisExecutor.from_env()
+        self.profile_cache = ProfileCache.from_env()
+        self.metrics = AnalysisMetrics.from_env()
+        
+    async def initialize(self):
+        await self.redis.connect()
+        # One serving process owns the learned models; the others follow its checkpoints
+        self.role = WriterRole.from_env()
+        self.role.try_acquire()
+        self.similar_learners = SimilarLearnerIndex.from_env(read_only=not self.role.is_writer)
+    
+    @property
+    def owns_models(self) -> bool:
+        """Whether this process trains and checkpoints the archetypes and the similar-learner index"""
+        return self.role is None or self.role.is_writer
+    
+    async def sync_models(self) -> None:
+        """
+        Periodic model upkeep: load newly published model versions, then fold in the feature
+        vectors other processes handed over if this process owns the models, or else follow the
+        owner's checkpoints and hand over this process's vectors. Takes over ownership once the
+        owning process has gone.
+        """
+        await asyncio.to_thread(self.models.refresh)
+        if self.role is None:
+            return
+        if not self.role.is_writer and self.role.try_acquire():
+            self.archetypes.refresh(force=True)
+            self.similar_learners = await asyncio.to_thread(SimilarLearnerIndex.from_env)
+            self._learn_from_features(self.role.take_buffered())
+        
+        if self.role.is_writer:
+            self._learn_from_features(await asyncio.to_thread(self.role.take))
+        else:
+            self.archetypes.refresh(force=True)
+            if self.similar_learners is None or self.similar_learners.changed_on_disk():
+                self.similar_learners = await asyncio.to_thread(SimilarLearnerIndex.from_env, True)
+            await asyncio.to_thread(self.role.flush, self.role.take_buffered())
+    
+    async def close_models(self) -> None:
+        """Let model jobs finish, then save the models if this process owns them, or hand over its vectors"""
+        await asyncio.gather(*self._background.values(), return_exceptions=True)
+        if self.owns_models:
+            self.archetypes.save()
+            if self.similar_learners is not None:
+                self.similar_learners.save()
+        else:
+            self.role.flush(self.role.take_buffered())
+        if self.role is not None:
+            self.role.release()
+        
+    async def get_learning_style(self, user_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Cached learning style, served from the in-process tier when possible
+        """
+        key = f"learning_style:{user_id}"
+        
+        async def load_from_redis():
+            try:
+                async with self.redis.guard() as client:
+                    async with client.pipeline(transaction=False) as pipe:
+                        pipe.get(key)
+                        pipe.ttl(key)
+                        cached_result, ttl = await pipe.execute()
+            except RedisUnavailable:
+                # Serve a profile written while Redis was down, if this process holds one
+                cached_result, ttl = self.redis.recall(key)
+            if not cached_result:
+                return None, None
+            return decode_profile(cached_result), ttl if ttl >= 0 else None
+        
+        return await self.profile_cache.get(key, load_from_redis)
+    
+    async def analyze_learning_style(self, user_id: str, interaction_data: Interactions) -> Dict[str, Any]:
+        """
+        Analyze user's learning style based on interaction patterns
+        """
+        if len(interaction_data) == 0:
+            return self._default_learning_style()
+            
+        timer = self.metrics.timer('analyze')
+        with timer.stage('executor'):
+            learning_style, worker_timer, observed = await self.executor.run(
+                _build_learning_style, self._inline_analyzer(), user_id, interaction_data, timer
+            )
+        timer.merge(worker_timer)
+        self._learn_from_features(observed)
+        
+        # Cache the results
+        await self._cache_learning_styles([{user_id: learning_style}], timer)
+        timer.observe()
+        
+        return learning_style
+    
+    async def analyze_learning_styles(self, interaction_data: Interactions, chunk_size: int = 1000) -> Dict[str, Dict[str, Any]]:
+        """
+        Analyze learning styles for many users at once, grouped by each interaction's user_id
+        """
+        timer = self.metrics.timer('analyze_batch')
+        with timer.stage('executor'):
+            chunks, worker_timer, observed = await self.executor.run(
+                _build_learning_styles, self._inline_analyzer(), interaction_data, chunk_size, timer
+            )
+        timer.merge(worker_timer)
+        self._learn_from_features(observed)
+        learning_styles = await self._cache_learning_styles(chunks, timer)
+        timer.observe()
+        
+        return learning_styles
+    
+    async def analyze_learning_styles_from_file(self, path: str, chunk_size: int = 1000,
+                                                batch_rows: int = FILE_BATCH_ROWS) -> Dict[str, Dict[str, Any]]:
+        """
+        Analyze learning styles for every user in a Parquet or Arrow file of interactions,
+        reading it in bounded batches rather than as one frame
+        """
+        timer = self.metrics.timer('analyze_file')
+        with timer.stage('executor'):
+            chunks, worker_timer, observed = await self.executor.run(
+                _build_learning_styles_from_file, self._inline_analyzer(), path, chunk_size, batch_rows, timer
+            )
+        timer.merge(worker_timer)
+        self._learn_from_features(observed)
+        learning_styles = await self._cache_learning_styles(chunks, timer)
+        timer.observe()
+        
+        return learning_styles
+    
+    async def _cache_learning_styles(self, chunks: List[Dict[str, Dict[str, Any]]], timer) -> Dict[str, Dict[str, Any]]:
+        """Cache chunks of profiles in Redis and the in-process tier, returning them merged"""
+        learning_styles = {}
+        for chunk in chunks:
+            with timer.stage('serialization'):
+                encoded = {f"learning_style:{user_id}": encode_profile(learning_style)
+                           for user_id, learning_style in chunk.items()}
+            with timer.stage('redis_write'):
+                await self._write_profiles(encoded)
+            for user_id, learning_style in chunk.items():
+                self.profile_cache.put(f"learning_style:{user_id}", learning_style, PROFILE_TTL_SECONDS)
+            learning_styles.update(chunk)
+        return learning_styles
+    
+    async def _write_profiles(self, encoded: Dict[str, bytes]) -> None:
+        """Cache encoded profiles in a single round trip, holding them in-process if Redis is unavailable"""
+        try:
+            async with self.redis.guard() as client:
+                async with client.pipeline(transaction=False) as pipe:
+                    for key, value in encoded.items():
+                        pipe.setex(key, PROFILE_TTL_SECONDS, value)
+                    await pipe.execute()
+        except RedisUnavailable:
+            for key, value in encoded.items():
+                self.redis.remember(key, value, PROFILE_TTL_SECONDS)
+        else:
+            for key in encoded:
+                self.redis.forget(key)
+    
+    async def update_learning_style(self, user_id: str, interaction_data: Interactions) -> Dict[str, Any]:
+        """
+        Fold only new interactions into the user's running statistics and refresh the profile.
+        The first update for a user starts the statistics, so it should carry their full history.
+        """
+        if len(interaction_data) == 0:
+            return self._default_learning_style()
+        
+        state_key = f"learning_style_state:{user_id}"
+        timer = self.metrics.timer('update')
+        for _ in range(self.update_max_attempts):
+            # Running statistics live only in Redis, so updates fail with RedisUnavailable while it is down
+            async with self.redis.guard() as client:
+                cached_state = await client.get(state_key)
+            # No pooled connection is held while the analysis queues for and runs in the executor
+            with timer.stage('executor'):
+                state, learning_style, worker_timer, observed = await self.executor.run(
+                    _update_learning_style, self._inline_analyzer(), user_id, cached_state, interaction_data, timer
+                )
+            timer.merge(worker_timer)
+            with timer.stage('serialization'):
+                profile = encode_profile(learning_style)
+            
+            async with self.redis.guard() as client:
+                async with client.pipeline(transaction=True) as pipe:
+                    try:
+                        # Commit only if no other update for this user landed since the state was read
+                        await pipe.watch(state_key)
+                        if await pipe.get(state_key) != cached_state:
+                            # The analysis was of stale state; its features are dropped with it
+                            continue
+                        pipe.multi()
+                        pipe.set(state_key, state)
+                        pipe.setex(f"learning_style:{user_id}", PROFILE_TTL_SECONDS, profile)
+                        with timer.stage('redis_write'):
+                            await pipe.execute()
+                    except aioredis.WatchError:
+                        continue
+            
+            self.profile_cache.put(f"learning_style:{user_id}", learning_style, PROFILE_TTL_SECONDS)
+            self.redis.forget(f"learning_style:{user_id}")
+            self._learn_from_features(observed)
+            timer.observe()
+            return learning_style
+        
+        raise UpdateConflict(f"Learning state of {user_id} changed during {self.update_max_attempts} attempts to update it")
+    
+    def find_similar_learners(self, user_id: str, k: int = 10) -> Optional[List[Dict[str, Any]]]:
+        """The k learners whose feature vectors are nearest the user's, or None if the user is not indexed"""
+        if self.similar_learners is None:
+            return None
+        neighbours = self.similar_learners.neighbours(user_id, k)
+        if neighbours is None:
+            return None
+        return [{'user_id': neighbour, 'distance': distance} for neighbour, distance in neighbours]
+    
+    def take_observed_features(self) -> ObservedFeatures:
+        """Feature vectors recorded since the last call, when record_features is set"""
+        if not self._observed:
+            return None
+        user_ids = [user_id for user_id, _ in self._observed]
+        features = np.vstack([features for _, features in self._observed])
+        self._observed = []
+        return user_ids, features
+    
+    def _inline_analyzer(self) -> Optional['LearningStyleAnalyzer']:
+        """This analyzer when analyses run inline, for the entry points to run on; pool workers use their own"""
+        return self if self.executor.mode == 'inline' else None
+    
+    def _learn_from_features(self, observed: ObservedFeatures) -> None:
+        """
+        Fold feature vectors returned by the analysis into the archetypes and the similar-learner index,
+        training and checkpointing them in the background; processes that do not own the models buffer
+        the vectors for the owner instead
+        """
+        if observed is None:
+            return
+        user_ids, features = observed
+        if not self.owns_models:
+            self.role.put(user_ids, features)
+            return
+        
+        self.archetypes.partial_fit(features)
+        if self.archetypes.checkpoint_due:
+            self._in_background('archetypes', self.archetypes.save_async)
+        index = self.similar_learners
+        if index is not None:
+            index.upsert(user_ids, features)
+            # Queries are answered from the untrained or previous lists until training finishes
+            if index.needs_training:
+                self._in_background('similar_learners', index.train_async)
+            elif index.checkpoint_due:
+                self._in_background('similar_learners', index.save_async)
+    
+    def _in_background(self, job: str, start: Callable[[], Awaitable[None]]) -> None:
+        """Start a model job off the request path, unless the last job of that kind is still running"""
+        task = self._background.get(job)
+        if task is None or task.done():
+            task = asyncio.get_running_loop().create_task(start())
+            # A failed job leaves its model dirty, so it is retried; the error is not reported again
+            task.add_done_callback(lambda task: task.cancelled() or task.exception())
+            self._background[job] = task
+    
+    def update_learning_state(self, user_id: str, cached_state: Optional[bytes], interaction_data: Interactions,
+                              timer=NULL_TIMER) -> Tuple[str, Dict[str, Any]]:
+        """
+        Fold new interactions into a serialized LearningStyleState, returning the new state and profile
+        """
+        with timer.stage('dataframe'):
+            df = compact_frame(pd.DataFrame(interaction_data))
+        timer.count('rows', len(df))
+        with timer.stage('state_update'):
+            state = LearningStyleState.from_dict(json.loads(cached_state)) if cached_state else LearningStyleState()
+            state.half_life = self.decay_half_life
+            state.update(df)
+            sessions = state.session_statistics()
+        learning_style = self._build_profile(user_id, state.aggregates, sessions, timer)
+        with timer.stage('state_serialization'):
+            state_json = json.dumps(state.to_dict())
+        return state_json, learning_style
+    
+    def build_learning_style(self, user_id: str, interaction_data: Interactions, timer=NULL_TIMER) -> Dict[str, Any]:
+        """
+        Compute the learning style profile without touching the cache
+        """
+        # Convert to DataFrame for analysis
+        with timer.stage('dataframe'):
+            df = compact_frame(pd.DataFrame(interaction_data))
+        timer.count('rows', len(df))
+        return self._build_learning_styles(df, [user_id], np.zeros(len(df), dtype=np.intp), timer)[0]
+    
+    def build_learning_styles(self, interaction_data: Interactions, chunk_size: int = 1000,
+                              timer=NULL_TIMER) -> Iterator[Dict[str, Dict[str, Any]]]:
+        """
+        Compute learning style profiles per user_id, yielding them in chunks of at most chunk_size users
+        """
+        with timer.stage('dataframe'):
+            df = compact_frame(pd.DataFrame(interaction_data))
+        timer.count('rows', len(df))
+        if df.empty:
+            return
+        
+        # Make each chunk of users a contiguous slice of the frame
+        with timer.stage('partition'):
+            user_codes, user_ids = pd.factorize(df['user_id'])
+            order = np.argsort(user_codes, kind='stable')
+            df = df.iloc[order]
+            user_codes = user_codes[order]
+        bounds = np.searchsorted(user_codes, np.arange(0, len(user_ids) + chunk_size, chunk_size))
+        
+        for chunk_start, (row_start, row_end) in zip(range(0, len(user_ids), chunk_size), zip(bounds[:-1], bounds[1:])):
+            chunk_user_ids = list(user_ids[chunk_start:chunk_start + chunk_size])
+            profiles = self._build_learning_styles(
+                df.iloc[row_start:row_end], chunk_user_ids, user_codes[row_start:row_end] - chunk_start, timer
+            )
+            yield dict(zip(chunk_user_ids, profiles))
+    
+    def build_learning_styles_from_file(self, path: str, chunk_size: int = 1000, batch_rows: int = FILE_BATCH_ROWS,
+                                        timer=NULL_TIMER) -> Iterator[Dict[str, Dict[str, Any]]]:
+        """
+        Compute learning style profiles per user_id from a Parquet or Arrow file, yielding them
+        in chunks of at most chunk_size users.
+        
+        Interactions are read batch_rows at a time and folded into one LearningStyleState per
+        user, so memory is bounded by the batch size and the number of users rather than the
+        length of the history; session quantiles come from the state's sketch. As with
+        update_learning_style, each session's interactions should appear in time order.
+        """
+        states: Dict[str, LearningStyleState] = {}
+        for df in iter_interaction_file(path, batch_rows):
+            timer.count('rows', len(df))
+            with timer.stage('state_update'):
+                user_codes, user_ids = pd.factorize(df['user_id'])
+                for user_id in user_ids:
+                    if user_id not in states:
+                        states[user_id] = LearningStyleState(half_life=self.decay_half_life)
+                LearningStyleState.update_many([states[user_id] for user_id in user_ids], df, user_codes)
+        
+        user_ids = list(states)
+        for chunk_start in range(0, len(user_ids), chunk_size):
+            chunk_user_ids = user_ids[chunk_start:chunk_start + chunk_size]
+            yield {
+                user_id: self._build_profile(user_id, states[user_id].aggregates,
+                                             states[user_id].session_statistics(), timer)
+                for user_id in chunk_user_ids
+            }
+    
+    def _build_learning_styles(self, df: pd.DataFrame, user_ids: List[str], user_codes: np.ndarray,
+                               timer=NULL_TIMER) -> List[Dict[str, Any]]:
+        """Build one profile per user, with user_codes mapping each row to its position in user_ids"""
+        # Aggregate every grouped statistic in one pass
+        with timer.stage('aggregation'):
+            weights = self._decay_weights(df, user_codes, len(user_ids)) if self.decay_half_life else None
+            aggregates = InteractionAggregates.from_frame_by_group(df, user_codes, len(user_ids), weights)
+        with timer.stage('sessions'):
+            sessions = self._analyze_sessions(df, user_codes, len(user_ids), timer)
+        
+        return [self._build_profile(user_id, aggregates[i], sessions[i], timer) for i, user_id in enumerate(user_ids)]
+    
+    def _build_profile(self, user_id: str, aggregates: InteractionAggregates, sessions: Dict[str, Any],
+                       timer=NULL_TIMER) -> Dict[str, Any]:
+        """Assemble one user's profile from their aggregates and session statistics"""
+        # Extract features for learning style analysis
+        with timer.stage('features'):
+            features = self._extract_learning_features(aggregates)
+        
+        # Place the user among the learner archetypes
+        with timer.stage('archetype'):
+            learner_archetype = self.archetypes.assign(features)
+        if self.record_features:
+            self._observed.append((user_id, features))
+        
+        # Analyze modality preferences
+        with timer.stage('modality'):
+            modality_preferences = self._analyze_modality_preferences(aggregates)
+        
+        # Analyze cognitive patterns
+        with timer.stage('cognitive'):
+            cognitive_patterns = self._analyze_cognitive_patterns(aggregates, sessions)
+        
+        # Analyze temporal patterns
+        with timer.stage('temporal'):
+            temporal_patterns = self._analyze_temporal_patterns(aggregates, sessions)
+        
+        # Generate learning style profile
+        with timer.stage('conditions'):
+            return {
+                'user_id': user_id,
+                'modality_preferences': modality_preferences,
+                'cognitive_patterns': cognitive_patterns,
+                'temporal_patterns': temporal_patterns,
+                'optimal_conditions': self._determine_optimal_conditions(
+                    modality_preferences, cognitive_patterns, temporal_patterns
+                ),
+                'confidence_score': self._calculate_confidence_score(features),
+                'learner_archetype': learner_archetype,
+                'last_updated': pd.Timestamp.now().isoformat()
+            }
+    
+    def _extract_learning_features(self, aggregates: InteractionAggregates) -> np.ndarray:
+        """Extract numerical features for ML analysis"""
+        features = []
+        
+        # Time-based features
+        features.append(aggregates.mean('response_time'))
+        features.append(aggregates.std('response_time'))
+        features.append(aggregates.mean('session_duration'))
+        
+        # Performance features
+        features.append(aggregates.mean('accuracy'))
+        features.append(aggregates.mean('engagement_score'))
+        features.append(aggregates.mean('completion_rate'))
+        
+        # Content type preferences
+        content_types = ['video', 'text', 'interactive', 'audio']
+        for content_type in content_types:
+            engagement = aggregates.content_type_mean('engagement_score', [content_type])
+            features.append(engagement if engagement is not None else 0.0)
+        
+        # Difficulty preferences
+        features.append(aggregates.mean('difficulty_level'))
+        features.append(aggregates.std('difficulty_level'))
+        
+        return np.array(features).reshape(1, -1)
+    
+    def _analyze_modality_preferences(self, aggregates: InteractionAggregates) -> Dict[str, float]:
+        """Analyze visual, auditory, kinesthetic preferences"""
+        modality_content_types = {
+            # Visual preference (based on visual content engagement)
+            'visual': ['video', 'image', 'diagram'],
+            # Auditory preference (based on audio content engagement)
+            'auditory': ['audio', 'podcast', 'lecture'],
+            # Kinesthetic preference (based on interactive content engagement)
+            'kinesthetic': ['interactive', 'simulation', 'game']
+        }
+        
+        modality_scores = {}
+        for modality, content_types in modality_content_types.items():
+            engagement = aggregates.content_type_mean('engagement_score', content_types)
+            modality_scores[modality] = engagement if engagement is not None else 0.5
+        
+        # Normalize scores
+        total = sum(modality_scores.values())
+        if total > 0:
+            modality_scores = {k: v/total for k, v in modality_scores.items()}
+        
+        return modality_scores
+    
+    def _decay_weights(self, df: pd.DataFrame, user_codes: np.ndarray, n_users: int) -> np.ndarray:
+        """Time-decay weight of each row, relative to its user's latest interaction"""
+        timestamps = epoch_seconds(df['timestamp'])
+        latest = np.full(n_users, -np.inf)
+        np.maximum.at(latest, user_codes, timestamps)
+        return decay_weights(timestamps, latest[user_codes], self.decay_half_life)
+    
+    def _analyze_sessions(self, df: pd.DataFrame, user_codes: np.ndarray, n_users: int,
+                          timer=NULL_TIMER) -> List[Dict[str, Any]]:
+        """Per-user session statistics, computed for all users at once"""
+        session_codes = df.groupby([user_codes, pd.factorize(df['session_id'])[0]], sort=False).ngroup().to_numpy()
+        timer.count('sessions', session_codes.max() + 1 if len(session_codes) else 0)
+        attention_spans = self._calculate_attention_span(df, user_codes, session_codes, n_users)
+        session_lengths = self._calculate_optimal_session_length(df, user_codes, n_users)
+        break_frequencies = self._calculate_break_frequency(df, user_codes, session_codes, n_users)
+        return [
+            {
+                'attention_span': attention_spans[i],
+                'optimal_session_length': session_lengths[i],
+                'break_frequency': break_frequencies[i]
+            }
+            for i in range(n_users)
+        ]
+    
+    def _analyze_cognitive_patterns(self, aggregates: InteractionAggregates, sessions: Dict[str, Any]) -> Dict[str, Any]:
+        """Analyze cognitive processing patterns"""
+        return {
+            'processing_speed': self._calculate_processing_speed(aggregates),
+            'attention_span': sessions['attention_span'],
+            'working_memory': self._estimate_working_memory(aggregates),
+            'cognitive_load_tolerance': self._estimate_cognitive_load_tolerance(aggregates),
+            'learning_persistence': self._calculate_persistence(aggregates)
+        }
+    
+    def _analyze_temporal_patterns(self, aggregates: InteractionAggregates, sessions: Dict[str, Any]) -> Dict[str, Any]:
+        """Analyze when and how long user learns best"""
+        # Find optimal learning hours
+        hours, hourly_performance = aggregates.hourly_means(['engagement_score', 'accuracy', 'completion_rate'])
+        
+        # Calculate composite performance score
+        composite_score = (
+            hourly_performance['engagement_score'] * 0.4 +
+            hourly_performance['accuracy'] * 0.4 +
+            hourly_performance['completion_rate'] * 0.2
+        )
+        
+        # Highest composite first, earlier hours winning ties
+        optimal_hours = hours[np.argsort(-composite_score, kind='stable')[:3]].tolist()
+        
+        return {
+            'optimal_hours': optimal_hours,
+            'peak_performance_hour': optimal_hours[0] if optimal_hours else 10,
+            'optimal_session_length': sessions['optimal_session_length'],
+            'break_frequency': sessions['break_frequency']
+        }
+    
+    def _calculate_processing_speed(self, aggregates: InteractionAggregates) -> float:
+        """Calculate relative processing speed"""
+        avg_response_time = aggregates.mean('response_time')
+        # Normalize to 0-1 scale (lower time = higher speed)
+        return max(0, min(1, 1 - (avg_response_time - 1000) / 10000))
+    
+    def _calculate_attention_span(self, df: pd.DataFrame, user_codes: np.ndarray, session_codes: np.ndarray, n_users: int) -> List[float]:
+        """Estimate attention span per user based on engagement patterns"""
+        # First row of every session, found by letting earlier rows overwrite later ones
+        first_rows = np.empty(session_codes.max() + 1, dtype=np.intp)
+        first_rows[session_codes[::-1]] = np.arange(len(session_codes))[::-1]
+        session_users = user_codes[first_rows]
+        session_lengths = df['session_duration'].to_numpy(dtype=np.float64)[first_rows]
+        mean_lengths = (np.bincount(session_users, weights=session_lengths, minlength=n_users)
+                        / np.bincount(session_users, minlength=n_users))
+        return [min(mean_length / 3600, 1.0) for mean_length in mean_lengths]  # Normalize to hours, cap at 1
+    
+    def _calculate_optimal_session_length(self, df: pd.DataFrame, user_codes: np.ndarray, n_users: int) -> np.ndarray:
+        """Upper-quartile session duration per user"""
+        return df['session_duration'].groupby(user_codes).quantile(0.75).reindex(range(n_users)).to_numpy()
+    
+    def _estimate_working_memory(self, aggregates: InteractionAggregates) -> float:
+        """Estimate working memory capacity"""
+        # Based on performance with complex, multi-step problems
+        accuracy = aggregates.flag_mean('complex', 'accuracy')
+        return accuracy if accuracy is not None else 0.5
+    
+    def _estimate_cognitive_load_tolerance(self, aggregates: InteractionAggregates) -> float:
+        """Estimate tolerance for cognitive load"""
+        engagement = aggregates.flag_mean('high_load', 'engagement_score')
+        return engagement if engagement is not None else 0.5
+    
+    def _calculate_persistence(self, aggregates: InteractionAggregates) -> float:
+        """Calculate learning persistence"""
+        # Based on completion rates for difficult content
+        completion = aggregates.flag_mean('difficult', 'completion_rate')
+        return completion if completion is not None else 0.5
+    
+    def _calculate_break_frequency(self, df: pd.DataFrame, user_codes: np.ndarray, session_codes: np.ndarray, n_users: int) -> List[int]:
+        """Calculate optimal break frequency in minutes per user"""
+        # Analyze engagement drop patterns, all sessions at once
+        timestamps = epoch_seconds(df['timestamp'])
+        order = np.lexsort((timestamps, session_codes))
+        sessions = session_codes[order]
+        timestamps = timestamps[order]
+        engagement = df['engagement_score'].to_numpy(dtype=np.float64)[order]
+        
+        session_starts = np.ones(len(sessions), dtype=bool)
+        session_starts[1:] = sessions[1:] != sessions[:-1]
+        start_positions = np.flatnonzero(session_starts)
+        session_lengths = np.diff(np.append(start_positions, len(sessions)))
+        row_session = np.cumsum(session_starts) - 1
+        
+        # Find where engagement drops significantly (20% drop) within sessions of more than 5 rows
+        drops = np.zeros(len(sessions), dtype=bool)
+        drops[1:] = engagement[1:] < engagement[:-1] * 0.8
+        drops &= ~session_starts & (session_lengths[row_session] > 5)
+        
+        time_to_drop = timestamps[drops] - timestamps[start_positions[row_session[drops]]]
+        drop_users = user_codes[order][drops]
+        drop_minutes = np.bincount(drop_users, weights=time_to_drop / 60, minlength=n_users)
+        drop_counts = np.bincount(drop_users, minlength=n_users)
+        return [int(drop_minutes[i] / drop_counts[i]) if drop_counts[i] else 25 for i in range(n_users)]
+    
+    def _determine_optimal_conditions(self, modality_prefs: Dict, cognitive_patterns: Dict, temporal_patterns: Dict) -> Dict[str, Any]:
+        """Determine optimal learning conditions"""
+        return {
+            'preferred_content_mix': {
+                'visual': modality_prefs['visual'],
+                'auditory': modality_prefs['auditory'],
+                'kinesthetic': modality_prefs['kinesthetic']
+            },
+            'optimal_difficulty_progression': self._calculate_difficulty_progression(cognitive_patterns),
+            'recommended_session_structure': {
+                'duration': temporal_patterns['optimal_session_length'],
+                'break_frequency': temporal_patterns['break_frequency'],
+                'best_times': temporal_patterns['optimal_hours']
+            },
+            'cognitive_load_management': {
+                'max_load': cognitive_patterns['cognitive_load_tolerance'],
+                'ramp_up_rate': 0.1 if cognitive_patterns['processing_speed'] < 0.5 else 0.2
+            }
+        }
+    
+    def _calculate_difficulty_progression(self, cognitive_patterns: Dict) -> Dict[str, float]:
+        """Calculate optimal difficulty progression"""
+        base_difficulty = 0.3
+        
+        # Adjust based on cognitive abilities
+        if cognitive_patterns['working_memory'] > 0.7:
+            base_difficulty += 0.2
+        if cognitive_patterns['processing_speed'] > 0.7:
+            base_difficulty += 0.1
+        if cognitive_patterns['learning_persistence'] > 0.8:
+            base_difficulty += 0.1
+            
+        return {
+            'starting_difficulty': max(0.1, min(0.8, base_difficulty)),
+            'progression_rate': 0.05 + (cognitive_patterns['learning_persistence'] * 0.1),
+            'max_difficulty': 0.6 + (cognitive_patterns['cognitive_load_tolerance'] * 0.4)
+        }
+    
+    def _calculate_confidence_score(self, features: np.ndarray) -> float:
+        """Calculate confidence in the learning style analysis"""
+        # Based on amount and quality of data
+        # This is a simplified version - in practice, would be more sophisticated
+        return min(1.0, len(features[0]) / 20.0)
+    
+    def _default_learning_style(self) -> Dict[str, Any]:
+        """Return default learning style for new users"""
+        return {
+            'modality_preferences': {
+                'visual': 0.4,
+                'auditory': 0.3,
+                'kinesthetic': 0.3
+            },
+            'cognitive_patterns': {
+                'processing_speed': 0.5,
+                'attention_span': 0.5,
+                'working_memory': 0.5,
+                'cognitive_load_tolerance': 0.5,
+                'learning_persistence': 0.5
+            },
+            'temporal_patterns': {
+                'optimal_hours': [9, 10, 14],
+                'peak_performance_hour': 10,
+                'optimal_session_length': 1800,  # 30 minutes
+                'break_frequency': 25
+            },
+            'optimal_conditions': {
+                'preferred_content_mix': {'visual': 0.4, 'auditory': 0.3, 'kinesthetic': 0.3},
+                'optimal_difficulty_progression': {
+                    'starting_difficulty': 0.3,
+                    'progression_rate': 0.1,
+                    'max_difficulty': 0.8
+                }
+            },
+            'confidence_score': 0.1,
+            'learner_archetype': None,
+            'last_updated': pd.Timestamp.now().isoformat()
+        }
+
+# Entry points for AnalysisExecutor. Inline they are handed the serving analyzer; in a worker
+# process they get None and run on that process's own analyzer.
+_worker_analyzer = None
+
+def _get_worker_analyzer() -> LearningStyleAnalyzer:
+    global _worker_analyzer
+    if _worker_analyzer is None:
+        _worker_analyzer = LearningStyleAnalyzer()
+    # Assign archetypes with the parent's latest checkpoint
+    _worker_analyzer.archetypes.refresh()
+    return _worker_analyzer
+
+@contextmanager
+def _recording(analyzer: Optional[LearningStyleAnalyzer]) -> Iterator[LearningStyleAnalyzer]:
+    """The analyzer to run on, recording the feature vectors it extracts until the block ends"""
+    worker = analyzer if analyzer is not None else _get_worker_analyzer()
+    worker.record_features = True
+    try:
+        yield worker
+    finally:
+        worker.record_features = False
+        worker._observed = []
+
+# Each also returns the stage timer it was given, so timings recorded in a worker reach the parent,
+# and the feature vectors it extracted, for the parent's archetypes and similar-learner index
+def _build_learning_style(analyzer: Optional[LearningStyleAnalyzer], user_id: str, interaction_data: Interactions,
+                          timer) -> Tuple[Dict[str, Any], Any, ObservedFeatures]:
+    with _recording(analyzer) as worker:
+        return worker.build_learning_style(user_id, interaction_data, timer), timer, worker.take_observed_features()
+
+def _build_learning_styles(analyzer: Optional[LearningStyleAnalyzer], interaction_data: Interactions, chunk_size: int,
+                           timer) -> Tuple[List[Dict[str, Dict[str, Any]]], Any, ObservedFeatures]:
+    with _recording(analyzer) as worker:
+        return list(worker.build_learning_styles(interaction_data, chunk_size, timer)), timer, worker.take_observed_features()
+
+def _build_learning_styles_from_file(analyzer: Optional[LearningStyleAnalyzer], path: str, chunk_size: int, batch_rows: int,
+                                     timer) -> Tuple[List[Dict[str, Dict[str, Any]]], Any, ObservedFeatures]:
+    with _recording(analyzer) as worker:
+        return (list(worker.build_learning_styles_from_file(path, chunk_size, batch_rows, timer)), timer,
+                worker.take_observed_features())
+
+def _update_learning_style(analyzer: Optional[LearningStyleAnalyzer], user_id: str, cached_state: Optional[bytes],
+                           interaction_data: Interactions, timer) -> Tuple[str, Dict[str, Any], Any, ObservedFeatures]:
+    with _recording(analyzer) as worker:
+        state, learning_style = worker.update_learning_state(user_id, cached_state, interaction_data, timer)
+        return state, learning_style, timer, worker.take_observed_features()
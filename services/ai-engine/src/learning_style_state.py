@@ -0,0 +1,195 @@
+import numpy as np
+import pandas as pd
+from typing import Dict, Any, List, Optional
+
+from interaction_aggregates import InteractionAggregates, decay_weights, epoch_seconds
+from quantile_sketch import QuantileSketch
+
+# Sessions kept open for break detection; older ones are treated as finished
+MAX_OPEN_SESSIONS = 32
+
+
+class LearningStyleState:
+    """
+    Running sufficient statistics behind one user's learning style.
+
+    Updating with a batch of new interactions costs O(batch) and the state
+    stays the same size however long the history grows. Interactions are
+    expected in time order within a session; events for a session that has
+    already dropped out of the open-session window start a new session.
+
+    With a half_life (seconds), the aggregates are exponentially decayed
+    accumulators: each interaction weighs 2^(-age / half_life), age being
+    measured back from the latest interaction seen, and the whole state is
+    rescaled whenever that reference moves forward.
+    """
+    def __init__(self, half_life: Optional[float] = None):
+        self.half_life = half_life
+        self.decay_reference: Optional[float] = None
+        self.aggregates = InteractionAggregates.empty()
+        self.session_durations = QuantileSketch()
+        self.session_count = 0
+        self.first_duration_sum = 0.0
+        self.drop_minutes = 0.0
+        self.drop_count = 0
+        # session_id -> start, last_timestamp, last_engagement, length, pending_minutes, pending_drops
+        self.open_sessions: Dict[str, Dict[str, Any]] = {}
+
+    def update(self, df: pd.DataFrame) -> None:
+        """Fold a batch of new interactions into the state"""
+        LearningStyleState.update_many([self], df, np.zeros(len(df), dtype=np.intp))
+
+    @staticmethod
+    def update_many(states: List['LearningStyleState'], df: pd.DataFrame, user_codes: np.ndarray) -> None:
+        """
+        Fold a batch of several users' interactions into their states at once,
+        with user_codes mapping each row to its position in states
+        """
+        if df.empty:
+            return
+        timestamps = epoch_seconds(df['timestamp'])
+        weights = LearningStyleState._decay(states, timestamps, user_codes)
+        batch = InteractionAggregates.from_frame_by_group(df, user_codes, len(states), weights)
+        for state, aggregates in zip(states, batch):
+            state.aggregates = state.aggregates.merge(aggregates)
+
+        order = np.argsort(user_codes, kind='stable')
+        bounds = np.searchsorted(user_codes[order], np.arange(len(states) + 1))
+        durations = df['session_duration'].to_numpy()[order]
+        for state, row_start, row_end in zip(states, bounds[:-1], bounds[1:]):
+            state.session_durations.add(durations[row_start:row_end])
+        LearningStyleState._update_sessions(states, df, timestamps, user_codes)
+
+    def session_statistics(self) -> Dict[str, Any]:
+        """Attention span, optimal session length and break frequency, as in the full analysis"""
+        return {
+            'attention_span': min(self.first_duration_sum / self.session_count / 3600, 1.0) if self.session_count else np.nan,
+            'optimal_session_length': self.session_durations.quantile(0.75),
+            'break_frequency': int(self.drop_minutes / self.drop_count) if self.drop_count else 25
+        }
+
+    @staticmethod
+    def _decay(states: List['LearningStyleState'], timestamps: np.ndarray, user_codes: np.ndarray) -> Optional[np.ndarray]:
+        """Age each state up to its user's latest interaction, returning the batch's row weights"""
+        if all(state.half_life is None for state in states):
+            return None
+        latest = np.full(len(states), -np.inf)
+        np.maximum.at(latest, user_codes, timestamps)
+        references = np.zeros(len(states))
+        half_lives = np.full(len(states), np.inf)
+        for i, state in enumerate(states):
+            if state.half_life is None or not np.isfinite(latest[i]):
+                continue
+            reference = float(latest[i])
+            if state.decay_reference is not None:
+                if reference > state.decay_reference:
+                    state.aggregates = state.aggregates.decayed(
+                        np.exp2(-(reference - state.decay_reference) / state.half_life)
+                    )
+                else:
+                    reference = state.decay_reference
+            state.decay_reference = references[i] = reference
+            half_lives[i] = state.half_life
+        # States without a half-life weigh every row 1
+        return decay_weights(timestamps, np.where(np.isinf(half_lives[user_codes]), timestamps, references[user_codes]),
+                             half_lives[user_codes])
+
+    @staticmethod
+    def _update_sessions(states: List['LearningStyleState'], df: pd.DataFrame, timestamps: np.ndarray,
+                         user_codes: np.ndarray) -> None:
+        session_keys = df['session_id'].astype(str).to_numpy()
+        session_codes = pd.Series(session_keys).groupby([user_codes, session_keys], sort=False).ngroup().to_numpy()
+        order = np.lexsort((timestamps, session_codes))
+        sessions = session_codes[order]
+        timestamps = timestamps[order]
+        engagement = df['engagement_score'].to_numpy(dtype=np.float64)[order]
+        durations = df['session_duration'].to_numpy(dtype=np.float64)[order]
+
+        session_starts = np.ones(len(sessions), dtype=bool)
+        session_starts[1:] = sessions[1:] != sessions[:-1]
+        start_positions = np.flatnonzero(session_starts)
+        batch_lengths = np.diff(np.append(start_positions, len(sessions)))
+        session_ids = session_keys[order][start_positions]
+        session_states = [states[code] for code in user_codes[order][start_positions]]
+
+        # Continue sessions still open from earlier batches
+        open_states = [state.open_sessions.get(session_id) for state, session_id in zip(session_states, session_ids)]
+        session_start_times = np.array([
+            state['start'] if state else timestamps[start]
+            for state, start in zip(open_states, start_positions)
+        ])
+        previous_engagement = np.empty(len(sessions))
+        previous_engagement[1:] = engagement[:-1]
+        previous_engagement[start_positions] = [
+            state['last_engagement'] if state else np.nan for state in open_states
+        ]
+
+        # Find where engagement drops significantly (20% drop)
+        drops = engagement < previous_engagement * 0.8
+        row_session = np.cumsum(session_starts) - 1
+        minutes = (timestamps - session_start_times[row_session]) / 60
+        batch_drop_minutes = np.bincount(row_session, weights=np.where(drops, minutes, 0.0), minlength=len(session_ids))
+        batch_drop_counts = np.bincount(row_session, weights=drops, minlength=len(session_ids))
+
+        for s, session_id in enumerate(session_ids):
+            owner = session_states[s]
+            state = open_states[s]
+            if state is None:
+                owner.session_count += 1
+                owner.first_duration_sum += durations[start_positions[s]]
+                state = {'start': session_start_times[s], 'length': 0, 'pending_minutes': 0.0, 'pending_drops': 0}
+            last = start_positions[s] + batch_lengths[s] - 1
+            state['last_timestamp'] = timestamps[last]
+            state['last_engagement'] = engagement[last]
+            state['length'] += int(batch_lengths[s])
+            state['pending_minutes'] += batch_drop_minutes[s]
+            state['pending_drops'] += int(batch_drop_counts[s])
+            # Drops only count once the session has more than 5 interactions
+            if state['length'] > 5:
+                owner.drop_minutes += state['pending_minutes']
+                owner.drop_count += state['pending_drops']
+                state['pending_minutes'] = 0.0
+                state['pending_drops'] = 0
+            owner.open_sessions.pop(session_id, None)
+            owner.open_sessions[session_id] = state
+
+        for owner in states:
+            if len(owner.open_sessions) > MAX_OPEN_SESSIONS:
+                recent = sorted(owner.open_sessions.items(), key=lambda item: item[1]['last_timestamp'])
+                owner.open_sessions = dict(recent[-MAX_OPEN_SESSIONS:])
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'half_life': self.half_life,
+            'decay_reference': self.decay_reference,
+            'aggregates': self.aggregates.to_dict(),
+            'session_durations': self.session_durations.to_dict(),
+            'session_count': self.session_count,
+            'first_duration_sum': self.first_duration_sum,
+            'drop_minutes': self.drop_minutes,
+            'drop_count': self.drop_count,
+            'open_sessions': {
+                session_id: {key: float(value) for key, value in state.items()}
+                for session_id, state in self.open_sessions.items()
+            }
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'LearningStyleState':
+        state = cls(half_life=data.get('half_life'))
+        state.decay_reference = data.get('decay_reference')
+        state.aggregates = InteractionAggregates.from_dict(data['aggregates'])
+        state.session_durations = QuantileSketch.from_dict(data['session_durations'])
+        state.session_count = data['session_count']
+        state.first_duration_sum = data['first_duration_sum']
+        state.drop_minutes = data['drop_minutes']
+        state.drop_count = data['drop_count']
+        state.open_sessions = {
+            session_id: {
+                **session,
+                'length': int(session['length']),
+                'pending_drops': int(session['pending_drops'])
+            }
+            for session_id, session in data['open_sessions'].items()
+        }
+        return state
@@ -0,0 +1,162 @@
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+import joblib
+import numpy as np
+
+ARTIFACT_SUFFIX = '.joblib'
+
+
+class ModelArtifact:
+    """One loaded version of a named model artifact, with what loading it cost"""
+    def __init__(self, name: str, version: str, model: Any, load_seconds: float,
+                 resident_bytes: Optional[int], mapped_bytes: int):
+        self.name = name
+        self.version = version
+        self.model = model
+        self.load_seconds = load_seconds
+        self.resident_bytes = resident_bytes
+        self.mapped_bytes = mapped_bytes
+        self.loaded_at = time.time()
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'version': self.version,
+            'load_seconds': self.load_seconds,
+            'resident_bytes': self.resident_bytes,
+            'mapped_bytes': self.mapped_bytes,
+            'loaded_at': self.loaded_at
+        }
+
+
+class ModelRegistry:
+    """
+    Versioned model artifacts under root, one directory per artifact name
+    (scaler, clustering, regressor, ...), one file per version:
+
+        <root>/<name>/<version>.joblib
+
+    Versions sort lexicographically; the greatest is current. Artifacts are
+    written uncompressed and loaded with their arrays memory-mapped, so every
+    process serving the same version shares the page cache instead of holding
+    its own copy. Mappings are copy-on-write, so a model can still be updated
+    in place without touching the file.
+
+    refresh() picks up newly published versions and swaps them in with a
+    single assignment; callers already holding the previous model keep using it.
+    """
+    def __init__(self, root: str, mmap_mode: str = 'c', keep_versions: int = 3):
+        self.root = root
+        self.mmap_mode = mmap_mode
+        self.keep_versions = keep_versions
+        self._artifacts: Dict[str, ModelArtifact] = {}
+        self._load_lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> 'ModelRegistry':
+        """Configure from MODEL_PATH"""
+        return cls(os.environ.get('MODEL_PATH', 'models'))
+
+    def get(self, name: str) -> Optional[Any]:
+        artifact = self._artifacts.get(name)
+        return artifact.model if artifact is not None else None
+
+    def artifact(self, name: str) -> Optional[ModelArtifact]:
+        return self._artifacts.get(name)
+
+    def publish(self, name: str, model: Any) -> str:
+        """Write a new version of an artifact and make it current for the next refresh"""
+        directory = os.path.join(self.root, name)
+        os.makedirs(directory, exist_ok=True)
+        version = f"{time.time_ns():020d}"
+        path = os.path.join(directory, version + ARTIFACT_SUFFIX)
+        # Write aside and rename, so readers never see a partial file
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        joblib.dump(model, temp_path, compress=0)
+        os.replace(temp_path, path)
+        self._prune(name)
+        return version
+
+    def refresh(self, name: Optional[str] = None) -> List[str]:
+        """Load any artifact whose current version on disk is newer than the loaded one; returns their names"""
+        if name is not None:
+            names = [name]
+        else:
+            try:
+                names = [entry.name for entry in os.scandir(self.root) if entry.is_dir()]
+            except FileNotFoundError:
+                return []
+
+        reloaded = []
+        for artifact_name in names:
+            version = self._latest_version(artifact_name)
+            loaded = self._artifacts.get(artifact_name)
+            if version is None or (loaded is not None and loaded.version >= version):
+                continue
+            with self._load_lock:
+                loaded = self._artifacts.get(artifact_name)
+                if loaded is not None and loaded.version >= version:
+                    continue
+                self._artifacts[artifact_name] = self._load(artifact_name, version)
+            reloaded.append(artifact_name)
+        return reloaded
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        return {name: artifact.to_dict() for name, artifact in self._artifacts.items()}
+
+    def _versions(self, name: str) -> List[str]:
+        try:
+            files = os.listdir(os.path.join(self.root, name))
+        except FileNotFoundError:
+            return []
+        return sorted(f[:-len(ARTIFACT_SUFFIX)] for f in files if f.endswith(ARTIFACT_SUFFIX))
+
+    def _latest_version(self, name: str) -> Optional[str]:
+        versions = self._versions(name)
+        return versions[-1] if versions else None
+
+    def _load(self, name: str, version: str) -> ModelArtifact:
+        path = os.path.join(self.root, name, version + ARTIFACT_SUFFIX)
+        resident_before = _resident_bytes()
+        started = time.perf_counter()
+        model = joblib.load(path, mmap_mode=self.mmap_mode)
+        load_seconds = time.perf_counter() - started
+        resident_after = _resident_bytes()
+        resident = resident_after - resident_before if resident_before is not None and resident_after is not None else None
+        return ModelArtifact(name, version, model, load_seconds, resident, _mapped_bytes(model))
+
+    def _prune(self, name: str) -> None:
+        # Processes still mapping a removed version keep their pages until they swap
+        for version in self._versions(name)[:-self.keep_versions]:
+            try:
+                os.remove(os.path.join(self.root, name, version + ARTIFACT_SUFFIX))
+            except FileNotFoundError:
+                pass
+
+
+def _resident_bytes() -> Optional[int]:
+    """Resident set size of this process, where /proc is available"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def _mapped_bytes(model: Any, _seen: Optional[set] = None) -> int:
+    """Bytes of memory-mapped arrays reachable from a loaded model's attributes"""
+    seen = _seen if _seen is not None else set()
+    if id(model) in seen:
+        return 0
+    seen.add(id(model))
+    if isinstance(model, np.memmap):
+        return model.nbytes
+    if isinstance(model, dict):
+        return sum(_mapped_bytes(value, seen) for value in model.values())
+    if isinstance(model, (list, tuple)):
+        return sum(_mapped_bytes(value, seen) for value in model)
+    if hasattr(model, '__dict__'):
+        return sum(_mapped_bytes(value, seen) for value in vars(model).values())
+    return 0
@@ -0,0 +1,114 @@
+import asyncio
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional, Set, Tuple
+
+# Loader result: the value (None if absent) and its remaining TTL in seconds (None if it never expires)
+Loader = Callable[[], Awaitable[Tuple[Optional[Any], Optional[float]]]]
+
+
+class ProfileCache:
+    """
+    Size-bounded in-process LRU tier in front of Redis.
+
+    Entries expire locally when their Redis copy does. For fresh_ttl
+    seconds after loading they are served as-is; after that they are still
+    served, but a background reload is started (stale-while-revalidate).
+    Concurrent loads of the same key share one in-flight fetch.
+    """
+    def __init__(self, max_entries: int = 10000, fresh_ttl: float = 30.0):
+        self.max_entries = max_entries
+        self.fresh_ttl = fresh_ttl
+        # key -> (value, fresh_until, expires_at, stored_at)
+        self._entries: 'OrderedDict[str, Tuple[Any, float, float, float]]' = OrderedDict()
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._revalidations: Set[asyncio.Task] = set()
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @classmethod
+    def from_env(cls) -> 'ProfileCache':
+        """Configure from PROFILE_CACHE_SIZE and PROFILE_CACHE_FRESH_SECONDS"""
+        return cls(
+            max_entries=int(os.environ.get('PROFILE_CACHE_SIZE', 10000)),
+            fresh_ttl=float(os.environ.get('PROFILE_CACHE_FRESH_SECONDS', 30))
+        )
+
+    async def get(self, key: str, loader: Loader) -> Optional[Any]:
+        now = time.monotonic()
+        entry = self._entries.get(key)
+        if entry is not None:
+            value, fresh_until, expires_at, _ = entry
+            if now < fresh_until:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return value
+            if now < expires_at:
+                self._entries.move_to_end(key)
+                self.stale_hits += 1
+                if key not in self._inflight:
+                    task = asyncio.ensure_future(self._revalidate(key, loader))
+                    self._revalidations.add(task)
+                    task.add_done_callback(self._revalidations.discard)
+                return value
+            del self._entries[key]
+
+        self.misses += 1
+        if key in self._inflight:
+            return await asyncio.shield(self._inflight[key])
+        return await self._load(key, loader)
+
+    def put(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        """Store a value just written to Redis with the given TTL"""
+        now = time.monotonic()
+        expires_at = now + ttl if ttl is not None else float('inf')
+        self._entries[key] = (value, min(now + self.fresh_ttl, expires_at), expires_at, now)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def invalidate(self, key: str) -> None:
+        self._entries.pop(key, None)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            'entries': len(self._entries),
+            'hits': self.hits,
+            'stale_hits': self.stale_hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'inflight': len(self._inflight)
+        }
+
+    async def _revalidate(self, key: str, loader: Loader) -> None:
+        try:
+            await self._load(key, loader)
+        except Exception:
+            pass  # Keep serving the stale entry until it expires
+
+    async def _load(self, key: str, loader: Loader) -> Optional[Any]:
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        started = time.monotonic()
+        try:
+            value, ttl = await loader()
+            entry = self._entries.get(key)
+            # A put() that landed while loading is newer than what was read
+            if entry is None or entry[3] < started:
+                if value is None:
+                    self.invalidate(key)
+                else:
+                    self.put(key, value, ttl)
+            future.set_result(value)
+            return value
+        except Exception as e:
+            future.set_exception(e)
+            # Waiters see the exception; mark it retrieved so it is not reported twice
+            future.exception()
+            raise
+        finally:
+            del self._inflight[key]
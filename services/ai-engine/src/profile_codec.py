@@ -0,0 +1,133 @@
+import json
+import struct
+from typing import Any, Dict
+
+import numpy as np
+
+PROFILE_CODEC_VERSION = 2
+
+# Layout of version 2, after the header, user_id and ISO last_updated text:
+#   22 float64 scalars, in profile order (integer fields are stored exactly)
+#   optimal_hours and best_times, each as a count byte plus one byte per hour
+#   learner_archetype as an int16, -1 when unassigned
+# Version 1 is the same without learner_archetype.
+_HEADER = struct.Struct('<BHB')  # version, user_id length, last_updated length
+_SCALARS = struct.Struct('<22d')
+_ARCHETYPE = struct.Struct('<h')
+
+
+def encode_profile(profile: Dict[str, Any]) -> bytes:
+    """
+    Encode a learning-style profile for Redis.
+
+    Profiles with the full analysis layout get the compact binary form;
+    anything else (e.g. the default profile) falls back to JSON with NumPy
+    scalars converted.
+    """
+    try:
+        modality = profile['modality_preferences']
+        cognitive = profile['cognitive_patterns']
+        temporal = profile['temporal_patterns']
+        conditions = profile['optimal_conditions']
+        content_mix = conditions['preferred_content_mix']
+        progression = conditions['optimal_difficulty_progression']
+        structure = conditions['recommended_session_structure']
+        load_management = conditions['cognitive_load_management']
+
+        scalars = _SCALARS.pack(
+            modality['visual'], modality['auditory'], modality['kinesthetic'],
+            cognitive['processing_speed'], cognitive['attention_span'], cognitive['working_memory'],
+            cognitive['cognitive_load_tolerance'], cognitive['learning_persistence'],
+            int(temporal['peak_performance_hour']), temporal['optimal_session_length'],
+            int(temporal['break_frequency']),
+            content_mix['visual'], content_mix['auditory'], content_mix['kinesthetic'],
+            progression['starting_difficulty'], progression['progression_rate'], progression['max_difficulty'],
+            structure['duration'], int(structure['break_frequency']),
+            load_management['max_load'], load_management['ramp_up_rate'],
+            profile['confidence_score']
+        )
+        optimal_hours = temporal['optimal_hours']
+        best_times = structure['best_times']
+        hour_lists = bytes([len(optimal_hours), *optimal_hours, len(best_times), *best_times])
+        learner_archetype = profile['learner_archetype']
+        archetype = _ARCHETYPE.pack(-1 if learner_archetype is None else learner_archetype)
+        user_id = profile['user_id'].encode('utf-8')
+        last_updated = profile['last_updated'].encode('ascii')
+        header = _HEADER.pack(PROFILE_CODEC_VERSION, len(user_id), len(last_updated))
+    except (KeyError, TypeError, ValueError, AttributeError, struct.error):
+        return json.dumps(profile, default=_json_default).encode('utf-8')
+
+    return header + user_id + last_updated + scalars + hour_lists + archetype
+
+
+def decode_profile(data: bytes) -> Dict[str, Any]:
+    """Decode a cached profile written by encode_profile, or a legacy JSON entry"""
+    if data[:1] == b'{':
+        return json.loads(data)
+
+    version, user_id_length, last_updated_length = _HEADER.unpack_from(data)
+    if version not in (1, PROFILE_CODEC_VERSION):
+        raise ValueError(f"Unknown profile encoding version {version}")
+
+    offset = _HEADER.size
+    user_id = data[offset:offset + user_id_length].decode('utf-8')
+    offset += user_id_length
+    last_updated = data[offset:offset + last_updated_length].decode('ascii')
+    offset += last_updated_length
+    (visual, auditory, kinesthetic,
+     processing_speed, attention_span, working_memory, cognitive_load_tolerance, learning_persistence,
+     peak_performance_hour, optimal_session_length, break_frequency,
+     mix_visual, mix_auditory, mix_kinesthetic,
+     starting_difficulty, progression_rate, max_difficulty,
+     duration, structure_break_frequency,
+     max_load, ramp_up_rate,
+     confidence_score) = _SCALARS.unpack_from(data, offset)
+    offset += _SCALARS.size
+    optimal_hours = list(data[offset + 1:offset + 1 + data[offset]])
+    offset += 1 + data[offset]
+    best_times = list(data[offset + 1:offset + 1 + data[offset]])
+    offset += 1 + data[offset]
+    learner_archetype = _ARCHETYPE.unpack_from(data, offset)[0] if version >= 2 else -1
+
+    return {
+        'user_id': user_id,
+        'modality_preferences': {'visual': visual, 'auditory': auditory, 'kinesthetic': kinesthetic},
+        'cognitive_patterns': {
+            'processing_speed': processing_speed,
+            'attention_span': attention_span,
+            'working_memory': working_memory,
+            'cognitive_load_tolerance': cognitive_load_tolerance,
+            'learning_persistence': learning_persistence
+        },
+        'temporal_patterns': {
+            'optimal_hours': optimal_hours,
+            'peak_performance_hour': int(peak_performance_hour),
+            'optimal_session_length': optimal_session_length,
+            'break_frequency': int(break_frequency)
+        },
+        'optimal_conditions': {
+            'preferred_content_mix': {'visual': mix_visual, 'auditory': mix_auditory, 'kinesthetic': mix_kinesthetic},
+            'optimal_difficulty_progression': {
+                'starting_difficulty': starting_difficulty,
+                'progression_rate': progression_rate,
+                'max_difficulty': max_difficulty
+            },
+            'recommended_session_structure': {
+                'duration': duration,
+                'break_frequency': int(structure_break_frequency),
+                'best_times': best_times
+            },
+            'cognitive_load_management': {'max_load': max_load, 'ramp_up_rate': ramp_up_rate}
+        },
+        'confidence_score': confidence_score,
+        'learner_archetype': None if learner_archetype < 0 else learner_archetype,
+        'last_updated': last_updated
+    }
+
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
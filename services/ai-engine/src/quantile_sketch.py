@@ -0,0 +1,72 @@
+import numpy as np
+from typing import Dict, Any
+
+
+class QuantileSketch:
+    """
+    Log-bucketed histogram with bounded relative error on quantiles.
+
+    Values are counted in buckets of width relative_accuracy around
+    powers of gamma, so sketches of separate batches merge by adding counts
+    and memory depends on the value range, not the number of values.
+    """
+    def __init__(self, relative_accuracy: float = 0.01):
+        self.relative_accuracy = relative_accuracy
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self.counts: Dict[int, int] = {}
+        self.zero_count = 0  # values <= 0
+
+    @property
+    def count(self) -> int:
+        return self.zero_count + sum(self.counts.values())
+
+    def add(self, values: np.ndarray) -> None:
+        values = np.asarray(values, dtype=np.float64)
+        positive = values[values > 0]
+        self.zero_count += len(values) - len(positive)
+        keys, counts = np.unique(np.ceil(np.log(positive) / np.log(self.gamma)).astype(np.int64), return_counts=True)
+        for key, count in zip(keys.tolist(), counts.tolist()):
+            self.counts[key] = self.counts.get(key, 0) + count
+
+    def merge(self, other: 'QuantileSketch') -> None:
+        self.zero_count += other.zero_count
+        for key, count in other.counts.items():
+            self.counts[key] = self.counts.get(key, 0) + count
+
+    def quantile(self, q: float) -> float:
+        """Approximate q-th quantile, NaN when empty"""
+        total = self.count
+        if total == 0:
+            return np.nan
+        # Interpolate between the values at the ranks either side, as pandas does
+        rank = q * (total - 1)
+        lower = int(np.floor(rank))
+        upper = min(lower + 1, total - 1)
+        low_value, high_value = self._value_at(lower), self._value_at(upper)
+        return low_value + (rank - lower) * (high_value - low_value)
+
+    def _value_at(self, rank: int) -> float:
+        """Representative value of the rank-th smallest value"""
+        if rank < self.zero_count:
+            return 0.0
+        seen = self.zero_count
+        for key in sorted(self.counts):
+            seen += self.counts[key]
+            if rank < seen:
+                # Midpoint of the bucket (gamma^(key-1), gamma^key] in relative terms
+                return 2 * self.gamma ** key / (self.gamma + 1)
+        return 2 * self.gamma ** max(self.counts) / (self.gamma + 1)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'relative_accuracy': self.relative_accuracy,
+            'zero_count': self.zero_count,
+            'counts': {str(key): count for key, count in self.counts.items()}
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'QuantileSketch':
+        sketch = cls(data['relative_accuracy'])
+        sketch.zero_count = data['zero_count']
+        sketch.counts = {int(key): count for key, count in data['counts'].items()}
+        return sketch
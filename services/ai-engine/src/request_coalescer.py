@@ -0,0 +1,85 @@
+import asyncio
+import hashlib
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Tuple
+
+
+class RequestCoalescer:
+    """
+    Collapses repeated requests with the same payload hash.
+
+    Concurrent requests for a key share one in-flight computation, and
+    results are memoised for ttl seconds (at most max_entries of them), so a
+    duplicate costs a hash and a dict lookup. Failures are not memoised.
+
+    The computation runs as a task of its own, which every requester awaits
+    shielded, so a requester that is cancelled (a client disconnecting)
+    leaves it running for the others, and its result is still memoised.
+    """
+    def __init__(self, max_entries: int = 1000, ttl: float = 10.0):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        # key -> (result, expires_at)
+        self._results: 'OrderedDict[str, Tuple[Any, float]]' = OrderedDict()
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self.hits = 0
+        self.coalesced = 0
+        self.misses = 0
+
+    @classmethod
+    def from_env(cls) -> 'RequestCoalescer':
+        """Configure from ANALYSIS_MEMO_SIZE and ANALYSIS_MEMO_SECONDS"""
+        return cls(
+            max_entries=int(os.environ.get('ANALYSIS_MEMO_SIZE', 1000)),
+            ttl=float(os.environ.get('ANALYSIS_MEMO_SECONDS', 10))
+        )
+
+    @staticmethod
+    def key(*parts: bytes) -> str:
+        """Hash of a request's identifying parts, e.g. endpoint, user id and raw body"""
+        digest = hashlib.blake2b(digest_size=16)
+        for part in parts:
+            # Length-prefix each part so that different splits never collide
+            digest.update(len(part).to_bytes(8, 'little'))
+            digest.update(part)
+        return digest.hexdigest()
+
+    async def run(self, key: str, compute: Callable[[], Awaitable[Any]]) -> Any:
+        entry = self._results.get(key)
+        if entry is not None:
+            if entry[1] > time.monotonic():
+                self.hits += 1
+                return entry[0]
+            del self._results[key]
+        task = self._inflight.get(key)
+        if task is not None:
+            self.coalesced += 1
+        else:
+            self.misses += 1
+            task = asyncio.get_running_loop().create_task(self._compute(key, compute))
+            # Waiters see any exception; mark it retrieved in case none is left to
+            task.add_done_callback(lambda task: task.cancelled() or task.exception())
+            self._inflight[key] = task
+        return await asyncio.shield(task)
+
+    async def _compute(self, key: str, compute: Callable[[], Awaitable[Any]]) -> Any:
+        try:
+            result = await compute()
+            if self.ttl > 0 and self.max_entries > 0:
+                self._results[key] = (result, time.monotonic() + self.ttl)
+                while len(self._results) > self.max_entries:
+                    self._results.popitem(last=False)
+            return result
+        finally:
+            del self._inflight[key]
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            'entries': len(self._results),
+            'hits': self.hits,
+            'coalesced': self.coalesced,
+            'misses': self.misses,
+            'inflight': len(self._inflight)
+        }
@@ -0,0 +1,231 @@
+import asyncio
+import os
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, Optional, Tuple
+
+import aioredis
+
+
+class RedisUnavailable(Exception):
+    """Raised when Redis failed or timed out, or the circuit breaker is not letting calls through"""
+    pass
+
+
+class PoolExhausted(RedisUnavailable):
+    """Raised when no pooled connection freed up within the pool timeout, which says nothing about Redis"""
+    pass
+
+
+# What BlockingConnectionPool.get_connection raises, as a ConnectionError, when its wait for a free connection times out
+POOL_WAIT_TIMEOUT_MESSAGE = 'No connection available.'
+
+
+class SaturationAwarePool(aioredis.BlockingConnectionPool):
+    """
+    BlockingConnectionPool that raises PoolExhausted when the wait for a free
+    connection times out, which the client otherwise reports as the same
+    ConnectionError as a failure to connect to Redis
+    """
+    async def get_connection(self, *args, **kwargs):
+        try:
+            return await super().get_connection(*args, **kwargs)
+        except aioredis.ConnectionError as e:
+            if e.args == (POOL_WAIT_TIMEOUT_MESSAGE,):
+                raise PoolExhausted(f"No Redis connection freed up within {self.timeout}s") from e
+            raise
+
+
+class CircuitBreaker:
+    """
+    Stops calling Redis after failure_threshold consecutive failures.
+
+    While open, calls are rejected at once; after reset_timeout seconds a
+    single trial call is let through (half-open), which closes the breaker
+    on success and reopens it on failure.
+    """
+    CLOSED, OPEN, HALF_OPEN = 'closed', 'open', 'half_open'
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 10.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self.trial_in_flight = False
+        self.times_opened = 0
+
+    def allow(self) -> bool:
+        if self.state == self.CLOSED:
+            return True
+        if self.state == self.OPEN and time.monotonic() - self.opened_at >= self.reset_timeout:
+            self.state = self.HALF_OPEN
+        if self.state == self.HALF_OPEN and not self.trial_in_flight:
+            self.trial_in_flight = True
+            return True
+        return False
+
+    def record_success(self) -> None:
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+        self.trial_in_flight = False
+
+    def record_failure(self) -> None:
+        self.consecutive_failures += 1
+        self.trial_in_flight = False
+        if self.state == self.HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+            if self.state != self.OPEN:
+                self.times_opened += 1
+            self.state = self.OPEN
+            self.opened_at = time.monotonic()
+
+
+class ResilientRedis:
+    """
+    Pooled Redis client behind a circuit breaker, with a bounded in-process
+    fallback store for values that could not be written while Redis was down.
+
+    Calls go through guard(), which turns connection errors and timeouts
+    into RedisUnavailable and feeds the breaker. A call that found no free
+    connection in the pool raises PoolExhausted, a RedisUnavailable that is
+    counted as saturation and not fed to the breaker, since Redis itself may
+    be healthy. Callers decide what to serve instead: reads consult
+    recall(), writes that failed remember().
+    """
+    def __init__(self, url: str = 'redis://localhost', max_connections: int = 32, pool_timeout: float = 0.5,
+                 socket_timeout: float = 0.5, connect_timeout: float = 1.0, health_check_interval: float = 15.0,
+                 breaker: Optional[CircuitBreaker] = None, fallback_size: int = 10000):
+        self.url = url
+        self.max_connections = max_connections
+        self.pool_timeout = pool_timeout
+        self.socket_timeout = socket_timeout
+        self.connect_timeout = connect_timeout
+        self.health_check_interval = health_check_interval
+        self.breaker = breaker or CircuitBreaker()
+        self.fallback_size = fallback_size
+        self.client = None
+        # key -> (value, expires_at)
+        self._fallback: 'OrderedDict[str, Tuple[bytes, float]]' = OrderedDict()
+        self.failures = 0
+        self.pool_exhausted = 0
+        self.rejected = 0
+        self.fallback_hits = 0
+        self.fallback_misses = 0
+        self.fallback_writes = 0
+
+    @classmethod
+    def from_env(cls) -> 'ResilientRedis':
+        """
+        Configure from REDIS_URL, REDIS_MAX_CONNECTIONS, REDIS_POOL_TIMEOUT, REDIS_SOCKET_TIMEOUT,
+        REDIS_CONNECT_TIMEOUT, REDIS_HEALTH_CHECK_SECONDS, REDIS_BREAKER_FAILURES,
+        REDIS_BREAKER_RESET_SECONDS and REDIS_FALLBACK_SIZE
+        """
+        return cls(
+            url=os.environ.get('REDIS_URL', 'redis://localhost'),
+            max_connections=int(os.environ.get('REDIS_MAX_CONNECTIONS', 32)),
+            pool_timeout=float(os.environ.get('REDIS_POOL_TIMEOUT', 0.5)),
+            socket_timeout=float(os.environ.get('REDIS_SOCKET_TIMEOUT', 0.5)),
+            connect_timeout=float(os.environ.get('REDIS_CONNECT_TIMEOUT', 1.0)),
+            health_check_interval=float(os.environ.get('REDIS_HEALTH_CHECK_SECONDS', 15)),
+            breaker=CircuitBreaker(
+                failure_threshold=int(os.environ.get('REDIS_BREAKER_FAILURES', 5)),
+                reset_timeout=float(os.environ.get('REDIS_BREAKER_RESET_SECONDS', 10))
+            ),
+            fallback_size=int(os.environ.get('REDIS_FALLBACK_SIZE', 10000))
+        )
+
+    async def connect(self) -> None:
+        # Callers wait up to pool_timeout for a free connection instead of opening more
+        pool = SaturationAwarePool.from_url(
+            self.url,
+            max_connections=self.max_connections,
+            timeout=self.pool_timeout,
+            socket_timeout=self.socket_timeout,
+            socket_connect_timeout=self.connect_timeout,
+            health_check_interval=self.health_check_interval
+        )
+        self.client = aioredis.Redis(connection_pool=pool)
+
+    async def close(self) -> None:
+        pool = getattr(self.client, 'connection_pool', None)
+        if pool is not None:
+            await pool.disconnect()
+
+    @asynccontextmanager
+    async def guard(self) -> AsyncIterator[Any]:
+        """The client, for one unit of Redis work; raises RedisUnavailable if it fails or is not allowed"""
+        if not self.breaker.allow():
+            self.rejected += 1
+            raise RedisUnavailable("Redis circuit breaker is open")
+        try:
+            yield self.client
+        except PoolExhausted:
+            # Every connection was busy with other calls; this one never reached Redis
+            self.pool_exhausted += 1
+            self.breaker.trial_in_flight = False
+            raise
+        except aioredis.WatchError:
+            # Redis answered; the transaction just lost a race
+            self.breaker.record_success()
+            raise
+        except (aioredis.RedisError, OSError, asyncio.TimeoutError) as e:
+            self.failures += 1
+            self.breaker.record_failure()
+            raise RedisUnavailable(f"Redis unavailable: {e}") from e
+        except BaseException:
+            # Failed for reasons of its own, which says nothing about Redis
+            self.breaker.trial_in_flight = False
+            raise
+        else:
+            self.breaker.record_success()
+
+    def remember(self, key: str, value: bytes, ttl: float) -> None:
+        """Hold a value that could not be written to Redis, for reads until it expires"""
+        self._fallback[key] = (value, time.monotonic() + ttl)
+        self._fallback.move_to_end(key)
+        self.fallback_writes += 1
+        while len(self._fallback) > self.fallback_size:
+            self._fallback.popitem(last=False)
+
+    def recall(self, key: str) -> Tuple[Optional[bytes], Optional[float]]:
+        """A value held by remember() and its remaining TTL, or (None, None)"""
+        entry = self._fallback.get(key)
+        if entry is not None and entry[1] > time.monotonic():
+            self.fallback_hits += 1
+            return entry[0], entry[1] - time.monotonic()
+        self._fallback.pop(key, None)
+        self.fallback_misses += 1
+        return None, None
+
+    def forget(self, key: str) -> None:
+        """Drop a held value once Redis has a newer one"""
+        self._fallback.pop(key, None)
+
+    def stats(self) -> Dict[str, Any]:
+        in_use, idle = _pool_usage(getattr(self.client, 'connection_pool', None))
+        return {
+            'breaker_state': self.breaker.state,
+            'breaker_opened': self.breaker.times_opened,
+            'failures': self.failures,
+            'pool_exhausted': self.pool_exhausted,
+            'rejected': self.rejected,
+            'max_connections': self.max_connections,
+            'connections_in_use': in_use,
+            'connections_idle': idle,
+            'fallback_entries': len(self._fallback),
+            'fallback_hits': self.fallback_hits,
+            'fallback_misses': self.fallback_misses,
+            'fallback_writes': self.fallback_writes
+        }
+
+
+def _pool_usage(pool) -> Tuple[int, int]:
+    """Connections checked out and idle in a (blocking) connection pool, across client versions"""
+    if pool is None:
+        return 0, 0
+    if hasattr(pool, '_in_use_connections'):
+        return len(pool._in_use_connections), len(pool._available_connections)
+    # BlockingConnectionPool keeps idle connections in a queue padded with None placeholders
+    idle = sum(connection is not None for connection in getattr(getattr(pool, 'pool', None), '_queue', ()))
+    return len(getattr(pool, '_connections', ())) - idle, idle
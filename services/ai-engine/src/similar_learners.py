@@ -0,0 +1,422 @@
+import asyncio
+import json
+import os
+import time
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from sklearn.cluster import MiniBatchKMeans
+
+# Rows sampled to train the coarse quantizer
+TRAIN_SAMPLE = 100_000
+
+
+class SimilarLearnerIndex:
+    """
+    On-disk nearest-neighbour index over learning feature vectors, for
+    "learners like you" queries.
+
+    Vectors are stored raw in a memory-mapped file and compared in
+    standardized space: distances are weighted by the inverse variance of
+    each feature over the indexed population, so stored vectors never go
+    stale as the statistics move.
+
+    Until train_size vectors are indexed every query is an exact scan.
+    After that a coarse k-means quantizer splits the vectors into n_lists
+    inverted lists (IVF), and a query scans only the n_probe lists nearest
+    to it. A user whose profile is recomputed keeps their row, moving
+    between lists if their vector does.
+
+    Files under path:
+        vectors.f32   float32 rows, grown by doubling
+        lists.i4      inverted list of each row
+        ids.jsonl     user_id of each row, appended in row order
+        centroids.npy coarse quantizer, once trained
+        meta.json     row count and the population sums behind the weights
+
+    One process owns the index and writes to it; save() makes it durable.
+    Others open it read_only and see it as of the writer's last save, less
+    any rows the writer has since moved between lists, until they reopen
+    it once changed_on_disk().
+
+    The quantizer can be trained with train_async(), which fits it in a
+    worker thread while upserts and queries carry on against the current
+    lists, and checkpoints written with save_async(), which snapshots the
+    statistics and leaves the flushing and writing to a worker thread.
+    """
+    def __init__(self, path: str, dim: int = 12, n_lists: int = 1024, n_probe: int = 16,
+                 train_size: Optional[int] = None, checkpoint_interval: float = 60.0, read_only: bool = False):
+        self.path = path
+        self.n_probe = n_probe
+        self.checkpoint_interval = checkpoint_interval
+        self.read_only = read_only
+        os.makedirs(path, exist_ok=True)
+
+        meta_path = os.path.join(path, 'meta.json')
+        if os.path.exists(meta_path):
+            self._meta_mtime = os.stat(meta_path).st_mtime_ns
+            with open(meta_path) as f:
+                meta = json.load(f)
+            dim, n_lists = meta['dim'], meta['n_lists']
+        else:
+            self._meta_mtime = None
+            meta = {'count': 0, 'sums': [0.0] * dim, 'squares': [0.0] * dim}
+        self.dim = dim
+        self.n_lists = n_lists
+        self.train_size = train_size or 40 * n_lists
+        self._sums = np.array(meta['sums'], dtype=np.float64)
+        self._squares = np.array(meta['squares'], dtype=np.float64)
+
+        self._user_ids: List[str] = []
+        ids_path = os.path.join(path, 'ids.jsonl')
+        if os.path.exists(ids_path):
+            with open(ids_path) as f:
+                self._user_ids = [json.loads(line) for line, _ in zip(f, range(meta['count']))]
+        # Rows past the last save may have ids but no statistics; drop them
+        self._user_ids = self._user_ids[:meta['count']]
+        self._ids_file = None
+        if not read_only:
+            with open(ids_path, 'w') as f:
+                f.writelines(json.dumps(user_id) + '\n' for user_id in self._user_ids)
+            self._ids_file = open(ids_path, 'a')
+        self._rows: Dict[str, int] = {user_id: row for row, user_id in enumerate(self._user_ids)}
+
+        self._capacity = 0
+        self._vectors = self._lists = self._positions = None
+        if read_only:
+            self._map_read_only(len(self._user_ids))
+        else:
+            self._grow(max(1024, len(self._user_ids)))
+
+        centroids_path = os.path.join(path, 'centroids.npy')
+        self._centroids = np.load(centroids_path) if os.path.exists(centroids_path) else None
+        if self._centroids is not None:
+            self.n_lists = len(self._centroids)
+            # Lists written after the centroids were saved may belong to a newer quantizer
+            count = len(self._user_ids)
+            invalid = np.flatnonzero((self._lists[:count] < 0) | (self._lists[:count] >= self.n_lists))
+            if len(invalid):
+                self._lists[invalid] = self._assign_lists(self._vectors[invalid])
+        self._rebuild_lists()
+        self._last_checkpoint = time.monotonic()
+        self._dirty = False
+        # Rows upserted while train_async() is fitting, None when it is not
+        self._touched: Optional[List[np.ndarray]] = None
+
+    @classmethod
+    def from_env(cls, read_only: bool = False) -> 'SimilarLearnerIndex':
+        """Configure from SIMILAR_LEARNERS_PATH (default under MODEL_PATH), SIMILAR_LEARNERS_LISTS and SIMILAR_LEARNERS_PROBE"""
+        return cls(
+            os.environ.get('SIMILAR_LEARNERS_PATH',
+                           os.path.join(os.environ.get('MODEL_PATH', 'models'), 'similar_learners')),
+            n_lists=int(os.environ.get('SIMILAR_LEARNERS_LISTS', 1024)),
+            n_probe=int(os.environ.get('SIMILAR_LEARNERS_PROBE', 16)),
+            read_only=read_only
+        )
+
+    @property
+    def needs_training(self) -> bool:
+        """True once train_size vectors are indexed without a quantizer, unless one is being trained"""
+        return (not self.read_only and self._centroids is None and self._touched is None
+                and len(self._user_ids) >= self.train_size)
+
+    @property
+    def checkpoint_due(self) -> bool:
+        """True if the index changed and checkpoint_interval has passed since the last save"""
+        return self._dirty and time.monotonic() - self._last_checkpoint >= self.checkpoint_interval
+
+    def changed_on_disk(self) -> bool:
+        """True if a save has landed since this index was opened"""
+        try:
+            return os.stat(os.path.join(self.path, 'meta.json')).st_mtime_ns != self._meta_mtime
+        except FileNotFoundError:
+            return False
+
+    def __len__(self) -> int:
+        return len(self._user_ids)
+
+    def __contains__(self, user_id: str) -> bool:
+        return user_id in self._rows
+
+    def upsert(self, user_ids: Sequence[str], features: np.ndarray) -> None:
+        """Insert or replace the feature vectors of the given users"""
+        self._check_writable()
+        if len(user_ids) == 0:
+            return
+        features = self._fill_missing(np.asarray(features, dtype=np.float64).reshape(len(user_ids), self.dim))
+
+        rows = np.empty(len(user_ids), dtype=np.int64)
+        new_ids = []
+        for i, user_id in enumerate(user_ids):
+            row = self._rows.get(user_id)
+            if row is None:
+                row = len(self._user_ids) + len(new_ids)
+                self._rows[user_id] = row
+                new_ids.append(user_id)
+            rows[i] = row
+        # Last write wins when a user appears twice
+        rows, last = np.unique(rows[::-1], return_index=True)
+        features = features[::-1][last]
+
+        existing = rows < len(self._user_ids)
+        old = self._vectors[rows[existing]].astype(np.float64)
+        self._sums += features.sum(axis=0) - old.sum(axis=0)
+        self._squares += (features ** 2).sum(axis=0) - (old ** 2).sum(axis=0)
+
+        if new_ids:
+            self._grow(len(self._user_ids) + len(new_ids))
+            self._user_ids.extend(new_ids)
+            self._ids_file.writelines(json.dumps(user_id) + '\n' for user_id in new_ids)
+
+        self._vectors[rows] = features
+        lists = self._assign_lists(features)
+        moved = existing & (self._lists[rows] != lists)
+        for row in rows[moved]:
+            self._remove_member(int(self._lists[row]), int(row))
+        self._lists[rows] = lists
+        for list_id, list_rows in _group_rows(lists[moved | ~existing], rows[moved | ~existing]):
+            self._append_members(list_id, list_rows)
+        self._dirty = True
+        if self._touched is not None:
+            self._touched.append(rows)
+
+    def query(self, features: np.ndarray, k: int = 10, n_probe: Optional[int] = None,
+              exclude: Optional[str] = None) -> List[Tuple[str, float]]:
+        """The k nearest indexed users with their standardized squared distances, nearest first"""
+        if not self._user_ids:
+            return []
+        weights = self._weights()
+        query = self._fill_missing(np.asarray(features, dtype=np.float64).reshape(1, self.dim))[0]
+
+        if self._centroids is None:
+            candidates = self._members[0][:self._member_sizes[0]]
+        else:
+            n_probe = min(n_probe or self.n_probe, self.n_lists)
+            centroid_distances = (((self._centroids - query) ** 2) * weights).sum(axis=1)
+            probed = np.argpartition(centroid_distances, n_probe - 1)[:n_probe]
+            candidates = np.concatenate([self._members[l][:self._member_sizes[l]] for l in probed])
+        if exclude is not None and exclude in self._rows:
+            candidates = candidates[candidates != self._rows[exclude]]
+        if len(candidates) == 0:
+            return []
+
+        distances = (((self._vector_rows[candidates] - query.astype(np.float32)) ** 2) * weights.astype(np.float32)).sum(axis=1)
+        k = min(k, len(candidates))
+        nearest = np.argpartition(distances, k - 1)[:k]
+        nearest = nearest[np.argsort(distances[nearest], kind='stable')]
+        return [(self._user_ids[candidates[i]], float(distances[i])) for i in nearest]
+
+    def neighbours(self, user_id: str, k: int = 10, n_probe: Optional[int] = None) -> Optional[List[Tuple[str, float]]]:
+        """The k users nearest to an indexed user, excluding themselves; None if the user is not indexed"""
+        row = self._rows.get(user_id)
+        if row is None:
+            return None
+        return self.query(self._vectors[row], k, n_probe, exclude=user_id)
+
+    def brute_force(self, features: np.ndarray, k: int = 10, exclude: Optional[str] = None) -> List[Tuple[str, float]]:
+        """Exact k nearest, scanning every row; the reference for recall"""
+        count = len(self._user_ids)
+        query = self._fill_missing(np.asarray(features, dtype=np.float64).reshape(1, self.dim))[0]
+        distances = (((self._vector_rows[:count] - query.astype(np.float32)) ** 2) * self._weights().astype(np.float32)).sum(axis=1)
+        if exclude is not None and exclude in self._rows:
+            distances[self._rows[exclude]] = np.inf
+        k = min(k, count)
+        nearest = np.argpartition(distances, k - 1)[:k]
+        nearest = nearest[np.argsort(distances[nearest], kind='stable')]
+        return [(self._user_ids[i], float(distances[i])) for i in nearest if np.isfinite(distances[i])]
+
+    def train(self) -> None:
+        """(Re)train the coarse quantizer on a sample of the indexed vectors and reassign every row"""
+        self._check_writable()
+        self._install_quantizer(*self._fit_quantizer(len(self._user_ids), self._weights()))
+
+    async def train_async(self) -> None:
+        """
+        train() with the fit and the reassignment in a worker thread. Until it finishes the index
+        keeps its current lists; rows upserted meanwhile are reassigned once the quantizer is in.
+        """
+        self._check_writable()
+        self._touched = []
+        try:
+            quantizer = await asyncio.to_thread(self._fit_quantizer, len(self._user_ids), self._weights())
+            self._install_quantizer(*quantizer)
+        finally:
+            self._touched = None
+
+    def save(self) -> None:
+        if self._dirty:
+            self._write_checkpoint(self._checkpoint())
+
+    async def save_async(self) -> None:
+        """save() with the flushing and writing in a worker thread"""
+        if self._dirty:
+            await asyncio.to_thread(self._write_checkpoint, self._checkpoint())
+
+    def _checkpoint(self) -> Tuple[Optional[np.ndarray], Dict]:
+        """Snapshot of what a save writes besides the memory-mapped rows, marking the index clean"""
+        meta = {
+            'dim': self.dim,
+            'n_lists': self.n_lists,
+            'count': len(self._user_ids),
+            'sums': self._sums.tolist(),
+            'squares': self._squares.tolist()
+        }
+        self._last_checkpoint = time.monotonic()
+        self._dirty = False
+        return self._centroids, meta
+
+    def _write_checkpoint(self, checkpoint: Tuple[Optional[np.ndarray], Dict]) -> None:
+        centroids, meta = checkpoint
+        try:
+            # Every row counted in meta was written before the snapshot, so flushing now covers it
+            self._vectors.flush()
+            self._lists.flush()
+            self._ids_file.flush()
+            if centroids is not None:
+                _write_atomically(os.path.join(self.path, 'centroids.npy'), lambda f: np.save(f, centroids))
+            _write_atomically(os.path.join(self.path, 'meta.json'), lambda f: f.write(json.dumps(meta).encode()))
+        except Exception:
+            self._dirty = True
+            raise
+
+    def _check_writable(self) -> None:
+        if self.read_only:
+            raise PermissionError(f"Similar-learner index at {self.path} is open read-only")
+
+    def _fit_quantizer(self, count: int, weights: np.ndarray) -> Tuple[np.ndarray, int, np.ndarray]:
+        """Centroids trained on a sample of the first count rows, and the list of each of those rows"""
+        n_lists = min(self.n_lists, count)
+        rng = np.random.default_rng(0)
+        vectors = self._vectors
+        sample = vectors[np.sort(rng.choice(count, min(count, TRAIN_SAMPLE), replace=False))]
+        scale = np.sqrt(weights)
+        kmeans = MiniBatchKMeans(n_clusters=n_lists, batch_size=4096, n_init=1, random_state=0)
+        kmeans.fit(sample * scale)
+        centroids = kmeans.cluster_centers_ / scale
+
+        lists = np.empty(count, dtype=np.int32)
+        for start in range(0, count, TRAIN_SAMPLE):
+            end = min(start + TRAIN_SAMPLE, count)
+            lists[start:end] = _nearest_centroids(vectors[start:end], centroids, weights)
+        return centroids, count, lists
+
+    def _install_quantizer(self, centroids: np.ndarray, count: int, lists: np.ndarray) -> None:
+        self._centroids = centroids
+        self.n_lists = len(centroids)
+        self._lists[:count] = lists
+        # Rows added or changed since the fit read them
+        stale = [np.arange(count, len(self._user_ids))] + (self._touched or [])
+        stale = np.unique(np.concatenate(stale))
+        if len(stale):
+            self._lists[stale] = self._assign_lists(self._vectors[stale])
+        self._rebuild_lists()
+        self._dirty = True
+
+    def _weights(self) -> np.ndarray:
+        """Inverse variance of each feature over the indexed population"""
+        count = max(len(self._user_ids), 1)
+        mean = self._sums / count
+        variance = self._squares / count - mean ** 2
+        return np.where(variance > 1e-12, 1.0 / np.maximum(variance, 1e-12), 1.0)
+
+    def _fill_missing(self, features: np.ndarray) -> np.ndarray:
+        """Missing features take the population mean, so they do not count towards distance"""
+        missing = ~np.isfinite(features)
+        if missing.any():
+            features = features.copy()
+            mean = self._sums / max(len(self._user_ids), 1)
+            features[missing] = np.broadcast_to(mean, features.shape)[missing]
+        return features
+
+    def _assign_lists(self, features: np.ndarray) -> np.ndarray:
+        if self._centroids is None:
+            return np.zeros(len(features), dtype=np.int32)
+        return _nearest_centroids(features, self._centroids, self._weights())
+
+    def _map_read_only(self, count: int) -> None:
+        """Map the first count rows of another process's index without the means to change them"""
+        if count:
+            self._vectors = np.memmap(os.path.join(self.path, 'vectors.f32'), dtype=np.float32, mode='r', shape=(count, self.dim))
+            # A private copy, since _rebuild_lists normalises it
+            self._lists = np.array(np.memmap(os.path.join(self.path, 'lists.i4'), dtype=np.int32, mode='r', shape=(count,)))
+        else:
+            self._vectors = np.empty((0, self.dim), dtype=np.float32)
+            self._lists = np.empty(0, dtype=np.int32)
+        self._vector_rows = self._vectors.view(np.ndarray)
+        self._capacity = count
+
+    def _grow(self, rows: int) -> None:
+        if rows <= self._capacity:
+            return
+        capacity = max(rows, 2 * self._capacity)
+        for name, dtype, shape in (('vectors.f32', np.float32, (capacity, self.dim)), ('lists.i4', np.int32, (capacity,))):
+            file_path = os.path.join(self.path, name)
+            with open(file_path, 'ab') as f:
+                f.truncate(int(np.prod(shape)) * np.dtype(dtype).itemsize)
+        if self._vectors is not None:
+            self._vectors.flush()
+            self._lists.flush()
+        self._vectors = np.memmap(os.path.join(self.path, 'vectors.f32'), dtype=np.float32, mode='r+', shape=(capacity, self.dim))
+        # Plain view of the same pages, for gathers without memmap's indexing overhead
+        self._vector_rows = self._vectors.view(np.ndarray)
+        self._lists = np.memmap(os.path.join(self.path, 'lists.i4'), dtype=np.int32, mode='r+', shape=(capacity,))
+        if self._positions is not None:
+            self._positions = np.concatenate([self._positions, np.empty(capacity - len(self._positions), dtype=np.int64)])
+        self._capacity = capacity
+
+    def _rebuild_lists(self) -> None:
+        n_lists = 1 if self._centroids is None else self.n_lists
+        count = len(self._user_ids)
+        lists = np.asarray(self._lists[:count]) if self._centroids is not None else np.zeros(count, dtype=np.int32)
+        self._lists[:count] = lists
+        order = np.argsort(lists, kind='stable')
+        bounds = np.searchsorted(lists[order], np.arange(n_lists + 1))
+        self._members = [order[start:end].astype(np.int64) for start, end in zip(bounds[:-1], bounds[1:])]
+        self._member_sizes = [len(members) for members in self._members]
+        # Position of each row within its list, for removal in constant time
+        self._positions = np.empty(self._capacity, dtype=np.int64)
+        self._positions[order] = np.arange(count) - bounds[lists[order]]
+
+    def _append_members(self, list_id: int, rows: np.ndarray) -> None:
+        members, size = self._members[list_id], self._member_sizes[list_id]
+        if size + len(rows) > len(members):
+            grown = np.empty(max(size + len(rows), 2 * len(members), 16), dtype=np.int64)
+            grown[:size] = members[:size]
+            self._members[list_id] = members = grown
+        members[size:size + len(rows)] = rows
+        self._positions[rows] = np.arange(size, size + len(rows))
+        self._member_sizes[list_id] = size + len(rows)
+
+    def _remove_member(self, list_id: int, row: int) -> None:
+        """Swap the list's last member into the row's place"""
+        members, size = self._members[list_id], self._member_sizes[list_id] - 1
+        position = self._positions[row]
+        last = members[size]
+        members[position] = last
+        self._positions[last] = position
+        self._member_sizes[list_id] = size
+
+
+def _nearest_centroids(features: np.ndarray, centroids: np.ndarray, weights: np.ndarray) -> np.ndarray:
+    """Index of the nearest centroid to each row, in standardized space"""
+    scale = np.sqrt(weights)
+    scaled = features * scale
+    centroids = centroids * scale
+    distances = -2 * scaled @ centroids.T + (centroids ** 2).sum(axis=1)
+    return np.argmin(distances, axis=1).astype(np.int32)
+
+
+def _group_rows(lists: np.ndarray, rows: np.ndarray):
+    """(list, rows) pairs for each distinct list"""
+    order = np.argsort(lists, kind='stable')
+    lists, rows = lists[order], rows[order]
+    starts = np.flatnonzero(np.r_[True, lists[1:] != lists[:-1]]) if len(lists) else []
+    for start, end in zip(starts, list(starts[1:]) + [len(lists)]):
+        yield int(lists[start]), rows[start:end]
+
+
+def _write_atomically(path: str, write) -> None:
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    with open(temp_path, 'wb') as f:
+        write(f)
+    os.replace(temp_path, path)
@@ -0,0 +1,102 @@
+import fcntl
+import os
+import time
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+
+INBOX_SUFFIX = '.npz'
+
+
+class WriterRole:
+    """
+    Which of the serving processes sharing a model directory owns the
+    learned models: the archetype checkpoints published to the model
+    registry and the similar-learner index.
+
+    The first process to take an exclusive lock on <path>/writer.lock is the
+    writer, and holds the lock until it exits; every other process is a
+    reader, which opens the index read-only and follows the writer's
+    checkpoints. try_acquire() lets a reader take over once the writer is gone.
+
+    Readers do not drop the feature vectors they extract. put() buffers
+    them and flush() writes the buffer as one file under <path>/inbox,
+    which the writer folds into its models with take().
+    """
+    def __init__(self, path: str):
+        self.path = path
+        self.inbox_path = os.path.join(path, 'inbox')
+        self.is_writer = False
+        self._lock_file = None
+        self._buffered: List[Tuple[Sequence[str], np.ndarray]] = []
+
+    @classmethod
+    def from_env(cls) -> 'WriterRole':
+        """Configure from MODEL_PATH"""
+        return cls(os.environ.get('MODEL_PATH', 'models'))
+
+    def try_acquire(self) -> bool:
+        """Become the writer if no other process is; True if this process is the writer"""
+        if self.is_writer:
+            return True
+        os.makedirs(self.path, exist_ok=True)
+        lock_file = open(os.path.join(self.path, 'writer.lock'), 'a')
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            lock_file.close()
+            return False
+        self._lock_file = lock_file
+        self.is_writer = True
+        return True
+
+    def release(self) -> None:
+        if self._lock_file is not None:
+            fcntl.flock(self._lock_file, fcntl.LOCK_UN)
+            self._lock_file.close()
+            self._lock_file = None
+        self.is_writer = False
+
+    def put(self, user_ids: Sequence[str], features: np.ndarray) -> None:
+        """Buffer a reader's feature vectors until the next flush()"""
+        self._buffered.append((list(user_ids), features))
+
+    def take_buffered(self) -> Optional[Tuple[List[str], np.ndarray]]:
+        """Empty the buffer, returning its vectors for flush()"""
+        if not self._buffered:
+            return None
+        user_ids = [user_id for batch_ids, _ in self._buffered for user_id in batch_ids]
+        features = np.vstack([features for _, features in self._buffered])
+        self._buffered = []
+        return user_ids, features
+
+    def flush(self, observed: Optional[Tuple[List[str], np.ndarray]]) -> None:
+        """Hand vectors from take_buffered() to the writer, as one inbox file"""
+        if observed is None:
+            return
+        user_ids, features = observed
+        os.makedirs(self.inbox_path, exist_ok=True)
+        path = os.path.join(self.inbox_path, f"{time.time_ns():020d}-{os.getpid()}{INBOX_SUFFIX}")
+        # Write aside and rename, so the writer never reads a partial file
+        temp_path = f"{path}.tmp"
+        with open(temp_path, 'wb') as f:
+            np.savez(f, user_ids=np.array(user_ids, dtype=str), features=features)
+        os.replace(temp_path, path)
+
+    def take(self) -> Optional[Tuple[List[str], np.ndarray]]:
+        """Vectors readers have handed over since the last call, oldest first, removing their files"""
+        try:
+            names = sorted(name for name in os.listdir(self.inbox_path) if name.endswith(INBOX_SUFFIX))
+        except FileNotFoundError:
+            return None
+        user_ids: List[str] = []
+        features = []
+        for name in names:
+            path = os.path.join(self.inbox_path, name)
+            with np.load(path) as batch:
+                user_ids.extend(batch['user_ids'].tolist())
+                features.append(batch['features'])
+            os.remove(path)
+        if not user_ids:
+            return None
+        return user_ids, np.vstack(features)
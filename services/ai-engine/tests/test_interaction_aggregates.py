@@ -0,0 +1,65 @@
+"""
+Standard deviations of InteractionAggregates, with and without time decay.
+
+    python -m pytest services/ai-engine/tests
+"""
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path[:0] = [os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', directory)
+                for directory in ('src', 'benchmarks')]
+
+from interaction_aggregates import InteractionAggregates
+from learning_style_state import LearningStyleState
+from synthetic import generate_interactions
+
+DAY = 86400
+
+
+def stationary_interactions(n: int, spacing: float, seed: int) -> pd.DataFrame:
+    """n interactions, spacing seconds apart, with response times drawn from one normal distribution"""
+    df = generate_interactions(n, n_users=1, seed=seed)
+    df['timestamp'] = (pd.Timestamp('2026-01-01') + pd.to_timedelta(np.arange(n) * spacing, unit='s')).astype(str)
+    df['response_time'] = np.random.default_rng(seed).normal(3000, 2850, n)
+    return df
+
+
+def test_std_matches_pandas():
+    df = stationary_interactions(500, 3600, seed=0)
+    aggregates = InteractionAggregates.from_frame(df)
+    for column in ('response_time', 'difficulty_level'):
+        assert aggregates.std(column) == pytest.approx(df[column].std(), rel=1e-9)
+
+
+@pytest.mark.parametrize('weight', [0.5, 0.05, 0.001])
+def test_equal_weights_keep_std(weight):
+    df = stationary_interactions(104, 7 * DAY, seed=1)
+    weighted = InteractionAggregates.from_frame(df, weights=np.full(len(df), weight))
+    assert weighted.std('response_time') == pytest.approx(df['response_time'].std(), rel=1e-9)
+    decayed = InteractionAggregates.from_frame(df).decayed(weight)
+    assert decayed.std('response_time') == pytest.approx(df['response_time'].std(), rel=1e-9)
+
+
+@pytest.mark.parametrize('half_life_days', [30, 7, 1])
+def test_decayed_std_stays_near_undecayed_for_stationary_data(half_life_days):
+    decayed, undecayed = [], []
+    for seed in range(20):
+        df = stationary_interactions(2400, 2 * 3600, seed)
+        for half_life, variances in ((half_life_days * DAY, decayed), (None, undecayed)):
+            state = LearningStyleState(half_life)
+            # In batches, so that the state is aged forward between them
+            for rows in np.array_split(np.arange(len(df)), 4):
+                state.update(df.iloc[rows])
+            variances.append(state.aggregates.std('response_time') ** 2)
+    assert np.sqrt(np.mean(decayed)) == pytest.approx(np.sqrt(np.mean(undecayed)), rel=0.1)
+
+
+def test_moments_stored_without_squared_weights_load():
+    df = stationary_interactions(200, 3600, seed=2)
+    stored = InteractionAggregates.from_frame(df).to_dict()
+    stored['moments'] = {column: moments[:3] for column, moments in stored['moments'].items()}
+    assert InteractionAggregates.from_dict(stored).std('response_time') == pytest.approx(df['response_time'].std(), rel=1e-9)